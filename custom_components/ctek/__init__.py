@@ -8,21 +8,27 @@ from typing import TYPE_CHECKING, Any
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntryState
 from homeassistant.const import ATTR_DEVICE_ID, CONF_PASSWORD, CONF_USERNAME, Platform
+from homeassistant.core import SupportsResponse
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.loader import async_get_loaded_integration
+from homeassistant.util import dt as dt_util
 
-from .api import CtekApiClient
+from .api import CtekApiClient, async_create_session
+from .capture import TrafficRecorder, capture_path
 from .config_flow import APP_PROFILE, USER_AGENT
+from .const import API_HOST, DOMAIN, VERSION
 from .const import BASE_LOGGER as LOGGER
-from .const import DOMAIN, VERSION
 from .coordinator import CtekDataUpdateCoordinator
 from .data import CtekData
+from .resilience import get_breaker, get_rate_limiter
+from .sessions import aggregate
 
 if TYPE_CHECKING:
+    import aiohttp
     from homeassistant.core import HomeAssistant, ServiceCall
+    from homeassistant.helpers.typing import ConfigType
 
     from .data import CtekConfigEntry
     from .ws import WebSocketClient
@@ -34,6 +40,42 @@ PLATFORMS: list[Platform] = [
     Platform.SWITCH,
 ]
 
+# Options that can be applied to a running entry without reloading anything
+HOT_OPTIONS = frozenset(
+    {
+        "log_level",
+        "user_agent",
+        "app_profile",
+        "update_interval",
+        "enable_quirks",
+        "start_charge_min_current",
+        "reboot_station_if_start_fails",
+        "quirks_toggle_switch",
+        "quirks_call_service",
+        "enable_throttling",
+        "capture_traffic",
+    }
+)
+HOT_OPTION_PREFIXES = ("throttle_",)
+# Options that need a new API client, so the whole entry is reloaded
+RELOAD_OPTIONS = frozenset({"dedicated_session"})
+DEFAULT_UPDATE_INTERVAL = 60  # minutes
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+def _is_hot_option(key: str) -> bool:
+    return key in HOT_OPTIONS or key.startswith(HOT_OPTION_PREFIXES)
+
+
+async def async_setup(
+    hass: HomeAssistant,
+    config: ConfigType,  # noqa: ARG001 Unused function argument: `config`
+) -> bool:
+    """Set up the actions, once for all the chargers."""
+    _register_services(hass)
+    return True
+
 
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
 async def async_setup_entry(
@@ -46,7 +88,9 @@ async def async_setup_entry(
     hass.data.setdefault(DOMAIN, {})
     coordinator = CtekDataUpdateCoordinator(
         hass=hass,
-        update_interval=timedelta(hours=1),
+        update_interval=timedelta(
+            minutes=entry.options.get("update_interval", DEFAULT_UPDATE_INTERVAL)
+        ),
         always_update=False,
         config_entry=entry,
     )
@@ -58,33 +102,72 @@ async def async_setup_entry(
             password=entry.data[CONF_PASSWORD],
             client_id=entry.data["client_id"],
             client_secret=entry.data["client_secret"],
-            session=async_get_clientsession(hass),
+            session=_async_get_session(hass, entry),
             refresh_token=await coordinator.get_token(),
             app_profile=entry.options.get("app_profile", APP_PROFILE),
             user_agent=entry.options.get("user_agent", USER_AGENT),
+            base_url=entry.data.get("api_host", API_HOST),
+            breaker=get_breaker(hass, entry.data[CONF_USERNAME]),
+            rate_limiter=get_rate_limiter(hass, entry.data[CONF_USERNAME]),
         ),
         integration=async_get_loaded_integration(hass, entry.domain),
         coordinator=coordinator,
+        applied_data=dict(entry.data),
+        applied_options=dict(entry.options),
     )
 
     if hass.data[DOMAIN].get(entry.entry_id, None) is None:
         hass.data[DOMAIN][entry.entry_id] = {}
 
+    _apply_capture(hass, entry)
+    if entry.options.get("dedicated_session", False):
+        entry.async_create_background_task(
+            hass, entry.runtime_data.client.prewarm(), "ctek prewarm connection"
+        )
+    entry.async_on_unload(
+        entry.runtime_data.client.breaker.add_listener(
+            coordinator.async_update_listeners
+        )
+    )
+
     if entry.state == ConfigEntryState.SETUP_IN_PROGRESS:
-        # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
-        await coordinator.async_config_entry_first_refresh()
+        if await coordinator.async_restore_snapshot():
+            # Entities come up from the cache, the cloud catches up in the background
+            coordinator.async_refresh_in_background()
+        else:
+            # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
+            await coordinator.async_config_entry_first_refresh()
     else:
         # Handle the case where the entry is already loaded
         await coordinator.async_refresh()
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    await coordinator.quirks.async_restore()
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
-    # Register service
+    return True
+
+
+def _coordinators(
+    hass: HomeAssistant, call: ServiceCall
+) -> list[CtekDataUpdateCoordinator]:
+    """Return the coordinators of the loaded chargers an action targets."""
+    device_ids = call.data[ATTR_DEVICE_ID]
+    return [
+        entry.runtime_data.coordinator
+        for entry in hass.config_entries.async_loaded_entries(DOMAIN)
+        if entry.runtime_data.coordinator.device_entry.id in device_ids
+    ]
+
+
+def _register_services(hass: HomeAssistant) -> None:
+    """Register the actions, each finds the chargers it targets when called."""
+
     async def handle_refresh(call: ServiceCall) -> Any:
         """Handle the service call."""
         try:
-            await coordinator.async_refresh()
+            for coordinator in _coordinators(hass, call):
+                await coordinator.async_refresh()
         except Exception as ex:
             msg = "API call failed"
             LOGGER.error("%s: %s", msg, ex)
@@ -108,24 +191,17 @@ async def async_setup_entry(
         """Handle the service call."""
         command = call.data["command"]
 
-        device_registry = dr.async_get(hass)
-        device_ids = call.data[ATTR_DEVICE_ID]
-
-        for device_id in device_ids:
-            device = device_registry.async_get(device_id)
-            if device is not None and coordinator.device_entry.id == device_id:
-                try:
-                    # Your API call implementation
-                    result = await coordinator.send_command(command=command)
-                    # hass.data[DOMAIN]["api"].call_endpoint(endpoint, payload)
-                except Exception as ex:
-                    LOGGER.error("API call failed: %s", ex)
-                    msg = f"API call failed: {ex}"
-                    raise HomeAssistantError(msg) from ex
-                else:
-                    LOGGER.debug("Got result: %s", result)
-                    if call.return_response:
-                        return result
+        for coordinator in _coordinators(hass, call):
+            try:
+                result = await coordinator.send_command(command=command)
+            except Exception as ex:
+                LOGGER.error("API call failed: %s", ex)
+                msg = f"API call failed: {ex}"
+                raise HomeAssistantError(msg) from ex
+            else:
+                LOGGER.debug("Got result: %s", result)
+                if call.return_response:
+                    return result
         return None
 
     hass.services.async_register(
@@ -140,7 +216,88 @@ async def async_setup_entry(
         ),
     )
 
-    return True
+    async def handle_get_session_curve(call: ServiceCall) -> Any:
+        """Return the telemetry curve of the current sessions."""
+        if not (coordinators := _coordinators(hass, call)):
+            return {"curves": {}}
+        coordinator = coordinators[0]
+        connector_id = call.data.get("connector_id")
+        return {
+            "curves": {
+                str(c): curve.as_dict()
+                for c, curve in coordinator.history.curves.items()
+                if connector_id in (None, c)
+            }
+        }
+
+    hass.services.async_register(
+        domain=DOMAIN,
+        service="get_session_curve",
+        service_func=handle_get_session_curve,
+        schema=vol.Schema(
+            {
+                vol.Optional("connector_id"): cv.positive_int,
+                vol.Required(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+            }
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def handle_session_analytics(call: ServiceCall) -> Any:
+        """Return the analytics of the session curves."""
+        if not (coordinators := _coordinators(hass, call)):
+            return {"analytics": {}}
+        analytics = await coordinators[0].async_session_analytics(
+            call.data.get("connector_id")
+        )
+        return {"analytics": {str(c): result for c, result in analytics.items()}}
+
+    hass.services.async_register(
+        domain=DOMAIN,
+        service="session_analytics",
+        service_func=handle_session_analytics,
+        schema=vol.Schema(
+            {
+                vol.Optional("connector_id"): cv.positive_int,
+                vol.Required(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+            }
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def handle_query_sessions(call: ServiceCall) -> Any:
+        """Return the completed sessions of a time window and their totals."""
+        if not (coordinators := _coordinators(hass, call)):
+            return {"sessions": []}
+        start, end = (
+            None
+            if (when := call.data.get(field)) is None
+            # Naive times are local times
+            else when.replace(tzinfo=when.tzinfo or dt_util.get_default_time_zone())
+            for field in ("start", "end")
+        )
+        sessions = coordinators[0].sessions.query(
+            start=start, end=end, connector_id=call.data.get("connector_id")
+        )
+        return {
+            **aggregate(sessions),
+            "sessions": [session.as_dict() for session in sessions],
+        }
+
+    hass.services.async_register(
+        domain=DOMAIN,
+        service="query_sessions",
+        service_func=handle_query_sessions,
+        schema=vol.Schema(
+            {
+                vol.Optional("start"): cv.datetime,
+                vol.Optional("end"): cv.datetime,
+                vol.Optional("connector_id"): cv.positive_int,
+                vol.Required(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+            }
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
 
 
 async def async_unload_entry(
@@ -156,6 +313,10 @@ async def async_unload_entry(
     # Cleanup code, close connections, etc.
     if client is not None:
         await client.stop()
+    await entry.runtime_data.coordinator.unload()
+    if (recorder := entry.runtime_data.client.recorder) is not None:
+        entry.runtime_data.client.recorder = None
+        await recorder.async_stop()
     await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     return True
 
@@ -164,12 +325,88 @@ async def async_reload_entry(
     hass: HomeAssistant,
     entry: CtekConfigEntry,
 ) -> None:
-    """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    """Handle config entry updates.
+
+    Only credential or device changes reload the whole entry. Other option changes
+    are applied in place, keeping the API client, tokens and WebSocket connection.
+    """
+    runtime_data = entry.runtime_data
+    if dict(entry.data) != runtime_data.applied_data:
+        LOGGER.debug("Entry data changed; reloading")
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    old = runtime_data.applied_options
+    changed = {
+        key
+        for key in old.keys() | entry.options.keys()
+        if old.get(key) != entry.options.get(key)
+    }
+    if not changed:
+        return
+    if changed & RELOAD_OPTIONS:
+        LOGGER.debug("Options changed: %s; reloading", changed & RELOAD_OPTIONS)
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+
+    LOGGER.debug("Applying changed options in place: %s", changed)
+    _apply_options(entry)
+    _apply_capture(hass, entry)
+    if "enable_quirks" in changed and not entry.options.get("enable_quirks", False):
+        # Stop the sequences already running
+        quirks = runtime_data.coordinator.quirks
+        for connector_id in quirks.connectors:
+            await quirks.async_cancel(connector_id)
+    runtime_data.applied_options = dict(entry.options)
+    if not all(_is_hot_option(key) for key in changed):
+        # Options that change the entities themselves only need a platform reload
+        await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    else:
+        runtime_data.coordinator.async_update_listeners()
+
+
+def _apply_options(entry: CtekConfigEntry) -> None:
+    """Apply the options that do not require a reload."""
+    LOGGER.setLevel(entry.options.get("log_level", "INFO"))
+    entry.runtime_data.client.update_app_headers(
+        user_agent=entry.options.get("user_agent", USER_AGENT),
+        app_profile=entry.options.get("app_profile", APP_PROFILE),
+    )
+    # Takes effect when the next refresh is scheduled
+    entry.runtime_data.coordinator.update_interval = timedelta(
+        minutes=entry.options.get("update_interval", DEFAULT_UPDATE_INTERVAL)
+    )
+
+
+def _async_get_session(
+    hass: HomeAssistant, entry: CtekConfigEntry
+) -> aiohttp.ClientSession:
+    """Return the HTTP session of the entry, a dedicated one if enabled."""
+    if not entry.options.get("dedicated_session", False):
+        return async_get_clientsession(hass)
+    session = async_create_session()
+    entry.async_on_unload(session.close)
+    return session
+
+
+def _apply_capture(hass: HomeAssistant, entry: CtekConfigEntry) -> None:
+    """Start or stop capturing the cloud traffic of the entry."""
+    client = entry.runtime_data.client
+    if entry.options.get("capture_traffic", False):
+        if client.recorder is None:
+            client.recorder = TrafficRecorder(hass, capture_path(hass, entry.entry_id))
+            client.recorder.start()
+    elif client.recorder is not None:
+        recorder, client.recorder = client.recorder, None
+        entry.async_create_background_task(
+            hass, recorder.async_stop(), "ctek stop traffic capture"
+        )
 
 
 CONFIG_VERSION = 3
+# First minor version with the configs_as_attributes option
+CONFIGS_OPTION_MINOR_VERSION = 3
 
 
 async def async_migrate_entry(
@@ -182,7 +419,7 @@ async def async_migrate_entry(
         config_entry.minor_version,
     )
     min_version = 3
-    curr_minor = 2
+    curr_minor = 3
 
     if config_entry.version > CONFIG_VERSION:
         # This means the user has downgraded from a future version
@@ -196,14 +433,18 @@ async def async_migrate_entry(
         new_data = {
             "user_agent": USER_AGENT,
             "app_profile": APP_PROFILE,
+            **config_entry.data,
         }
-
-        if config_entry.minor_version < curr_minor:
-            new_data.update({**config_entry.data})
+        new_options = {**config_entry.options}
+        if config_entry.minor_version < CONFIGS_OPTION_MINOR_VERSION:
+            # The switches had the configuration as attributes before it was an
+            # option, keep them for the automations reading them
+            new_options.setdefault("configs_as_attributes", True)
 
         hass.config_entries.async_update_entry(
             config_entry,
             data=new_data,
+            options=new_options,
             minor_version=curr_minor,
             version=CONFIG_VERSION,
         )
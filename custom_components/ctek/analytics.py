@@ -0,0 +1,81 @@
+"""Analytics of the charging session telemetry, vectorised with NumPy."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+from .const import BASE_LOGGER
+
+if TYPE_CHECKING:
+    from array import array
+
+LOGGER = BASE_LOGGER.getChild("analytics")
+
+PERCENTILES = (10, 50, 90, 95)
+# The charger limits the current when the car draws at least this share of it
+LIMIT_SHARE = 0.95
+# The car tapers when the power stays below this share of the plateau until the end
+TAPER_SHARE = 0.9
+TAPER_MIN_SAMPLES = 3
+TAPER_MIN_DURATION = 600  # seconds
+
+
+def analyze(columns: dict[str, array], current_limit: float | None) -> dict[str, Any]:
+    """Return the analytics of a session from the columns of its curve.
+
+    This is CPU bound on long sessions, run it in the executor.
+    """
+    timestamps = np.frombuffer(columns["timestamp"], dtype=np.float64)
+    power = np.frombuffer(columns["power"], dtype=np.float32).astype(np.float64)
+    current = np.frombuffer(columns["current"], dtype=np.float32).astype(np.float64)
+    result: dict[str, Any] = {"samples": int(timestamps.size)}
+    valid = ~np.isnan(power)
+    if not valid.any():
+        return result
+
+    # Each sample holds until the next one
+    held = np.diff(timestamps, append=timestamps[-1])
+    weights = held[valid]
+    values = power[valid]
+    result.update(
+        duration=float(timestamps[-1] - timestamps[0]),
+        average_power=round(
+            float(
+                np.average(values, weights=weights)
+                if weights.sum() > 0
+                else values.mean()
+            ),
+            1,
+        ),
+        peak_power=float(values.max()),
+        power_percentiles={
+            str(p): round(float(v), 1)
+            for p, v in zip(
+                PERCENTILES, np.percentile(values, PERCENTILES), strict=True
+            )
+        },
+    )
+
+    if current_limit:
+        with np.errstate(invalid="ignore"):
+            limited = current >= LIMIT_SHARE * current_limit
+        result["current_limited_seconds"] = float(held[limited].sum())
+
+    plateau = float(np.percentile(values, 90))
+    with np.errstate(invalid="ignore"):
+        below = np.where(valid, power < TAPER_SHARE * plateau, True)  # noqa: FBT003
+    above = np.flatnonzero(~below)
+    if plateau > 0 and above.size:
+        start = int(above[-1]) + 1
+        if (
+            timestamps.size - start >= TAPER_MIN_SAMPLES
+            and timestamps[-1] - timestamps[start] >= TAPER_MIN_DURATION
+        ):
+            result["taper"] = {
+                "timestamp": float(timestamps[start]),
+                "power": None if np.isnan(power[start]) else float(power[start]),
+                "plateau_power": round(plateau, 1),
+            }
+    return result
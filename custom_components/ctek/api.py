@@ -4,33 +4,58 @@ from __future__ import annotations
 
 import asyncio
 import hashlib
+import random
 import socket
+import time
 from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
 
 import aiohttp
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.util.dt import DEFAULT_TIME_ZONE
+from homeassistant.util.ssl import get_default_context
 
 from .const import (
+    API_HOST,
     BASE_LOGGER,
-    CONTROL_URL,
-    DEVICE_LIST_URL,
+    CONFIGURATION_PATH,
+    CONFIGURATIONS_PATH,
+    CONTROL_PATH,
+    DEVICE_LIST_PATH,
     DOMAIN,
-    OAUTH2_TOKEN_URL,
+    OAUTH2_TOKEN_PATH,
+    WS_PATH,
     CtekApiClientAuthenticationError,
+    CtekApiClientCircuitOpenError,
     CtekApiClientCommunicationError,
     CtekApiClientError,
+    CtekApiClientRateLimitedError,
 )
+from .metrics import ApiMetrics
 from .parser import parse_instruction_response
+from .resilience import BreakerState, CircuitBreaker, Priority, RateLimiter
 
 if TYPE_CHECKING:
     from homeassistant.core import HomeAssistant
 
+    from .capture import TrafficRecorder
     from .data import InstructionResponseType
 
 DEBUG = False
 HTTP_UNAUTHORIZED = 401
 HTTP_FORBIDDEN = 403
+HTTP_TOO_MANY = 429
+HTTP_SERVER_ERROR = 500
+GET_RETRIES = 2
+RETRY_BACKOFF = 1.0  # seconds
+RETRY_BACKOFF_MAX = 8.0
+# Dedicated session: connection pool limits, and how long DNS answers and idle
+# connections are kept
+SESSION_LIMIT = 10
+SESSION_LIMIT_PER_HOST = 4
+DNS_CACHE_TTL = 300  # seconds
+KEEPALIVE_TIMEOUT = 90  # seconds
+PREWARM_TIMEOUT = 5  # seconds
 LOGGER = BASE_LOGGER.getChild("api")
 
 
@@ -58,6 +83,51 @@ def _verify_response_or_raise(response: aiohttp.ClientResponse) -> None:
     response.raise_for_status()
 
 
+def _is_transient(exception: CtekApiClientError) -> bool:
+    """Check if a failed call is worth retrying, and counts as a cloud failure."""
+    if not isinstance(exception, CtekApiClientCommunicationError) or isinstance(
+        exception, (CtekApiClientCircuitOpenError, CtekApiClientRateLimitedError)
+    ):
+        return False
+    cause = exception.__cause__
+    if isinstance(cause, asyncio.CancelledError):
+        return False
+    if isinstance(cause, aiohttp.ClientResponseError):
+        return cause.status >= HTTP_SERVER_ERROR or cause.status == HTTP_TOO_MANY
+    return True
+
+
+def _server_answered(exception: CtekApiClientError) -> bool:
+    """Check if a failed call got an answer from the cloud, so the cloud is up."""
+    return isinstance(exception, CtekApiClientAuthenticationError) or isinstance(
+        exception.__cause__, aiohttp.ClientResponseError
+    )
+
+
+def _backoff(attempt: int) -> float:
+    """Return a full jitter exponential backoff delay."""
+    return random.uniform(0, min(RETRY_BACKOFF_MAX, RETRY_BACKOFF * 2**attempt))  # noqa: S311
+
+
+def async_create_session() -> aiohttp.ClientSession:
+    """Create an HTTP session for the CTEK cloud only.
+
+    Unlike the session shared by Home Assistant, it caches DNS answers and keeps
+    idle connections open long enough to be reused by the next command. The caller
+    closes it.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=SESSION_LIMIT,
+        limit_per_host=SESSION_LIMIT_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ssl=get_default_context(),
+    )
+    return aiohttp.ClientSession(
+        connector=connector, headers={"Accept-Encoding": "gzip, deflate"}
+    )
+
+
 def _raise_home_assistant_error(msg: str) -> None:
     """Raise HomeAssistantError with the given message."""
     raise HomeAssistantError(msg)
@@ -79,6 +149,9 @@ class CtekApiClient:
         app_profile: str,
         user_agent: str,
         refresh_token: str | None = None,
+        base_url: str = API_HOST,
+        breaker: CircuitBreaker | None = None,
+        rate_limiter: RateLimiter | None = None,
     ) -> None:
         """Sample API Client."""
         self.hass = hass
@@ -91,19 +164,58 @@ class CtekApiClient:
         self._refresh_token = refresh_token
         self._user_agent = user_agent
         self._app_profile = app_profile
+        self._base_url = base_url.rstrip("/")
+        self.recorder: TrafficRecorder | None = None
+        self.metrics = ApiMetrics()
+        self.breaker = breaker if breaker is not None else CircuitBreaker(hass)
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
 
     def _set_session(self, sess: aiohttp.ClientSession) -> None:
         self._session = sess
 
+    def url(self, path: str) -> str:
+        """Return the full URL for an API path."""
+        return f"{self._base_url}{path}"
+
+    def ws_url(self, device_id: str) -> str:
+        """Return the WebSocket URL for the transactions of a device."""
+        ws_base = self._base_url.replace("https://", "wss://", 1).replace(
+            "http://", "ws://", 1
+        )
+        return f"{ws_base}{WS_PATH}{device_id}"
+
+    async def prewarm(self) -> None:
+        """Open a connection to the cloud, so the next call skips DNS and TLS setup.
+
+        The response is not used, and failures are only logged. Skipped while the
+        cloud is failing, the call would only wait for it.
+        """
+        if self.breaker.state is not BreakerState.closed:
+            return
+        try:
+            async with (
+                asyncio.timeout(PREWARM_TIMEOUT),
+                self._session.head(self._base_url) as response,
+            ):
+                await response.read()
+        except (TimeoutError, aiohttp.ClientError, OSError) as exception:
+            LOGGER.debug("Pre-warming the connection failed: %s", exception)
+
+    def update_app_headers(self, *, user_agent: str, app_profile: str) -> None:
+        """Change the app identification headers sent with later requests."""
+        self._user_agent = user_agent
+        self._app_profile = app_profile
+
     async def refresh_access_token(self) -> None:
         """Refresh the access token."""
         res: None | dict = None
+        self.metrics.token_refreshes += 1
         if self._refresh_token is not None:
             LOGGER.debug("Trying to refresh access token using refresh token")
             try:
                 res = await self._api_wrapper(
                     method="POST",
-                    url=f"{OAUTH2_TOKEN_URL}",
+                    url=self.url(OAUTH2_TOKEN_PATH),
                     data={
                         "client_id": self._client_id,
                         "client_secret": self._client_secret,
@@ -119,9 +231,10 @@ class CtekApiClient:
                 res = None
         if self._refresh_token is None:
             LOGGER.info("No refresh token available, doing login")
+            self.metrics.logins += 1
             res = await self._api_wrapper(
                 method="POST",
-                url=f"{OAUTH2_TOKEN_URL}",
+                url=self.url(OAUTH2_TOKEN_PATH),
                 data={
                     "client_id": self._client_id,
                     "client_secret": self._client_secret,
@@ -167,7 +280,7 @@ class CtekApiClient:
         # Might additionally need START_CHARGING if a schedule is active
         res = await self._api_wrapper(
             method="POST",
-            url=CONTROL_URL,
+            url=self.url(CONTROL_PATH),
             data={
                 "connector_id": connector_id,
                 "device_id": device_id,
@@ -201,7 +314,7 @@ class CtekApiClient:
         )
         res = await self._api_wrapper(
             method="POST",
-            url=CONTROL_URL,
+            url=self.url(CONTROL_PATH),
             data={
                 "connector_id": connector_id,
                 "device_id": device_id,
@@ -232,7 +345,7 @@ class CtekApiClient:
         try:
             res = await self._api_wrapper(
                 method="POST",
-                url=CONTROL_URL,
+                url=self.url(CONTROL_PATH),
                 data={"device_id": device_id, "instruction": command},
                 # data={
                 #    "connector_id": connector_id,
@@ -262,17 +375,20 @@ class CtekApiClient:
             return
         res = await self._api_wrapper(
             method="POST",
-            url=f"https://iot.ctek.com/api/v3/device/configuration?deviceId={device_id}&pushToDevice=true&key={name}&value={value}",
+            url=self.url(
+                f"{CONFIGURATION_PATH}?deviceId={device_id}&pushToDevice=true&key={name}&value={value}"
+            ),
             auth=True,
         )
         LOGGER.debug(res["data"])
         _assert_success(res)
 
-    async def list_devices(self) -> dict:
+    async def list_devices(self, priority: Priority = Priority.normal) -> dict:
         """Asynchronously lists the devices.
 
         Args:
-            access_token (str): The access token for authentication.
+            priority (Priority): Low for background polling, which is skipped
+              rather than queued when over the request budget.
 
         Returns:
             dict: The devices response received from the service.
@@ -282,12 +398,18 @@ class CtekApiClient:
               the status code.
 
         """
-        return await self._api_wrapper(method="GET", url=DEVICE_LIST_URL, auth=True)
+        return await self._api_wrapper(
+            method="GET", url=self.url(DEVICE_LIST_PATH), auth=True, priority=priority
+        )
 
-    async def get_configuration(self, device_id: str) -> dict:
+    async def get_configuration(
+        self, device_id: str, priority: Priority = Priority.normal
+    ) -> dict:
         """Fetch data from the configs data."""
-        url = f"https://iot.ctek.com/api/v3/device/configurations?deviceId={device_id}"
-        return await self._api_wrapper(method="GET", url=url, auth=True)
+        url = self.url(f"{CONFIGURATIONS_PATH}?deviceId={device_id}")
+        return await self._api_wrapper(
+            method="GET", url=url, auth=True, priority=priority
+        )
 
     async def _api_wrapper(
         self,
@@ -297,8 +419,75 @@ class CtekApiClient:
         data: dict | None = None,
         headers: dict | None = None,
         auth: bool = False,
+        priority: Priority = Priority.normal,
     ) -> dict:
         """Get information from the API."""
+        path = urlsplit(url).path
+        endpoint = f"{method} {path}"
+        bucket = (
+            self.rate_limiter.control
+            if path in (CONTROL_PATH, CONFIGURATION_PATH)
+            else self.rate_limiter.read
+        )
+        started = time.monotonic()
+        attempt = 0
+        probe = False
+        try:
+            while True:
+                probe = self.breaker.before_call()
+                self.metrics.queue_wait(bucket.name, await bucket.acquire(priority))
+                try:
+                    result = await self._request(
+                        endpoint=endpoint,
+                        method=method,
+                        url=url,
+                        data=data,
+                        headers=headers,
+                        auth=auth,
+                    )
+                except CtekApiClientError as exception:
+                    if not _is_transient(exception):
+                        if _server_answered(exception):
+                            self.breaker.record_success()
+                        raise
+                    if not exception.recorded:
+                        exception.recorded = True
+                        self.breaker.record_failure()
+                    probe = False
+                    # Only GETs are safe to repeat, a command may have been applied
+                    if method != "GET" or attempt >= GET_RETRIES:
+                        raise
+                    self.metrics.transient_retries += 1
+                    delay = _backoff(attempt)
+                    LOGGER.debug("%s failed, retrying in %.1fs", endpoint, delay)
+                    await asyncio.sleep(delay)
+                    attempt += 1
+                else:
+                    self.breaker.record_success()
+                    return result
+        except CtekApiClientError as exception:
+            if not exception.counted:
+                exception.counted = True
+                self.metrics.exceptions[
+                    type(exception.__cause__ or exception).__name__
+                ] += 1
+            raise
+        finally:
+            if probe:
+                self.breaker.release_probe()
+            # Includes the time spent refreshing the token and retrying
+            self.metrics.observe(endpoint, time.monotonic() - started)
+
+    async def _request(
+        self,
+        *,
+        endpoint: str,
+        method: str,
+        url: str,
+        data: dict | None,
+        headers: dict | None,
+        auth: bool,
+    ) -> dict:
         try:
             if headers is None:
                 headers = {}
@@ -322,6 +511,10 @@ class CtekApiClient:
                 )
                 if auth and _needs_refresh(response):
                     LOGGER.debug("Access token expired? refreshing")
+                    self.metrics.response(endpoint, response.status, 0)
+                    self.metrics.retries += 1
+                    # Return the connection to the pool for the retry
+                    response.release()
                     await self.refresh_access_token()
                     if self._access_token is not None:
                         headers.update(
@@ -333,10 +526,31 @@ class CtekApiClient:
                         headers=headers,
                         json=data,
                     )
+                if not response.ok:
+                    self.metrics.response(
+                        endpoint, response.status, response.content_length or 0
+                    )
+                    if self.recorder is not None:
+                        self.recorder.record_rest(
+                            method=method, url=url, status=response.status, request=data
+                        )
                 _verify_response_or_raise(response)
-                return await response.json()
+                result = await response.json()
+                self.metrics.response(
+                    endpoint, response.status, len(await response.read())
+                )
+                if self.recorder is not None:
+                    self.recorder.record_rest(
+                        method=method,
+                        url=url,
+                        status=response.status,
+                        request=data,
+                        response=result,
+                    )
+                return result
 
-        except CtekApiClientAuthenticationError:
+        except CtekApiClientError:
+            # Raised by the token refresh, keep the type for the retries and breaker
             raise
         except (TimeoutError, asyncio.CancelledError) as exception:
             msg = f"Timeout error during {method} - {exception}"
@@ -107,4 +107,4 @@ class CtekBinarySensor(CtekEntity, BinarySensorEntity):
         """Handle updated data from the coordinator."""
         val = self.coordinator.get_property(self.entity_description.key)
         self._attr_is_on = val in (True, "true")
-        self.schedule_update_ha_state()
+        self._write_state_if_changed(self._attr_is_on)
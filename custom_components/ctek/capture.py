@@ -0,0 +1,137 @@
+"""Capture of the CTEK cloud traffic, for replaying it offline."""
+
+from __future__ import annotations
+
+import json
+import time
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util.dt import utcnow
+
+from .const import BASE_LOGGER
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from datetime import datetime
+
+    from homeassistant.core import HomeAssistant
+
+LOGGER = BASE_LOGGER.getChild("capture")
+
+CAPTURE_VERSION = 1
+FLUSH_INTERVAL = timedelta(seconds=10)
+REDACTED = "**REDACTED**"
+TO_REDACT = {
+    "access_token",
+    "authorization",
+    "client_id",
+    "client_secret",
+    "mac_address",
+    "passkey",
+    "password",
+    "refresh_token",
+    "username",
+}
+
+
+def capture_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the path of the capture file of a config entry."""
+    return hass.config.path(f"ctek_capture_{entry_id}.jsonl")
+
+
+def sanitize(data: Any) -> Any:
+    """Return a copy of `data` with credentials and device secrets redacted."""
+    if isinstance(data, dict):
+        return {
+            k: REDACTED if str(k).lower() in TO_REDACT else sanitize(v)
+            for k, v in data.items()
+        }
+    if isinstance(data, list):
+        return [sanitize(v) for v in data]
+    return data
+
+
+class TrafficRecorder:
+    """Record REST responses and WebSocket frames as JSON lines.
+
+    Every line holds `t`, the seconds since the capture started, and `kind`. REST
+    lines hold the method, the path (with query), the status and the request and
+    response bodies. WebSocket lines hold the frame. Lines are buffered and
+    written from the executor every `FLUSH_INTERVAL` and when stopped.
+    """
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the recorder."""
+        self.hass = hass
+        self.path = path
+        self._start = time.monotonic()
+        self._buffer: list[str] = []
+        self._unsub: Callable[[], None] | None = None
+        self.records = 0
+
+    def start(self) -> None:
+        """Start capturing."""
+        LOGGER.info("Capturing CTEK cloud traffic to %s", self.path)
+        self._start = time.monotonic()
+        self._add("header", version=CAPTURE_VERSION, started=utcnow().isoformat())
+        self._unsub = async_track_time_interval(
+            self.hass, self._async_flush_interval, FLUSH_INTERVAL
+        )
+
+    async def async_stop(self) -> None:
+        """Stop capturing and write the remaining lines."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        await self.async_flush()
+        LOGGER.info("Captured %s records to %s", self.records, self.path)
+
+    def _add(self, kind: str, **fields: Any) -> None:
+        line = {"t": round(time.monotonic() - self._start, 3), "kind": kind, **fields}
+        self._buffer.append(json.dumps(line, separators=(",", ":"), default=str))
+        self.records += 1
+
+    def record_rest(
+        self,
+        *,
+        method: str,
+        url: str,
+        status: int,
+        request: dict | None = None,
+        response: Any = None,
+    ) -> None:
+        """Record a REST request and its response."""
+        parts = urlsplit(url)
+        path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        self._add(
+            "rest",
+            method=method,
+            path=path,
+            status=status,
+            request=sanitize(request),
+            response=sanitize(response),
+        )
+
+    def record_ws(self, message: str) -> None:
+        """Record a WebSocket frame."""
+        try:
+            self._add("ws", frame=sanitize(json.loads(message)))
+        except ValueError:
+            self._add("ws", raw=message)
+
+    async def _async_flush_interval(self, _now: datetime) -> None:
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Append the buffered lines to the capture file."""
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        await self.hass.async_add_executor_job(self._write, lines)
+
+    def _write(self, lines: list[str]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:  # noqa: PTH123
+            f.write("\n".join(lines) + "\n")
@@ -0,0 +1,261 @@
+"""Per charger queue for control commands."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from .const import BASE_LOGGER, CtekControlTimeoutError
+from .metrics import LatencyHistogram
+from .resilience import Priority
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Awaitable, Callable
+
+LOGGER = BASE_LOGGER.getChild("commands")
+
+LOCK_TIMEOUT = 30.0  # seconds to wait for the control lock
+
+
+@dataclass(order=True)
+class _Command:
+    """A queued command, ordered by priority (highest first) and arrival."""
+
+    sort_key: tuple[int, int]
+    name: str = field(compare=False)
+    group: str | None = field(compare=False)
+    priority: Priority = field(compare=False)
+    queued_at: float = field(compare=False)
+    # Resolved with True when it is the command's turn, False when it is dropped
+    turn: asyncio.Future[bool] = field(compare=False)
+
+
+class CommandQueue:
+    """Run the control commands of one charger one at a time.
+
+    Commands from the user (normal priority) run before background writes (low
+    priority), otherwise in arrival order. A command of a `group`, such as starting
+    and stopping the charge of one connector, supersedes the commands of the same
+    group still waiting: only the latest of start, stop, start is sent. A
+    background command does not supersede a waiting user command, it is dropped
+    instead. Dropped commands return None without being sent.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize the queue."""
+        self._clock = clock
+        self._queue: list[_Command] = []
+        self._seq = itertools.count()
+        self._running: _Command | None = None
+        self.waits = LatencyHistogram()
+        self.run_times: dict[str, LatencyHistogram] = {}
+        self.dropped: Counter[str] = Counter()
+
+    @property
+    def queued(self) -> int:
+        """Return the number of commands waiting."""
+        return len(self._queue)
+
+    async def submit(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[Any]],
+        *,
+        priority: Priority = Priority.normal,
+        group: str | None = None,
+    ) -> Any:
+        """Queue `func`, wait for its turn and return its result."""
+        command = _Command(
+            sort_key=(-priority, next(self._seq)),
+            name=name,
+            group=group,
+            priority=priority,
+            queued_at=self._clock(),
+            turn=asyncio.get_running_loop().create_future(),
+        )
+        if group is not None and not self._supersede(command):
+            self._drop(command)
+        else:
+            heapq.heappush(self._queue, command)
+            self._next()
+
+        try:
+            if not await command.turn:
+                return None
+        except asyncio.CancelledError:
+            if command.turn.done() and not command.turn.cancelled():
+                # Got the turn but will not use it
+                self._done(command)
+            elif command in self._queue:
+                self._queue.remove(command)
+                heapq.heapify(self._queue)
+            raise
+
+        self.waits.observe(self._clock() - command.queued_at)
+        started = self._clock()
+        try:
+            return await func()
+        finally:
+            run_time = self.run_times.get(name)
+            if run_time is None:
+                run_time = self.run_times[name] = LatencyHistogram()
+            run_time.observe(self._clock() - started)
+            self._done(command)
+
+    def _supersede(self, command: _Command) -> bool:
+        """Drop the waiting commands replaced by `command`, unless it is outranked."""
+        same = [c for c in self._queue if c.group == command.group]
+        if any(c.priority > command.priority for c in same):
+            return False
+        for old in same:
+            self._queue.remove(old)
+            self._drop(old)
+        heapq.heapify(self._queue)
+        return True
+
+    def _drop(self, command: _Command) -> None:
+        LOGGER.debug("Dropping superseded command %s", command.name)
+        self.dropped[command.name] += 1
+        command.turn.set_result(False)
+
+    def _done(self, command: _Command) -> None:
+        if self._running is command:
+            self._running = None
+        self._next()
+
+    def _next(self) -> None:
+        """Give the turn to the next waiting command, if none is running."""
+        while self._running is None and self._queue:
+            command = heapq.heappop(self._queue)
+            if command.turn.done():
+                continue
+            self._running = command
+            command.turn.set_result(True)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the queue statistics for the diagnostics."""
+        return {
+            "queued": self.queued,
+            "running": self._running.name if self._running is not None else None,
+            "wait": self.waits.as_dict(),
+            "run_time": {
+                name: histogram.as_dict() for name, histogram in self.run_times.items()
+            },
+            "dropped": dict(self.dropped),
+        }
+
+
+class ControlLock:
+    """Serialise the control operations of one charger.
+
+    An operation made of several commands, such as a start charge that first sets
+    the meter value interval, holds the lock for all of them, so a stop cannot
+    slip in between. Like the commands in `CommandQueue`, waiting user operations
+    (normal priority) get the lock before background ones (low priority), otherwise
+    in arrival order. The lock is reentrant for the task holding it, so operations
+    calling each other do not deadlock. Waiting for it is bounded by `timeout`,
+    after which `CtekControlTimeoutError` is raised instead of piling up tasks.
+    """
+
+    def __init__(
+        self,
+        timeout: float = LOCK_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the lock."""
+        self.timeout = timeout
+        self._clock = clock
+        self._locked = False
+        # Heap of the waiting operations, ordered like the commands
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+        self._owner: asyncio.Task | None = None
+        self._holder: str | None = None
+        self._waiting = 0
+        self.waits = LatencyHistogram()
+        self.timeouts: Counter[str] = Counter()
+
+    @property
+    def holder(self) -> str | None:
+        """Return the name of the operation holding the lock."""
+        return self._holder
+
+    async def _acquire(self, priority: Priority) -> None:
+        if not self._locked and not self._waiters:
+            self._locked = True
+            return
+        waiter = (
+            -priority,
+            next(self._seq),
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._waiters, waiter)
+        try:
+            await waiter[2]
+        except asyncio.CancelledError:
+            if waiter[2].done() and not waiter[2].cancelled():
+                # Got the lock but will not use it
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            raise
+
+    def _release(self) -> None:
+        """Hand the lock to the first waiting operation, if any."""
+        while self._waiters:
+            _, _, turn = heapq.heappop(self._waiters)
+            if not turn.done():
+                turn.set_result(None)
+                return
+        self._locked = False
+
+    @asynccontextmanager
+    async def hold(
+        self, name: str, priority: Priority = Priority.normal
+    ) -> AsyncIterator[None]:
+        """Hold the lock for the operation `name`."""
+        task = asyncio.current_task()
+        if task is not None and self._owner is task:
+            yield
+            return
+
+        started = self._clock()
+        self._waiting += 1
+        try:
+            async with asyncio.timeout(self.timeout):
+                await self._acquire(priority)
+        except TimeoutError as exception:
+            self.timeouts[name] += 1
+            msg = (
+                f"Charger busy: {name} waited {self.timeout:.0f}s"
+                f" for {self._holder} to finish"
+            )
+            raise CtekControlTimeoutError(msg) from exception
+        finally:
+            self._waiting -= 1
+        self.waits.observe(self._clock() - started)
+
+        self._owner = task
+        self._holder = name
+        try:
+            yield
+        finally:
+            self._owner = None
+            self._holder = None
+            self._release()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the lock statistics for the diagnostics."""
+        return {
+            "holder": self._holder,
+            "waiting": self._waiting,
+            "wait": self.waits.as_dict(),
+            "timeouts": dict(self.timeouts),
+        }
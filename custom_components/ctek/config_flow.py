@@ -21,6 +21,7 @@ from .api import (
 from .const import BASE_LOGGER as LOGGER
 from .const import DOMAIN
 from .entity import callback
+from .throttle import THROTTLED_SENSORS, throttle_option
 
 if TYPE_CHECKING:
     from homeassistant.config_entries import ConfigEntry
@@ -59,7 +60,7 @@ class CtekConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):  # type:
 
     DOMAIN = DOMAIN
     VERSION = 3
-    MINOR_VERSION = 2
+    MINOR_VERSION = 3
 
     context: CtekConfigFlowContext
 
@@ -214,6 +215,10 @@ class CtekConfigFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):  # type:
 class CtekOptionsFlowHandler(config_entries.OptionsFlow):
     """Handle an options flow for CTEK."""
 
+    def __init__(self) -> None:
+        """Initialize the options flow."""
+        self._options: dict[str, Any] = {}
+
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> config_entries.ConfigFlowResult:
@@ -227,10 +232,13 @@ class CtekOptionsFlowHandler(config_entries.OptionsFlow):
         options = self.config_entry.options
 
         if user_input is not None:
-            if options.get("enable_quirks", False):
+            self._options = {**options, **user_input}
+            if self._options.get("enable_quirks", False):
                 return await self.async_step_quirks()
+            if self._options.get("enable_throttling", False):
+                return await self.async_step_throttling()
 
-            return self.async_create_entry(title="", data=user_input)
+            return self.async_create_entry(title="", data=self._options)
 
         options_schema: vol.Schema = vol.Schema(
             {
@@ -263,10 +271,38 @@ class CtekOptionsFlowHandler(config_entries.OptionsFlow):
                         type=selector.TextSelectorType.TEXT,
                     ),
                 ),
+                vol.Optional(
+                    "update_interval",
+                    default=options.get("update_interval", 60),
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=5,
+                        max=1440,
+                        step=5,
+                        unit_of_measurement="min",
+                        mode=selector.NumberSelectorMode.BOX,
+                    )
+                ),
+                vol.Optional(
+                    "configs_as_attributes",
+                    default=options.get("configs_as_attributes", False),
+                ): bool,
                 vol.Optional(
                     "enable_quirks",
                     default=options.get("enable_quirks", False),
                 ): bool,
+                vol.Optional(
+                    "enable_throttling",
+                    default=options.get("enable_throttling", False),
+                ): bool,
+                vol.Optional(
+                    "capture_traffic",
+                    default=options.get("capture_traffic", False),
+                ): bool,
+                vol.Optional(
+                    "dedicated_session",
+                    default=options.get("dedicated_session", False),
+                ): bool,
             }
         )
 
@@ -279,8 +315,10 @@ class CtekOptionsFlowHandler(config_entries.OptionsFlow):
         options = self.config_entry.options
 
         if user_input is not None:
-            full_data = {**options, "enable_quirks": True, **user_input}
-            return self.async_create_entry(title="", data=full_data)
+            self._options.update(user_input)
+            if self._options.get("enable_throttling", False):
+                return await self.async_step_throttling()
+            return self.async_create_entry(title="", data=self._options)
 
         options_schema: vol.Schema = vol.Schema(
             {
@@ -318,3 +356,37 @@ class CtekOptionsFlowHandler(config_entries.OptionsFlow):
         )
 
         return self.async_show_form(step_id="quirks", data_schema=options_schema)
+
+    async def async_step_throttling(
+        self, user_input: dict[str, Any] | None = None
+    ) -> config_entries.ConfigFlowResult:
+        """Manage the state write throttling of the momentary sensors."""
+        options = self.config_entry.options
+
+        if user_input is not None:
+            self._options.update(user_input)
+            return self.async_create_entry(title="", data=self._options)
+
+        units = {"voltage": "V", "current": "A", "power": "W"}
+        fields: dict[vol.Optional, selector.NumberSelector] = {}
+        for name in THROTTLED_SENSORS:
+            for setting, unit, maximum, step in (
+                ("min_interval", "s", 3600, 1),
+                ("abs_threshold", units[name], 10000, 0.1),
+                ("rel_threshold", "%", 100, 0.5),
+            ):
+                key = throttle_option(name, setting)
+                fields[vol.Optional(key, default=options.get(key, 0))] = (
+                    selector.NumberSelector(
+                        selector.NumberSelectorConfig(
+                            min=0,
+                            max=maximum,
+                            step=step,
+                            unit_of_measurement=unit,
+                            mode=selector.NumberSelectorMode.BOX,
+                        )
+                    )
+                )
+        options_schema: vol.Schema = vol.Schema(fields)
+
+        return self.async_show_form(step_id="throttling", data_schema=options_schema)
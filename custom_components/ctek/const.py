@@ -8,13 +8,14 @@ DOMAIN = "ctek"
 
 API_HOST = "https://iot.ctek.com"
 
-OAUTH2_TOKEN_URL = "https://iot.ctek.com/oauth/token"  # noqa: S105 This is not a password :lol:
-
-DEVICE_LIST_URL = "https://iot.ctek.com/api/v3/device/list"
-CONTROL_URL = "https://iot.ctek.com/api/v3/device/control"
+OAUTH2_TOKEN_PATH = "/oauth/token"  # noqa: S105 This is not a password :lol:
+DEVICE_LIST_PATH = "/api/v3/device/list"
+CONTROL_PATH = "/api/v3/device/control"
+CONFIGURATION_PATH = "/api/v3/device/configuration"
+CONFIGURATIONS_PATH = "/api/v3/device/configurations"
+WS_PATH = "/api/v1/socket/devices/transaction/"
 
 WS_USER_AGENT = "okhttp/4.12.0"
-WS_URL = "wss://iot.ctek.com/api/v1/socket/devices/transaction/"
 
 VERSION = "0.0.11-alpha1"
 
@@ -22,6 +23,11 @@ VERSION = "0.0.11-alpha1"
 class CtekApiClientError(Exception):
     """Exception to indicate a general API error."""
 
+    # Set once counted in the metrics and by the circuit breaker, so the token
+    # refresh failing a call is not counted again by the call
+    counted = False
+    recorded = False
+
 
 class CtekApiClientCommunicationError(
     CtekApiClientError,
@@ -35,5 +41,21 @@ class CtekApiClientAuthenticationError(
     """Exception to indicate an authentication error."""
 
 
+class CtekApiClientCircuitOpenError(
+    CtekApiClientCommunicationError,
+):
+    """Exception to indicate that calls fail fast while the cloud is down."""
+
+
+class CtekApiClientRateLimitedError(
+    CtekApiClientCommunicationError,
+):
+    """Exception to indicate a background call skipped to stay within budget."""
+
+
 class CtekError(Exception):
     """Custom exception."""
+
+
+class CtekControlTimeoutError(CtekError):
+    """Exception to indicate that a control operation waited too long for its turn."""
@@ -4,43 +4,66 @@ from __future__ import annotations
 
 import copy
 import json
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
 from datetime import datetime
 from typing import TYPE_CHECKING, Any
 
 from homeassistant.const import CONF_DEVICE_ID
 from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
 from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers import entity_registry as er
-from homeassistant.helpers.service import async_call_from_config
 from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     TimestampDataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.util import dt as dt_util
 from homeassistant.util.dt import DEFAULT_TIME_ZONE
 
+from .analytics import analyze
 from .api import CtekApiClientAuthenticationError, CtekApiClientError
-from .const import BASE_LOGGER, DOMAIN, WS_URL
+from .commands import CommandQueue, ControlLock
+from .const import (
+    BASE_LOGGER,
+    DOMAIN,
+    CtekApiClientRateLimitedError,
+    CtekControlTimeoutError,
+)
+from .data import is_ws_charging_session_type, is_ws_connector_status_type
+from .energy import LifetimeEnergy, SessionEnergy
 from .enums import ChargeStateEnum
-from .parser import parse_data, parse_ws_message
+from .history import SessionHistory, TransactionConnectors
+from .instructions import InstructionTracker
+from .parser import dump_snapshot, parse_data, parse_snapshot, parse_ws_message
+from .prediction import CompletionPredictor
+from .quirks import CarQuirks
+from .resilience import Priority
+from .scheduler import JobKey, Scheduler
+from .sessions import SessionIndex, SessionSummary
+from .statistics import SessionStatistics
 
 if TYPE_CHECKING:
     import asyncio
-    from collections.abc import Callable
+    from collections.abc import AsyncIterator, Callable
 
     from homeassistant.core import HomeAssistant
-    from homeassistant.helpers.entity_registry import RegistryEntry
 
     from .data import CtekConfigEntry
+    from .history import SessionCurve
 
 from datetime import timedelta
 
-from homeassistant.components.switch import SwitchEntity
-
 from .data import DataType, InstructionResponseType
 from .ws import WebSocketClient
 
 LOGGER = BASE_LOGGER.getChild("coordinator")
+# Open a connection to the cloud this long before a delayed operation runs
+PREWARM_LEAD = 5  # seconds
+# Coalesce the writes of the lifetime energy counters
+ENERGY_SAVE_DELAY = 60  # seconds
+# Recompute the session analytics at most this often during a session
+ANALYTICS_INTERVAL = 60  # seconds
 
 
 def callback(func: Callable[..., Any]) -> Callable[..., Any]:
@@ -70,6 +93,26 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
         self._transaction_id: int | None = None
         self._store: Store = Store(hass, 1, f"{DOMAIN}_cache")
         self._data: dict = {}
+        self.suppressed_writes: Counter[str] = Counter()
+        self.throttled_writes: Counter[str] = Counter()
+        self.restored = False
+        self._unsub_tokens: Callable[[], None] | None = None
+        self.commands = CommandQueue()
+        self.control_lock = ControlLock()
+        self.quirks = CarQuirks(self)
+        self.history = SessionHistory()
+        self.transactions = TransactionConnectors()
+        self.energy = SessionEnergy()
+        self.lifetime_energy = LifetimeEnergy()
+        self.statistics = SessionStatistics(hass, self.device_id)
+        self.sessions = SessionIndex()
+        self.predictor = CompletionPredictor()
+        self.analytics: dict[int, dict[str, Any]] = {}
+        self._analytics_at = -float(ANALYTICS_INTERVAL)
+        self._analytics_task: asyncio.Task | None = None
+        self.instructions = InstructionTracker(
+            poll=self._async_poll_status, status=self._connector_status
+        )
         super().__init__(
             hass,
             LOGGER,
@@ -78,13 +121,13 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
             always_update=always_update,
             config_entry=config_entry,
         )
-        self._timer: asyncio.TimerHandle | None = None
+        self.scheduler = Scheduler(hass)
 
     async def async_unload_entry(
         self, hass: HomeAssistant, entry: CtekConfigEntry
     ) -> bool:
         """Unload a config entry."""
-        self._timer = None
+        self.scheduler.shutdown()
         client: WebSocketClient | None = hass.data[DOMAIN][entry.entry_id].get(
             "websocket_client"
         )
@@ -92,25 +135,38 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
             await client.stop()
         return True
 
-    def cancel_delayed_operation(self) -> None:
-        """Cancel any existing timer."""
-        if self._timer:
-            self._timer.cancel()
-            self._timer = None
+    def cancel_delayed_operation(
+        self, *, connector: int | None = None, purpose: str | None = None
+    ) -> None:
+        """Cancel the delayed operations of a connector and purpose, by default all."""
+        self.scheduler.cancel(
+            device_id=self.device_id, connector_id=connector, purpose=purpose
+        )
 
     async def start_delayed_operation(
-        self, delay: int, func: Callable, **kwargs: Any
+        self,
+        delay: float,
+        func: Callable,
+        *,
+        connector: int | None = None,
+        purpose: str = "delayed",
+        **kwargs: Any,
     ) -> None:
-        """Start the delayed operation."""
-        self.cancel_delayed_operation()
+        """Run `func(**kwargs)` after `delay` seconds.
 
-        try:
-            self._timer = self.hass.loop.call_later(
-                delay,
-                lambda: self.hass.async_create_task(func(**kwargs)),
+        It replaces the operation scheduled for the same connector and purpose only.
+        """
+        key = JobKey(self.device_id, connector, purpose)
+        self.scheduler.schedule(key, delay, func, **kwargs)
+        # A shared session does not keep the connection open for the operation
+        if delay > PREWARM_LEAD and self.config_entry.options.get(
+            "dedicated_session", False
+        ):
+            self.scheduler.schedule(
+                key._replace(purpose=f"{purpose}.prewarm"),
+                delay - PREWARM_LEAD,
+                self.config_entry.runtime_data.client.prewarm,
             )
-        except Exception:
-            LOGGER.exception("Failed to schedule delayed operation")
 
     @callback
     async def handle_tokens(self, event: Any) -> None:
@@ -122,15 +178,214 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
         else:
             LOGGER.debug("Token not changed")
 
+    async def _async_load_cache(self) -> dict:
+        """Load the cache shared by all entries, as they use the same file."""
+        cache: dict | None = self.hass.data[DOMAIN].get("cache")
+        if cache is None:
+            stored = await self._store.async_load()
+            cache = self.hass.data[DOMAIN].setdefault(
+                "cache", stored if isinstance(stored, dict) else {}
+            )
+        return cache
+
     async def get_token(self) -> str | None:
         """Retrieve the refresh token."""
-        stored: dict | None = None
         if self._data == {}:
-            stored = await self._store.async_load()
-        if stored is not None:
-            self._data = stored
+            self._data = await self._async_load_cache()
         return self._data.get("refresh_token")
 
+    async def async_save_snapshot(self, data: DataType | None) -> None:
+        """Store the data, so the next start does not need to wait for the cloud."""
+        if data is None or self.restored:
+            return
+        self._data.setdefault("snapshots", {})[self.device_id] = dump_snapshot(data)
+        await self._store.async_save(self._data)
+
+    def stored_quirks(self) -> dict[str, dict[str, Any]]:
+        """Return the quirks progress stored for this device, per connector."""
+        return self._data.get("quirks", {}).get(self.device_id, {})
+
+    async def async_store_quirks(self, states: dict[str, dict[str, Any]]) -> None:
+        """Store the quirks progress, so a restart can resume it."""
+        quirks = self._data.setdefault("quirks", {})
+        if states:
+            quirks[self.device_id] = states
+        elif quirks.pop(self.device_id, None) is None:
+            return
+        await self._store.async_save(self._data)
+
+    def _import_sessions(self, curves: dict[int, SessionCurve]) -> None:
+        """Add ended sessions to the index and import their energy statistics."""
+        ended = {c: curve for c, curve in curves.items() if curve.ended}
+        if not ended:
+            return
+        added = False
+        for connector_id, curve in ended.items():
+            summary = SessionSummary.from_curve(connector_id, curve)
+            if summary is not None and self.sessions.add(summary):
+                added = True
+        if added:
+            self._data.setdefault("sessions", {})[self.device_id] = (
+                self.sessions.as_list()
+            )
+            self._store.async_delay_save(lambda: self._data, ENERGY_SAVE_DELAY)
+        self.config_entry.async_create_background_task(
+            self.hass,
+            self._async_import_sessions(list(ended.values())),
+            f"ctek import session statistics {self.device_id}",
+        )
+
+    async def _async_import_sessions(self, curves: list[SessionCurve]) -> None:
+        try:
+            imported = await self.statistics.async_import(curves)
+        except HomeAssistantError as ex:
+            LOGGER.warning("Importing the session statistics failed: %s", ex)
+            return
+        if imported:
+            self._data.setdefault("statistics", {})[self.device_id] = (
+                self.statistics.imported
+            )
+            self._store.async_delay_save(lambda: self._data, ENERGY_SAVE_DELAY)
+
+    def _current_limit(self) -> float | None:
+        """Return the current the charger offers the car, in A."""
+        for c in self.data["configs"]:
+            if c["key"] == "CurrentAssignment" and str(c["value"]).isdigit():
+                return float(c["value"])
+        return None
+
+    async def async_session_analytics(
+        self, connector_id: int | None = None
+    ) -> dict[int, dict[str, Any]]:
+        """Compute the analytics of the session curves, in the executor."""
+        limit = self._current_limit()
+        results: dict[int, dict[str, Any]] = {}
+        for c, curve in self.history.curves.items():
+            if connector_id not in (None, c):
+                continue
+            # Copied here, the curve keeps changing while the executor works
+            columns = curve.columns()
+            results[c] = {
+                "transaction_id": curve.transaction_id,
+                "ended": curve.ended,
+                **await self.hass.async_add_executor_job(analyze, columns, limit),
+            }
+        self.analytics.update(results)
+        return results
+
+    def _refresh_analytics(self, *, force: bool = False) -> None:
+        """Recompute the analytics in the background, if they are due."""
+        now = time.monotonic()
+        if (self._analytics_task is not None and not self._analytics_task.done()) or (
+            not force and now - self._analytics_at < ANALYTICS_INTERVAL
+        ):
+            return
+        self._analytics_at = now
+        self._analytics_task = self.config_entry.async_create_background_task(
+            self.hass,
+            self._async_refresh_analytics(),
+            f"ctek session analytics {self.device_id}",
+        )
+
+    async def _async_refresh_analytics(self) -> None:
+        await self.async_session_analytics()
+        self.async_update_listeners()
+
+    def _store_lifetime_energy(self) -> None:
+        """Store the lifetime energy counters after a short delay."""
+        self._data.setdefault("energy", {})[self.device_id] = (
+            self.lifetime_energy.as_dict()
+        )
+        self._store.async_delay_save(lambda: self._data, ENERGY_SAVE_DELAY)
+
+    def _store_prediction(self) -> None:
+        """Store the charge models after a short delay."""
+        self._data.setdefault("prediction", {})[self.device_id] = (
+            self.predictor.as_dict()
+        )
+        self._store.async_delay_save(lambda: self._data, ENERGY_SAVE_DELAY)
+
+    async def async_store_history(self) -> None:
+        """Store the session history, so a restart keeps the current curves."""
+        self._data.setdefault("history", {})[self.device_id] = self.history.as_dict()
+        self._data.setdefault("prediction", {})[self.device_id] = (
+            self.predictor.as_dict()
+        )
+        await self._store.async_save(self._data)
+
+    async def async_restore_snapshot(self) -> bool:
+        """Restore the data stored by the previous run, if there is any."""
+        if self._data == {}:
+            self._data = await self._async_load_cache()
+        self.history = SessionHistory.from_dict(
+            self._data.get("history", {}).get(self.device_id, {})
+        )
+        for connector_id, curve in self.history.curves.items():
+            if not curve.ended and curve.transaction_id is not None:
+                self.transactions.remember(connector_id, curve.transaction_id)
+        self.lifetime_energy = LifetimeEnergy.from_dict(
+            self._data.get("energy", {}).get(self.device_id, {})
+        )
+        self.predictor = CompletionPredictor.from_dict(
+            self._data.get("prediction", {}).get(self.device_id, {})
+        )
+        self.statistics.imported = list(
+            self._data.get("statistics", {}).get(self.device_id, [])
+        )
+        # Sessions that ended before the last shutdown without being imported
+        self.sessions = SessionIndex.from_list(
+            self._data.get("sessions", {}).get(self.device_id, [])
+        )
+        self._import_sessions(self.history.curves)
+        snapshot = self._data.get("snapshots", {}).get(self.device_id)
+        if snapshot is None:
+            return False
+        try:
+            data = parse_snapshot(snapshot)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            LOGGER.warning("Ignoring unusable cached data for %s", self.device_id)
+            return False
+
+        LOGGER.debug("Restored cached data for %s", self.device_id)
+        self.data = data
+        self.restored = True
+        self._register_device()
+        return True
+
+    def async_refresh_in_background(self) -> None:
+        """Run the first refresh without blocking the entry setup."""
+        self._listen_for_tokens()
+        self.config_entry.async_create_background_task(
+            self.hass, self.async_refresh(), f"{self.name} first refresh"
+        )
+
+    def _listen_for_tokens(self) -> None:
+        if self._unsub_tokens is None:
+            self._unsub_tokens = self.hass.bus.async_listen(
+                f"{DOMAIN}_tokens_updated", self.handle_tokens
+            )
+            self.config_entry.async_on_unload(self._unsub_tokens)
+
+    def _register_device(self) -> None:
+        """Create or update the device registry entry from the current data."""
+        device_registry = dr.async_get(self.hass)
+        self.device_entry = device_registry.async_get_or_create(
+            config_entry_id=self.config_entry.entry_id,
+            identifiers={(DOMAIN, self.data["device_id"])},
+            manufacturer="CTEK",
+            name=self.data["device_alias"],
+            model=self.data["model"],
+            model_id=self.data["standardized_model"],
+            sw_version=self.data["firmware_id"],
+            hw_version=self.data["hardware_id"],
+            connections={
+                (
+                    dr.CONNECTION_NETWORK_MAC,
+                    self.data["device_info"]["mac_address"],
+                )
+            },
+        )
+
     async def init_data(self) -> bool:
         """Initialize data from the API and create device entry."""
         devices = await self.config_entry.runtime_data.client.list_devices()
@@ -141,44 +396,27 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
 
             self.data = parse_data(self.data, self.device_id, d)
 
-            self.data["configs"] = [
+            self.data["configs"] = (
                 (
                     await self.config_entry.runtime_data.client.get_configuration(
                         device_id=device["device_id"]
                     )
                 )
                 .get("data", {})
-                .get("configurations", {})
-            ]
+                .get("configurations", [])
+            )
 
             if self.hass.data.get(DOMAIN) is None:
                 self.hass.data[DOMAIN] = {}
 
-            device_registry = dr.async_get(self.hass)
-            tmp = device_registry.async_get_or_create(
-                config_entry_id=self.config_entry.entry_id,
-                identifiers={(DOMAIN, self.data["device_id"])},
-                manufacturer="CTEK",
-                name=device["device_alias"],
-                model=device["model"],
-                model_id=device["standardized_model"],
-                sw_version=device["firmware_id"],
-                hw_version=device["hardware_id"],
-                connections={
-                    (
-                        dr.CONNECTION_NETWORK_MAC,
-                        device["device_info"]["mac_address"],
-                    )
-                },
-            )
-            self.device_entry = tmp
+            self._register_device()
             return True
         return False
 
     async def _async_setup(self) -> bool:
         """First run. Set up the data from the API and create device."""
         try:
-            self.hass.bus.async_listen(f"{DOMAIN}_tokens_updated", self.handle_tokens)
+            self._listen_for_tokens()
             await self.init_data()
         except CtekApiClientAuthenticationError as exception:
             raise ConfigEntryAuthFailed(exception) from exception
@@ -187,15 +425,92 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
 
         return False
 
+    def _copy_for_ws(self) -> DataType:
+        """Copy the parts of the data that a WS message may modify.
+
+        The configs list is shared with the current data, so anything derived from
+        it can be cached until the configuration actually changes.
+        """
+        data = copy.copy(self.data)
+        data["charging_session"] = copy.copy(data["charging_session"])
+        data["device_status"] = copy.copy(data["device_status"])
+        data["device_status"]["connectors"] = copy.copy(
+            data["device_status"]["connectors"]
+        )
+        return data
+
     async def ws_message(self, message: str) -> None:
         """Update data from WS message."""
-        self.async_set_updated_data(
-            parse_ws_message(
-                data=json.loads(message),
-                device_id=self.device_id,
-                old_data=copy.deepcopy(self.data),
+        self.handle_ws_message(message)
+
+    def handle_ws_message(self, message: str) -> None:
+        """Parse a WS message and push the result to the listeners."""
+        data = json.loads(message)
+        new_data = parse_ws_message(
+            data=data,
+            device_id=self.device_id,
+            old_data=self._copy_for_ws(),
+        )
+        session = new_data["charging_session"]
+        if is_ws_charging_session_type(data) and session is not None:
+            # Before the listeners are told, so the energy sensors see the update
+            connector_id = self.transactions.route(session, self._active_connectors())
+            if (ended := self.history.record(connector_id, session)) is not None:
+                self._import_sessions({connector_id: ended})
+            self._refresh_analytics(force=ended is not None)
+            self.energy.record(connector_id, session)
+            if self.lifetime_energy.record(connector_id, session):
+                self._store_lifetime_energy()
+            if self.predictor.record(connector_id, session):
+                self._store_prediction()
+        self.async_set_updated_data(new_data)
+        if (
+            (self.instructions.pending or self.quirks.active)
+            and is_ws_connector_status_type(data)
+            and str(data.get("id")).isdigit()
+        ):
+            connector_id = int(data["id"])
+            status = ChargeStateEnum.find(data.get("status"))
+            self.instructions.handle_status(connector_id, status)
+            self.quirks.handle_status(connector_id, status)
+
+    def _active_connectors(self) -> list[int]:
+        """Return the connectors with a car drawing or waiting for power."""
+        return [
+            int(connector_id)
+            for connector_id, connector in sorted(
+                self.data["device_status"]["connectors"].items()
+            )
+            if connector["current_status"]
+            in (
+                ChargeStateEnum.charging,
+                ChargeStateEnum.suspended_ev,
+                ChargeStateEnum.suspended_evse,
             )
+            and connector_id.isdigit()
+        ]
+
+    def _session_connector(self) -> int:
+        """Return the connector of the latest session summary."""
+        if self.transactions.latest is not None:
+            return self.transactions.latest
+        active = self._active_connectors()
+        return active[0] if active else 1
+
+    async def _async_poll_status(self) -> None:
+        """Fetch the device status only, to check on an unconfirmed instruction."""
+        devices = await self.config_entry.runtime_data.client.list_devices()
+        data = copy.copy(self.data)
+        data.update(parse_data(self.data, self.device_id, devices.get("data", [])))
+        self.async_set_updated_data(data)
+
+    def _connector_status(self, connector_id: int) -> ChargeStateEnum | None:
+        connector = (
+            self.data.get("device_status", {})
+            .get("connectors", {})
+            .get(str(connector_id))
         )
+        return None if connector is None else connector.get("current_status")
 
     async def _async_update_data(self) -> Any:
         """Update data via library."""
@@ -206,12 +521,15 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
                 await self.start_ws(force=True)
                 return self.data
 
-            devices = await self.config_entry.runtime_data.client.list_devices()
+            # Polling is background work, skipped first when over the request budget
+            devices = await self.config_entry.runtime_data.client.list_devices(
+                priority=Priority.low
+            )
 
             configs = (
                 (
                     await self.config_entry.runtime_data.client.get_configuration(
-                        device_id=self.device_id
+                        device_id=self.device_id, priority=Priority.low
                     )
                 )
                 .get("data", {})
@@ -225,9 +543,14 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
 
             LOGGER.debug(ret)
 
+            self.restored = False
+            await self.async_save_snapshot(ret)
             await self.start_ws()
 
         # TODO: fetch charging schedules
+        except CtekApiClientRateLimitedError as exception:
+            LOGGER.debug("Skipping refresh: %s", exception)
+            return self.data
         except CtekApiClientAuthenticationError as exception:
             raise ConfigEntryAuthFailed(exception) from exception
         except CtekApiClientError as exception:
@@ -253,7 +576,7 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
 
             await client.stop()
 
-        websocket_url = f"{WS_URL}{self.device_id}"
+        websocket_url = self.config_entry.runtime_data.client.ws_url(self.device_id)
         client = WebSocketClient(
             hass=self.hass,
             url=websocket_url,
@@ -290,9 +613,9 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
             ChargeStateEnum.unavailable,
         )
 
-    def get_property(  # noqa: PLR0911
+    def get_property(  # noqa: PLR0911, PLR0912
         self, key: str
-    ) -> str | bool | int | datetime | ChargeStateEnum | None:
+    ) -> str | bool | int | float | datetime | ChargeStateEnum | None:
         """Get property value."""
         if key.startswith("attribute."):
             key = key.removeprefix("attribute.")
@@ -308,6 +631,47 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
         if key.startswith("configs."):
             return self.get_configuration(key)
 
+        if key == "cloud.breaker_state":
+            return self.config_entry.runtime_data.client.breaker.state
+
+        if key.startswith("energy.session."):
+            connector = key.removeprefix("energy.session.")
+            if not connector.isdigit():
+                return None
+            value = self.energy.value(int(connector))
+            return None if value is None else round(value, 1)
+        if key.startswith("energy.lifetime."):
+            connector = key.removeprefix("energy.lifetime.")
+            return (
+                self.lifetime_energy.value(int(connector))
+                if connector.isdigit()
+                else None
+            )
+
+        if key.startswith("analytics."):
+            analytics = self.analytics.get(self._session_connector(), {})
+            key = key.removeprefix("analytics.")
+            if key == "taper_start":
+                taper = analytics.get("taper")
+                return (
+                    None
+                    if taper is None
+                    else dt_util.utc_from_timestamp(taper["timestamp"])
+                )
+            return analytics.get(key)
+
+        if key == "prediction.remaining":
+            remaining = self.predictor.remaining(self._session_connector())
+            return None if remaining is None else round(remaining / 60)
+        if key == "prediction.finish":
+            finish = self.predictor.finish(self._session_connector())
+            return None if finish is None else dt_util.utc_from_timestamp(finish)
+
+        if key.startswith("metrics."):
+            return self.config_entry.runtime_data.client.metrics.get(
+                key.removeprefix("metrics.")
+            )
+
         # FIXME: replace with string split
         if key.startswith("device_status.connected"):
             return bool(self.data.get("device_status", {}).get("connected", False))
@@ -335,7 +699,21 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
         LOGGER.debug("Property '%s' not found", key)
         return None
 
-    async def set_config(self, name: str, value: str) -> None:
+    @asynccontextmanager
+    async def control(
+        self, name: str, priority: Priority = Priority.normal
+    ) -> AsyncIterator[None]:
+        """Hold the control lock of the charger for the operation `name`."""
+        try:
+            async with self.control_lock.hold(name, priority):
+                yield
+        except CtekControlTimeoutError as ex:
+            LOGGER.warning(ex)
+            raise HomeAssistantError(str(ex)) from ex
+
+    async def set_config(
+        self, name: str, value: str, priority: Priority = Priority.normal
+    ) -> None:
         """Post a configuration change to the charger."""
         if name.startswith("configs."):
             name = name.replace("configs.", "")
@@ -343,19 +721,25 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
             LOGGER.error("Configuration '%s' is read-only", name)
             return
 
-        await self.config_entry.runtime_data.client.set_config(
-            name=name, device_id=self.device_id, value=value
-        )
+        async with self.control(f"set_config.{name}", priority):
+            await self.commands.submit(
+                f"set_config.{name}",
+                lambda: self.config_entry.runtime_data.client.set_config(
+                    name=name, device_id=self.device_id, value=value
+                ),
+                priority=priority,
+                group=f"config.{name}",
+            )
 
-        conf = (
-            (
-                await self.config_entry.runtime_data.client.get_configuration(
-                    device_id=self.device_id
+            conf = (
+                (
+                    await self.config_entry.runtime_data.client.get_configuration(
+                        device_id=self.device_id
+                    )
                 )
+                .get("data", {})
+                .get("configurations", {})
             )
-            .get("data", {})
-            .get("configurations", {})
-        )
 
         new_data = self.data
         new_data["configs"] = conf
@@ -407,121 +791,22 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
         for c in values:
             self.update_configuration(c.get("key"), c.get("value"))
 
-    async def handle_car_quirks(
-        self,
-        connector_id: int,
-        tries: int = 3,
-        tried_quirks: list | None = None,
-        delay: int = 60,
-    ) -> None:
-        """Handle optional required quirks for starting a charge properly."""
-        if tried_quirks is None:
-            tried_quirks = []
-        if tries > 0:
-            LOGGER.info("Trying quirks. Already tried: %s", tried_quirks)
-            state = self.get_connector_status_sync(connector_id)
-            reboot: bool = self.config_entry.options["reboot_station_if_start_fails"]
-            toggle: str | None = self.config_entry.options.get("quirks_toggle_switch")
-            service_action: list[dict] | None = self.config_entry.options.get(
-                "quirks_call_service"  # action is name, data contains args as dict
-            )
-
-            if state in (ChargeStateEnum.suspended_evse, ChargeStateEnum.preparing):
-                LOGGER.info("Charge is not started. Trying again")
-                await self.start_delayed_operation(
-                    delay=delay,
-                    func=self.handle_car_quirks,
-                    tries=tries - 1,
-                    tried_quirks=tried_quirks,
-                )
-                await self.config_entry.runtime_data.client.start_charge(
+    async def resend_start_charge(self, connector_id: int) -> None:
+        """Send the start charge instruction again, as a background command."""
+        async with self.control("resend_start_charge", Priority.low):
+            await self.commands.submit(
+                "start_charge",
+                lambda: self.config_entry.runtime_data.client.start_charge(
                     device_id=self.device_id,
                     connector_id=connector_id,
                     resume_charging=self.get_connector_status_sync(
                         connector_id=connector_id
                     )
                     == ChargeStateEnum.suspended_evse,
-                )
-                return
-
-            if state == ChargeStateEnum.charging:
-                LOGGER.info("Charge has started; setting MAX current")
-                await self.set_config(
-                    name="configs.CurrentAssignment",
-                    value=str(self.get_max_current()),
-                )
-                return
-
-            if (
-                state in (ChargeStateEnum.suspended_ev, ChargeStateEnum.preparing)
-                and toggle is not None
-                and "toggle" not in tried_quirks
-            ):
-                LOGGER.warning("Toggling switch: %s", toggle)
-                tried_quirks.append("toggle")
-                await self.start_delayed_operation(
-                    delay=delay,
-                    func=self.handle_car_quirks,
-                    tries=tries - 1,
-                    tried_quirks=tried_quirks,
-                )
-
-                registry = er.async_get(self.hass)
-                switch: RegistryEntry | None = registry.async_get(toggle)
-                if switch is not SwitchEntity:
-                    LOGGER.warning("Switch '%s' not found or not a switch", toggle)
-                else:
-                    switch.toggle()
-                return
-
-            if (
-                state in (ChargeStateEnum.suspended_ev, ChargeStateEnum.preparing)
-                and service_action is not None
-                and service_action != []
-                and "service_action" not in tried_quirks
-            ):
-                LOGGER.warning("Calling service: %s", service_action)
-                tried_quirks.append("service_action")
-                service_call = {
-                    "service": service_action[0].get("action"),
-                    "data": service_action[0].get("data", {}),
-                }
-
-                await self.start_delayed_operation(
-                    delay=delay,
-                    func=self.handle_car_quirks,
-                    tries=tries - 1,
-                    tried_quirks=tried_quirks,
-                )
-                await async_call_from_config(self.hass, service_call)
-                return
-
-            if (
-                state in (ChargeStateEnum.suspended_ev, ChargeStateEnum.preparing)
-                and reboot
-                and "reboot" not in tried_quirks
-            ):
-                tried_quirks.append("reboot")
-                LOGGER.warning("Seems like charge did not start as expected; rebooting")
-                await self.send_command(command="REBOOT")
-                await self.start_delayed_operation(
-                    delay=2 * delay,
-                    func=self.handle_car_quirks,
-                    tries=tries - 1,
-                    tried_quirks=tried_quirks,
-                )
-                return
-
-            LOGGER.warning("Charge not started; checking again in %ds", delay)
-            await self.start_delayed_operation(
-                delay,
-                self.handle_car_quirks,
-                tries=tries - 1,
-                tried_quirks=tried_quirks,
+                ),
+                priority=Priority.low,
+                group=f"charge.{connector_id}",
             )
-            return
-
-        LOGGER.error("Start charge apparently failed")
 
     async def start_charge(self, connector_id: int) -> None:
         """Logic for starting a charge.
@@ -531,47 +816,59 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
 
         """
         LOGGER.info("Trying to start a charge")
+        async with self.control("start_charge"):
+            await self._async_start_charge(connector_id)
 
+    async def _async_start_charge(self, connector_id: int) -> None:
         # set meter value reporting to 30 s
         await self.set_config("configs.MeterValueSampleInterval", "30")
 
         # send start command
         # SuspendedEVSE -> needs to resume
         # Preparing -> needs authorize
-        res: InstructionResponseType = (
-            await self.config_entry.runtime_data.client.start_charge(
+        res: InstructionResponseType | None = await self.commands.submit(
+            "start_charge",
+            lambda: self.config_entry.runtime_data.client.start_charge(
                 device_id=self.device_id,
                 connector_id=connector_id,
                 resume_charging=self.get_connector_status_sync(
                     connector_id=connector_id
                 )
                 == ChargeStateEnum.suspended_evse,
-            )
+            ),
+            group=f"charge.{connector_id}",
         )
+        if res is None:
+            LOGGER.info("Start charge superseded by a later command")
+            return
 
         if not res["accepted"]:
             msg = "Charger refused or failed the request"
             LOGGER.error(msg)
             raise HomeAssistantError(msg)
 
-        if self.config_entry.options["enable_quirks"]:
+        self.instructions.track(res)
+        if self.config_entry.options.get("enable_quirks", False):
             LOGGER.info("Quirks enabled")
-            await self.start_delayed_operation(
-                delay=60, func=self.handle_car_quirks, connector_id=connector_id
-            )
+            await self.quirks.async_start(connector_id)
 
     async def stop_charge(self, connector_id: int) -> bool | None:
         """Logic for stopping a charge."""
         LOGGER.info("Stopping charge on connector %s", connector_id)
+        async with self.control("stop_charge"):
+            return await self._async_stop_charge(connector_id)
+
+    async def _async_stop_charge(self, connector_id: int) -> bool | None:
         # Check connector state
         # Fixme: check that a charge is actually ongoing
-        self.cancel_delayed_operation()
+        await self.quirks.async_cancel(connector_id)
         status = self.get_connector_status_sync(connector_id=connector_id)
         if status not in (ChargeStateEnum.charging, ChargeStateEnum.suspended_ev):
             LOGGER.warning("Connector status is %s", status.value)
 
-        res: InstructionResponseType = (
-            await self.config_entry.runtime_data.client.stop_charge(
+        res: InstructionResponseType | None = await self.commands.submit(
+            "stop_charge",
+            lambda: self.config_entry.runtime_data.client.stop_charge(
                 device_id=self.device_id,
                 connector_id=connector_id,
                 resume_schedule=bool(
@@ -580,10 +877,14 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
                     .get(str(connector_id), {})
                     .get("has_active_schedule", False)
                 ),
-            )
+            ),
+            group=f"charge.{connector_id}",
         )
-        if res.get("accepted"):
-            await self.async_request_refresh()
+        if res is None:
+            LOGGER.info("Stop charge superseded by a later command")
+            return None
+        # Confirmed by the connector status update, or a poll if none arrives
+        self.instructions.track(res)
         return res.get("accepted")
 
     def get_connector_status_sync(self, connector_id: int) -> ChargeStateEnum:
@@ -618,18 +919,26 @@ class CtekDataUpdateCoordinator(TimestampDataUpdateCoordinator[DataType]):
             return int(val)
         return 10
 
-    async def send_command(self, command: str) -> InstructionResponseType:
+    async def send_command(
+        self, command: str, priority: Priority = Priority.normal
+    ) -> InstructionResponseType:
         """Send a command to the API."""
-        res: InstructionResponseType = (
-            await self.config_entry.runtime_data.client.send_command(
-                device_id=self.device_id,
-                # connector_id=connector_id,
-                command=command,
+        async with self.control(command, priority):
+            res: InstructionResponseType = await self.commands.submit(
+                command,
+                lambda: self.config_entry.runtime_data.client.send_command(
+                    device_id=self.device_id,
+                    # connector_id=connector_id,
+                    command=command,
+                ),
+                priority=priority,
             )
-        )
         LOGGER.debug(res)
         return res
 
     async def unload(self) -> None:
         """Unload the coordinator and save the data."""
-        await self._store.async_save(self._data)
+        self.scheduler.shutdown()
+        self.instructions.cancel()
+        await self.async_save_snapshot(self.data)
+        await self.async_store_history()
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING, Any, TypedDict, TypeGuard
 
 from homeassistant.config_entries import ConfigEntry
@@ -26,6 +26,9 @@ class CtekData:
     client: CtekApiClient
     coordinator: CtekDataUpdateCoordinator
     integration: Integration
+    # Entry data and options the running entry was set up or updated with
+    applied_data: dict[str, Any] = field(default_factory=dict)
+    applied_options: dict[str, Any] = field(default_factory=dict)
 
 
 class FirmwareUpdateType(TypedDict):
@@ -0,0 +1,48 @@
+"""Diagnostics support for ctek."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .data import CtekConfigEntry
+
+TO_REDACT = {
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    "client_id",
+    "client_secret",
+    "mac_address",
+    "passkey",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant,  # noqa: ARG001 Unused function argument: `hass`
+    entry: CtekConfigEntry,
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = entry.runtime_data.coordinator
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "data": async_redact_data(coordinator.data, TO_REDACT),
+        "suppressed_writes": dict(coordinator.suppressed_writes),
+        "throttled_writes": dict(coordinator.throttled_writes),
+        "api": entry.runtime_data.client.metrics.as_dict(),
+        "rate_limits": entry.runtime_data.client.rate_limiter.as_dict(),
+        "commands": entry.runtime_data.coordinator.commands.as_dict(),
+        "control_lock": entry.runtime_data.coordinator.control_lock.as_dict(),
+        "history": entry.runtime_data.coordinator.history.stats(),
+        "transactions": entry.runtime_data.coordinator.transactions.as_dict(),
+        "prediction": entry.runtime_data.coordinator.predictor.as_dict(),
+        "instructions": entry.runtime_data.coordinator.instructions.as_dict(),
+        "scheduled": entry.runtime_data.coordinator.scheduler.as_dict(),
+    }
@@ -0,0 +1,194 @@
+"""Energy derived from the charging session telemetry."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util.dt import utcnow
+
+from .const import BASE_LOGGER
+
+if TYPE_CHECKING:
+    from .data import ChargingSessionType
+
+LOGGER = BASE_LOGGER.getChild("energy")
+
+# Do not integrate the power over gaps in the updates longer than this
+MAX_GAP = 300  # seconds
+
+
+def _number(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class EnergyAccumulator:
+    """Energy of the current session, smoother than the cloud's Wh value.
+
+    Between the coarse updates of `watt_hours_consumed` the momentary power is
+    integrated with the trapezoidal rule. Each new Wh value from the cloud becomes
+    the new base of the integration. The value never decreases within a session,
+    so an estimate ahead of the cloud is held until the cloud catches up.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the accumulator."""
+        self.transaction_id: int | None = None
+        self.value: float | None = None
+        self._cloud_wh: float | None = None
+        self._base = 0.0
+        self._integrated = 0.0
+        self._last: tuple[float, float] | None = None  # timestamp and power
+
+    def reset(self) -> None:
+        """Forget the session."""
+        self.transaction_id = None
+        self.value = None
+        self._cloud_wh = None
+        self._base = 0.0
+        self._integrated = 0.0
+        self._last = None
+
+    def record(self, session: ChargingSessionType) -> float | None:
+        """Add a charging session summary and return the energy in Wh."""
+        if not session.get("ongoing_transaction"):
+            self.reset()
+            return None
+        updated = session.get("last_updated_time") or utcnow()
+        return self.update(
+            session.get("transaction_id"),
+            updated.timestamp(),
+            _number(session.get("momentary_power")),
+            _number(session.get("watt_hours_consumed")),
+        )
+
+    def update(
+        self,
+        transaction_id: int | None,
+        timestamp: float,
+        power: float | None,
+        wh: float | None,
+    ) -> float | None:
+        """Add a session update and return the energy in Wh."""
+        if transaction_id != self.transaction_id:
+            self.reset()
+            self.transaction_id = transaction_id
+
+        if wh is not None and wh != self._cloud_wh:
+            self._cloud_wh = wh
+            self._base = wh
+            self._integrated = 0.0
+        elif power is not None and self._last is not None:
+            last_timestamp, last_power = self._last
+            elapsed = timestamp - last_timestamp
+            if 0 < elapsed <= MAX_GAP:
+                self._integrated += (last_power + power) / 2 * elapsed / 3600
+
+        if power is not None and (self._last is None or timestamp > self._last[0]):
+            self._last = (timestamp, power)
+        if self._cloud_wh is None and self.value is None and power is None:
+            return None
+        estimate = self._base + self._integrated
+        self.value = estimate if self.value is None else max(self.value, estimate)
+        return self.value
+
+
+class SessionEnergy:
+    """Energy of the current session of each connector.
+
+    The summaries of the connectors interleave, so each connector integrates its
+    own session rather than resetting a shared one on every other summary.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the accumulators."""
+        self._accumulators: dict[int, EnergyAccumulator] = {}
+
+    def value(self, connector_id: int) -> float | None:
+        """Return the energy of the current session of a connector in Wh."""
+        accumulator = self._accumulators.get(connector_id)
+        return None if accumulator is None else accumulator.value
+
+    def record(self, connector_id: int, session: ChargingSessionType) -> float | None:
+        """Add a charging session summary and return the energy in Wh."""
+        accumulator = self._accumulators.get(connector_id)
+        if accumulator is None:
+            accumulator = self._accumulators[connector_id] = EnergyAccumulator()
+        return accumulator.record(session)
+
+
+class LifetimeEnergy:
+    """Energy charged per connector over all transactions, never decreasing.
+
+    `watt_hours_consumed` starts over with every transaction. When the transaction
+    id changes, the last value of the previous transaction is added to the total.
+    The totals and the current transactions are stored, so a restart or reconnect
+    in the middle of a session neither loses nor counts twice.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self._totals: dict[int, float] = {}
+        # Transaction id and its last Wh value per connector
+        self._sessions: dict[int, tuple[int | None, float]] = {}
+
+    def value(self, connector_id: int) -> float:
+        """Return the lifetime energy of a connector in Wh."""
+        session = self._sessions.get(connector_id)
+        return self._totals.get(connector_id, 0.0) + (session[1] if session else 0.0)
+
+    def record(self, connector_id: int, session: ChargingSessionType) -> bool:
+        """Add a charging session summary, return True if the counter changed."""
+        wh = _number(session.get("watt_hours_consumed"))
+        transaction_id = session.get("transaction_id")
+        if wh is None or transaction_id is None:
+            return False
+        last = self._sessions.get(connector_id)
+        if last is None or last[0] != transaction_id:
+            if last is not None:
+                LOGGER.debug(
+                    "Transaction %s ended on connector %s at %s Wh",
+                    last[0],
+                    connector_id,
+                    last[1],
+                )
+                self._totals[connector_id] = (
+                    self._totals.get(connector_id, 0.0) + last[1]
+                )
+            self._sessions[connector_id] = (transaction_id, wh)
+            return True
+        if wh <= last[1]:
+            # The cloud value only goes backwards by glitches
+            return False
+        self._sessions[connector_id] = (transaction_id, wh)
+        return True
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return the counters to store, per connector."""
+        return {
+            str(c): {
+                "total": self._totals.get(c, 0.0),
+                "transaction_id": self._sessions.get(c, (None, 0.0))[0],
+                "session_wh": self._sessions.get(c, (None, 0.0))[1],
+            }
+            for c in self._totals.keys() | self._sessions.keys()
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, dict[str, Any]]) -> LifetimeEnergy:
+        """Restore the stored counters, skipping unusable ones."""
+        energy = cls()
+        for connector_id, counter in data.items():
+            try:
+                c = int(connector_id)
+                energy._totals[c] = float(counter["total"])
+                if counter.get("transaction_id") is not None:
+                    energy._sessions[c] = (
+                        counter["transaction_id"],
+                        float(counter["session_wh"]),
+                    )
+            except (KeyError, TypeError, ValueError):
+                LOGGER.warning("Ignoring unusable stored energy counter: %s", counter)
+        return energy
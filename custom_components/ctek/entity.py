@@ -12,7 +12,7 @@ from .const import BASE_LOGGER, DOMAIN
 from .coordinator import CtekDataUpdateCoordinator
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Mapping
 
     from homeassistant.helpers.entity import EntityDescription
 
@@ -29,6 +29,7 @@ class CtekEntity(CoordinatorEntity[CtekDataUpdateCoordinator], Entity):
 
     _icon_func: Callable[[Any], str] | None
     _icon_color_func: Callable[[Any], str] | None
+    _last_written: tuple[Any, ...] | None = None
 
     def __init__(
         self,
@@ -45,7 +46,9 @@ class CtekEntity(CoordinatorEntity[CtekDataUpdateCoordinator], Entity):
         clean_name = f"{desc}".lower().replace(" ", "_").replace(".", "_")
         self._icon_func = icon_func
         self._icon_color_func = icon_color_func
-        self._attr_unique_id = f"{DOMAIN}_{device_id}_{clean_name}"
+        # The unique id as a str, for the write counters
+        self._counter_key = f"{DOMAIN}_{device_id}_{clean_name}"
+        self._attr_unique_id = self._counter_key
         self._name = f"{coordinator.data['model']}_{clean_name}"
         self._device_id = device_id
         self._attr_device_info = dr.DeviceInfo(
@@ -58,6 +61,30 @@ class CtekEntity(CoordinatorEntity[CtekDataUpdateCoordinator], Entity):
         """Handle updated data from the coordinator."""
         LOGGER.error("Entity update should be handled in subclass %s", self.name)
 
+    @callback
+    def _write_state_if_changed(self, value: Any) -> None:
+        """Write the state, unless value and attributes match the last write."""
+        attrs = self.extra_state_attributes
+        snapshot = (self.available, value, dict(attrs) if attrs else None)
+        if snapshot == self._last_written:
+            self.coordinator.suppressed_writes[self._counter_key] += 1
+            return
+        self._last_written = snapshot
+        self.schedule_update_ha_state()
+
+    @property
+    def suppressed_writes(self) -> int:
+        """Return the number of state writes skipped as unchanged."""
+        return self.coordinator.suppressed_writes[self._counter_key]
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the state attributes, flagging values restored from the cache."""
+        attrs = getattr(self, "_attr_extra_state_attributes", None)
+        if self.coordinator.restored:
+            return {**(attrs or {}), "restored": True}
+        return attrs
+
     @property
     def icon(self) -> str | None:
         """Return dynamic icon."""
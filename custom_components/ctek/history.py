@@ -0,0 +1,272 @@
+"""Compact in-memory history of the charging session telemetry."""
+
+from __future__ import annotations
+
+import math
+from array import array
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util.dt import utcnow
+
+from .const import BASE_LOGGER
+
+if TYPE_CHECKING:
+    from .data import ChargingSessionType
+
+LOGGER = BASE_LOGGER.getChild("history")
+
+VALUES = ("power", "current", "voltage", "wh")
+HISTORY_SAMPLES = 512  # per connector
+MIN_INTERVAL = 5.0  # seconds between samples, until the buffer first fills
+MAX_TRANSACTIONS = 32  # remembered per charger
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class SessionCurve:
+    """Telemetry samples of one charging session.
+
+    The samples are stored in typed arrays, 24 bytes each, up to `capacity`. When
+    the buffer is full every other sample is dropped and the interval between
+    samples doubles, so a session of any length fits in the same memory with an
+    evenly degrading resolution. Within an interval each sample replaces the
+    previous one, so the latest values are always there.
+    """
+
+    def __init__(
+        self,
+        transaction_id: int | None,
+        capacity: int = HISTORY_SAMPLES,
+        interval: float = MIN_INTERVAL,
+    ) -> None:
+        """Initialize an empty curve."""
+        self.transaction_id = transaction_id
+        self.ended = False
+        self.capacity = capacity
+        self.interval = interval
+        self._timestamps = array("d")
+        self._values = {name: array("f") for name in VALUES}
+        # Start of the interval of the last sample
+        self._slot = -math.inf
+
+    def __len__(self) -> int:
+        """Return the number of samples."""
+        return len(self._timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory used by the samples."""
+        return sum(
+            len(a) * a.itemsize for a in (self._timestamps, *self._values.values())
+        )
+
+    def add(self, timestamp: float, **values: float) -> None:
+        """Add a sample of the `VALUES`, missing ones are stored as NaN."""
+        timestamps = self._timestamps
+        if timestamps and timestamp < timestamps[-1]:
+            return
+        if timestamp - self._slot < self.interval:
+            timestamps[-1] = timestamp
+            for name, samples in self._values.items():
+                samples[-1] = values.get(name, math.nan)
+            return
+        if len(timestamps) >= self.capacity:
+            self._downsample()
+        self._slot = timestamp
+        timestamps.append(timestamp)
+        for name, samples in self._values.items():
+            samples.append(values.get(name, math.nan))
+
+    def _downsample(self) -> None:
+        del self._timestamps[1::2]
+        for samples in self._values.values():
+            del samples[1::2]
+        self.interval *= 2
+        LOGGER.debug(
+            "Session %s history full, keeping a sample every %.0fs",
+            self.transaction_id,
+            self.interval,
+        )
+
+    def columns(self) -> dict[str, array]:
+        """Return copies of the sample arrays, safe to use in another thread."""
+        return {
+            "timestamp": array("d", self._timestamps),
+            **{name: array("f", samples) for name, samples in self._values.items()},
+        }
+
+    def samples(self) -> list[list[float | None]]:
+        """Return the samples as `[timestamp, power, current, voltage, wh]` rows."""
+        columns = [self._timestamps, *(self._values[name] for name in VALUES)]
+        return [
+            [None if math.isnan(value) else round(value, 3) for value in row]
+            for row in zip(*columns, strict=True)
+        ]
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the curve to store, or to return from the service."""
+        return {
+            "transaction_id": self.transaction_id,
+            "ended": self.ended,
+            "interval": self.interval,
+            "fields": ["timestamp", *VALUES],
+            "samples": self.samples(),
+        }
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, Any], capacity: int = HISTORY_SAMPLES
+    ) -> SessionCurve:
+        """Restore a stored curve."""
+        curve = cls(data.get("transaction_id"), capacity, float(data["interval"]))
+        curve.ended = bool(data.get("ended", False))
+        for timestamp, *values in data["samples"]:
+            if len(curve) >= capacity:
+                curve._downsample()
+            curve._timestamps.append(float(timestamp))
+            for name, value in zip(VALUES, values, strict=True):
+                curve._values[name].append(_number(value))
+        if curve._timestamps:
+            curve._slot = curve._timestamps[-1]
+        return curve
+
+
+class TransactionConnectors:
+    """The connector of each transaction of the charging session summaries.
+
+    The summaries do not tell their connector. A new transaction goes to the first
+    connector with a car drawing or waiting for power that has no other ongoing
+    transaction, and keeps that connector until it ends, even when the connector
+    already shows Finishing or Available by the time its last summary arrives.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the routes."""
+        self._connectors: dict[str, int] = {}
+        # The ongoing transaction of each connector
+        self._ongoing: dict[int, str] = {}
+        self.latest: int | None = None
+
+    def remember(self, connector_id: int, transaction_id: Any) -> None:
+        """Route a transaction that is ongoing on a connector."""
+        key = str(transaction_id)
+        self._connectors.pop(key, None)
+        self._connectors[key] = connector_id
+        while len(self._connectors) > MAX_TRANSACTIONS:
+            del self._connectors[next(iter(self._connectors))]
+        self._ongoing[connector_id] = key
+
+    def route(self, session: ChargingSessionType, active: list[int]) -> int:
+        """Return the connector of a summary.
+
+        `active` are the connectors with a car drawing or waiting for power.
+        """
+        transaction_id = session.get("transaction_id")
+        key = str(transaction_id)
+        connector_id = self._connectors.get(key)
+        if connector_id is None:
+            connector_id = next(
+                (c for c in active if c not in self._ongoing),
+                active[0] if active else 1,
+            )
+        if transaction_id is not None:
+            if session.get("ongoing_transaction"):
+                self.remember(connector_id, transaction_id)
+            elif self._ongoing.get(connector_id) == key:
+                del self._ongoing[connector_id]
+        self.latest = connector_id
+        return connector_id
+
+    def as_dict(self) -> dict[str, int]:
+        """Return the routes for the diagnostics."""
+        return dict(self._connectors)
+
+
+class SessionHistory:
+    """The curve of the current session of each connector."""
+
+    def __init__(self, capacity: int = HISTORY_SAMPLES) -> None:
+        """Initialize the history."""
+        self.capacity = capacity
+        self._curves: dict[int, SessionCurve] = {}
+
+    def curve(self, connector_id: int) -> SessionCurve | None:
+        """Return the curve of a connector."""
+        return self._curves.get(connector_id)
+
+    @property
+    def curves(self) -> dict[int, SessionCurve]:
+        """Return the curves per connector."""
+        return dict(self._curves)
+
+    def record(
+        self, connector_id: int, session: ChargingSessionType
+    ) -> SessionCurve | None:
+        """Add a sample from a charging session summary.
+
+        A new transaction starts a new curve for the connector.
+
+        Returns:
+            The curve of the session that ended, if one did.
+
+        """
+        curve = self._curves.get(connector_id)
+        if not session.get("ongoing_transaction"):
+            if curve is None or curve.ended:
+                return None
+            curve.ended = True
+            return curve
+        ended = None
+        transaction_id = session.get("transaction_id")
+        if curve is None or curve.transaction_id != transaction_id:
+            if curve is not None and not curve.ended:
+                curve.ended = True
+                ended = curve
+            curve = self._curves[connector_id] = SessionCurve(
+                transaction_id, self.capacity
+            )
+        updated = session.get("last_updated_time") or utcnow()
+        curve.add(
+            updated.timestamp(),
+            power=_number(session.get("momentary_power")),
+            current=_number(session.get("momentary_current")),
+            voltage=_number(session.get("momentary_voltage")),
+            wh=_number(session.get("watt_hours_consumed")),
+        )
+        return ended
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return the curves to store, per connector."""
+        return {str(c): curve.as_dict() for c, curve in self._curves.items()}
+
+    @classmethod
+    def from_dict(
+        cls, data: dict[str, dict[str, Any]], capacity: int = HISTORY_SAMPLES
+    ) -> SessionHistory:
+        """Restore the stored curves, skipping unusable ones."""
+        history = cls(capacity)
+        for connector_id, curve in data.items():
+            try:
+                history._curves[int(connector_id)] = SessionCurve.from_dict(
+                    curve, capacity
+                )
+            except (KeyError, TypeError, ValueError):
+                LOGGER.warning("Ignoring unusable stored session history")
+        return history
+
+    def stats(self) -> dict[str, Any]:
+        """Return the history size for the diagnostics."""
+        return {
+            str(c): {
+                "transaction_id": curve.transaction_id,
+                "samples": len(curve),
+                "interval": curve.interval,
+                "bytes": curve.nbytes,
+            }
+            for c, curve in self._curves.items()
+        }
@@ -0,0 +1,239 @@
+"""Confirmation of charger instructions from the connector status updates."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any
+
+from dateutil.parser import ParserError, parse
+from homeassistant.util.dt import utcnow
+
+from .const import BASE_LOGGER
+from .enums import ChargeStateEnum
+from .metrics import LatencyHistogram
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from .data import InstructionResponseType
+
+LOGGER = BASE_LOGGER.getChild("instructions")
+
+DEFAULT_TIMEOUT = 30.0  # seconds, when the response does not tell
+MIN_TIMEOUT = 5.0
+MAX_TIMEOUT = 120.0
+
+# Connector states that show an instruction was carried out
+EXPECTED_STATES: dict[str, frozenset[ChargeStateEnum]] = {
+    "START_TRANSACTION": frozenset(
+        {ChargeStateEnum.charging, ChargeStateEnum.suspended_ev}
+    ),
+    "RESUME_CHARGING": frozenset(
+        {ChargeStateEnum.charging, ChargeStateEnum.suspended_ev}
+    ),
+    "PAUSE_CHARGING": frozenset(
+        {
+            ChargeStateEnum.suspended_evse,
+            ChargeStateEnum.finishing,
+            ChargeStateEnum.available,
+        }
+    ),
+    "RESUME_SCHEDULE": frozenset(
+        {
+            ChargeStateEnum.suspended_evse,
+            ChargeStateEnum.finishing,
+            ChargeStateEnum.available,
+        }
+    ),
+}
+
+
+class InstructionOutcome(StrEnum):
+    """How an instruction ended."""
+
+    confirmed = "confirmed"  # By a WebSocket status update
+    polled = "polled"  # By the poll after the timeout
+    unconfirmed = "unconfirmed"
+
+
+@dataclass
+class InstructionResult:
+    """Outcome of a tracked instruction."""
+
+    instruction: str
+    connector_id: int
+    outcome: InstructionOutcome
+    status: ChargeStateEnum | None
+    seconds: float
+
+
+@dataclass
+class _Pending:
+    instruction: str
+    connector_id: int
+    expected: frozenset[ChargeStateEnum]
+    started: float
+    future: asyncio.Future[InstructionResult]
+    timer: asyncio.TimerHandle | None = None
+
+
+def instruction_timeout(timeout: Any) -> float:
+    """Return the seconds to wait for an instruction, from its `timeout` field.
+
+    The field is either a number of seconds or the time the instruction expires.
+    """
+    seconds = DEFAULT_TIMEOUT
+    if isinstance(timeout, int | float) and not isinstance(timeout, bool):
+        seconds = float(timeout)
+    elif isinstance(timeout, str | datetime):
+        try:
+            expires = parse(timeout) if isinstance(timeout, str) else timeout
+            seconds = (expires - utcnow()).total_seconds()
+        except (ParserError, OverflowError, TypeError):
+            LOGGER.debug("Unusable instruction timeout: %s", timeout)
+    return min(MAX_TIMEOUT, max(MIN_TIMEOUT, seconds))
+
+
+class InstructionTracker:
+    """Wait for the connector status that confirms an accepted instruction.
+
+    `handle_status` is fed with the `connectorStatus` WebSocket updates. Only when
+    none confirms an instruction before its timeout is `poll` called, after which
+    the connector state from `status` decides.
+    """
+
+    def __init__(
+        self,
+        poll: Callable[[], Awaitable[Any]],
+        status: Callable[[int], ChargeStateEnum | None],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the tracker."""
+        self._poll = poll
+        self._status = status
+        self._clock = clock
+        self._pending: list[_Pending] = []
+        self._tasks: set[asyncio.Task] = set()
+        self.confirm_times = LatencyHistogram()
+        self.outcomes: Counter[str] = Counter()
+
+    @property
+    def pending(self) -> int:
+        """Return the number of instructions waiting for confirmation."""
+        return len(self._pending)
+
+    def track(
+        self, response: InstructionResponseType
+    ) -> asyncio.Future[InstructionResult] | None:
+        """Start tracking an accepted instruction.
+
+        Returns:
+            A future with the outcome, or None if the instruction is not tracked.
+
+        """
+        instruction = response["instruction"]
+        expected = EXPECTED_STATES.get(instruction.get("instruction") or "")
+        if not response.get("accepted") or expected is None:
+            return None
+        loop = asyncio.get_running_loop()
+        pending = _Pending(
+            instruction=instruction["instruction"],
+            connector_id=int(instruction.get("connector_id") or 1),
+            expected=expected,
+            started=self._clock(),
+            future=loop.create_future(),
+        )
+        timeout = instruction_timeout(instruction.get("timeout"))
+        pending.timer = loop.call_later(timeout, self._expired, pending)
+        self._pending.append(pending)
+        LOGGER.debug(
+            "Waiting up to %.0fs for %s on connector %s",
+            timeout,
+            pending.instruction,
+            pending.connector_id,
+        )
+        return pending.future
+
+    def handle_status(self, connector_id: int, status: ChargeStateEnum) -> None:
+        """Complete the instructions confirmed by a connector status update."""
+        for pending in list(self._pending):
+            if pending.connector_id == connector_id and status in pending.expected:
+                self._complete(pending, InstructionOutcome.confirmed, status)
+
+    def _expired(self, pending: _Pending) -> None:
+        pending.timer = None
+        task = asyncio.get_running_loop().create_task(self._poll_pending(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _poll_pending(self, pending: _Pending) -> None:
+        LOGGER.debug("No status update for %s, polling", pending.instruction)
+        try:
+            await self._poll()
+        except Exception as exception:  # noqa: BLE001
+            LOGGER.warning("Polling the instruction status failed: %s", exception)
+        if pending not in self._pending:
+            # Confirmed while polling
+            return
+        status = self._status(pending.connector_id)
+        self._complete(
+            pending,
+            InstructionOutcome.polled
+            if status in pending.expected
+            else InstructionOutcome.unconfirmed,
+            status,
+        )
+
+    def _complete(
+        self,
+        pending: _Pending,
+        outcome: InstructionOutcome,
+        status: ChargeStateEnum | None,
+    ) -> None:
+        self._pending.remove(pending)
+        if pending.timer is not None:
+            pending.timer.cancel()
+        seconds = self._clock() - pending.started
+        self.outcomes[outcome] += 1
+        if outcome is not InstructionOutcome.unconfirmed:
+            self.confirm_times.observe(seconds)
+        LOGGER.debug(
+            "%s on connector %s: %s after %.1fs",
+            pending.instruction,
+            pending.connector_id,
+            outcome,
+            seconds,
+        )
+        if not pending.future.done():
+            pending.future.set_result(
+                InstructionResult(
+                    instruction=pending.instruction,
+                    connector_id=pending.connector_id,
+                    outcome=outcome,
+                    status=status,
+                    seconds=seconds,
+                )
+            )
+
+    def cancel(self) -> None:
+        """Stop tracking, cancelling the waiting futures."""
+        for pending in self._pending:
+            if pending.timer is not None:
+                pending.timer.cancel()
+            pending.future.cancel()
+        self._pending.clear()
+        for task in self._tasks:
+            task.cancel()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the tracker statistics for the diagnostics."""
+        return {
+            "pending": self.pending,
+            "outcomes": dict(self.outcomes),
+            "confirm_time": self.confirm_times.as_dict(),
+        }
@@ -0,0 +1,150 @@
+"""Request metrics of the API client."""
+
+from __future__ import annotations
+
+import bisect
+from collections import Counter
+from typing import Any
+
+# Upper bounds of the latency buckets, in seconds. The last bucket is unbounded.
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class LatencyHistogram:
+    """Fixed bucket latency histogram.
+
+    Observing is a bisect and a few additions, so it can run on every request.
+    Percentiles are estimated as the upper bound of the bucket they fall in.
+    """
+
+    __slots__ = ("count", "counts", "max", "total")
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """Add a latency."""
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, pct: float) -> float | None:
+        """Return the estimated latency percentile in seconds."""
+        if self.count == 0:
+            return None
+        rank = self.count * pct / 100
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.counts, strict=False):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a summary in milliseconds."""
+
+        def ms(val: float | None) -> float | None:
+            return None if val is None else round(val * 1000, 1)
+
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else None,
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "max_ms": ms(self.max),
+            "buckets": {
+                f"le_{round(bound * 1000)}ms": n
+                for bound, n in zip(LATENCY_BUCKETS, self.counts, strict=False)
+            }
+            | {"le_inf": self.counts[-1]},
+        }
+
+
+class ApiMetrics:
+    """Counters and latency histograms per endpoint (method and path)."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.latency: dict[str, LatencyHistogram] = {}
+        self.statuses: dict[str, Counter[int]] = {}
+        self.exceptions: Counter[str] = Counter()
+        # Repeated after a token refresh, and after a transient failure
+        self.retries = 0
+        self.transient_retries = 0
+        self.token_refreshes = 0
+        self.logins = 0
+        self.bytes_received = 0
+        # Time spent waiting for the rate limiter, per budget
+        self.queue_waits: dict[str, LatencyHistogram] = {}
+        self._all = LatencyHistogram()
+
+    def observe(self, endpoint: str, seconds: float) -> None:
+        """Add the latency of a call, including any token refresh and retry."""
+        histogram = self.latency.get(endpoint)
+        if histogram is None:
+            histogram = self.latency[endpoint] = LatencyHistogram()
+        histogram.observe(seconds)
+        self._all.observe(seconds)
+
+    def queue_wait(self, budget: str, seconds: float) -> None:
+        """Add the time a call waited for the rate limiter."""
+        histogram = self.queue_waits.get(budget)
+        if histogram is None:
+            histogram = self.queue_waits[budget] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    def response(self, endpoint: str, status: int, size: int) -> None:
+        """Count a response."""
+        statuses = self.statuses.get(endpoint)
+        if statuses is None:
+            statuses = self.statuses[endpoint] = Counter()
+        statuses[status] += 1
+        self.bytes_received += size
+
+    @property
+    def requests(self) -> int:
+        """Return the number of calls made."""
+        return self._all.count
+
+    @property
+    def errors(self) -> int:
+        """Return the number of failed calls, the statuses are informational."""
+        return sum(self.exceptions.values())
+
+    def get(self, key: str) -> int | float | None:
+        """Return a metric for the diagnostic sensors."""
+        if key == "latency_p95":
+            p95 = self._all.percentile(95)
+            return None if p95 is None else round(p95 * 1000, 1)
+        if key in ("requests", "errors", "retries", "token_refreshes"):
+            return getattr(self, key)
+        return None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics for the diagnostics."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "transient_retries": self.transient_retries,
+            "token_refreshes": self.token_refreshes,
+            "logins": self.logins,
+            "bytes_received": self.bytes_received,
+            "exceptions": dict(self.exceptions),
+            "queue_waits": {
+                budget: histogram.as_dict()
+                for budget, histogram in self.queue_waits.items()
+            },
+            "endpoints": {
+                endpoint: {
+                    **histogram.as_dict(),
+                    "statuses": dict(self.statuses.get(endpoint, {})),
+                }
+                for endpoint, histogram in self.latency.items()
+            },
+        }
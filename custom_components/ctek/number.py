@@ -137,4 +137,4 @@ class CtekNumberSetting(CtekEntity, NumberEntity):
         """Handle updated data from the coordinator."""
         val = self.coordinator.get_property(self.entity_description.key)
         self._attr_native_value = int(val) if val is not None else 0
-        self.schedule_update_ha_state()
+        self._write_state_if_changed(self._attr_native_value)
@@ -1,6 +1,8 @@
 """Data parsers."""
 
 import copy
+from datetime import datetime
+from enum import Enum
 from typing import Any
 
 from dateutil.parser import parse
@@ -245,3 +247,52 @@ def parse_instruction_response(res: dict[str, Any]) -> InstructionResponseType:
     }
 
     return data
+
+
+def _json_safe(val: Any) -> Any:
+    """Convert enums and datetimes so the value can be stored as JSON."""
+    if isinstance(val, dict):
+        return {k: _json_safe(v) for k, v in val.items()}
+    if isinstance(val, list):
+        return [_json_safe(v) for v in val]
+    if isinstance(val, Enum):
+        return val.value
+    if isinstance(val, datetime):
+        return val.isoformat()
+    return val
+
+
+def dump_snapshot(data: DataType) -> dict[str, Any]:
+    """Convert the coordinator data to a JSON serializable snapshot."""
+    return _json_safe(data)
+
+
+def parse_snapshot(snapshot: dict[str, Any]) -> DataType:
+    """Parse a snapshot created by `dump_snapshot` back to coordinator data.
+
+    Raises:
+        KeyError, TypeError, ValueError: If the snapshot is malformed.
+
+    """
+    device = copy.copy(snapshot)
+    device["device_status"] = {
+        **snapshot["device_status"],
+        "connectors": [
+            {"id": k, **v} for k, v in snapshot["device_status"]["connectors"].items()
+        ],
+    }
+    ret = parse_data(None, snapshot["device_id"], [device])  # type: ignore[arg-type]
+    ret["configs"] = snapshot.get("configs", [])
+
+    session: dict[str, Any] | None = snapshot.get("charging_session")
+    if session is not None:
+        ret["charging_session"] = {  # type: ignore[typeddict-item]
+            **session,
+            "start_time": None
+            if session.get("start_time") in (None, "")
+            else parse(session["start_time"]),
+            "last_updated_time": None
+            if session.get("last_updated_time") in (None, "")
+            else parse(session["last_updated_time"]),
+        }
+    return ret
@@ -0,0 +1,184 @@
+"""Prediction of when the current charging session completes."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util.dt import utcnow
+
+from .const import BASE_LOGGER
+
+if TYPE_CHECKING:
+    from .data import ChargingSessionType
+
+LOGGER = BASE_LOGGER.getChild("prediction")
+
+# Weight of the latest session in the learned model, and of the latest sample in
+# the smoothed power
+MODEL_ALPHA = 0.3
+POWER_ALPHA = 0.3
+# The car tapers once the power stays below this share of the plateau
+TAPER_SHARE = 0.9
+TAPER_SAMPLES = 3
+
+
+def _number(value: Any) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _ewma(old: float | None, new: float, alpha: float) -> float:
+    return new if old is None else old + alpha * (new - old)
+
+
+@dataclass
+class ChargeModel:
+    """What a car typically takes, learned from its past sessions."""
+
+    sessions: int = 0
+    energy: float | None = None  # Wh per session
+    taper_energy: float | None = None  # Wh after the taper started
+    taper_seconds: float | None = None
+
+    def learn(self, session: SessionState) -> None:
+        """Update the model with a completed session."""
+        if session.wh <= 0:
+            return
+        self.sessions += 1
+        self.energy = _ewma(self.energy, session.wh, MODEL_ALPHA)
+        if session.taper_start is None:
+            taper_energy, taper_seconds = 0.0, 0.0
+        else:
+            taper_energy = session.wh - session.taper_start[1]
+            taper_seconds = session.updated - session.taper_start[0]
+        self.taper_energy = _ewma(self.taper_energy, taper_energy, MODEL_ALPHA)
+        self.taper_seconds = _ewma(self.taper_seconds, taper_seconds, MODEL_ALPHA)
+
+
+@dataclass
+class SessionState:
+    """What is known about the ongoing session, updated in O(1) per sample."""
+
+    transaction_id: int | None
+    wh: float = 0.0
+    updated: float = 0.0
+    power: float | None = None  # smoothed
+    plateau: float = 0.0
+    below: int = 0  # consecutive samples under the plateau
+    # Timestamp and Wh of the first sample under the plateau, and of the taper
+    # once confirmed by enough samples
+    below_start: tuple[float, float] | None = None
+    taper_start: tuple[float, float] | None = None
+
+    def add(self, timestamp: float, power: float | None, wh: float | None) -> None:
+        """Add a sample."""
+        self.updated = timestamp
+        if wh is not None:
+            self.wh = max(self.wh, wh)
+        if power is None:
+            return
+        self.power = _ewma(self.power, power, POWER_ALPHA)
+        if self.power >= TAPER_SHARE * self.plateau:
+            self.plateau = max(self.plateau, self.power)
+            self.below = 0
+            self.below_start = self.taper_start = None
+            return
+        self.below += 1
+        if self.below_start is None:
+            self.below_start = (timestamp, self.wh)
+        if self.below >= TAPER_SAMPLES:
+            self.taper_start = self.below_start
+
+
+class CompletionPredictor:
+    """Estimate the remaining time of the ongoing session of each connector.
+
+    The cars do not report their state of charge, so each connector learns what
+    its car typically takes: the energy of a session, and the energy and time
+    spent tapering at its end. The remaining energy before the taper is charged
+    at the plateau power, the taper takes what it took before.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the predictor."""
+        self.models: dict[int, ChargeModel] = {}
+        self._sessions: dict[int, SessionState] = {}
+
+    def record(self, connector_id: int, session: ChargingSessionType) -> bool:
+        """Add a session summary, return True if the model learned a session."""
+        state = self._sessions.get(connector_id)
+        transaction_id = session.get("transaction_id")
+        learned = False
+        if state is not None and (
+            not session.get("ongoing_transaction")
+            or state.transaction_id != transaction_id
+        ):
+            self.models.setdefault(connector_id, ChargeModel()).learn(state)
+            del self._sessions[connector_id]
+            state = None
+            learned = True
+        if not session.get("ongoing_transaction"):
+            return learned
+        if state is None:
+            state = self._sessions[connector_id] = SessionState(transaction_id)
+        updated = session.get("last_updated_time") or utcnow()
+        state.add(
+            updated.timestamp(),
+            _number(session.get("momentary_power")),
+            _number(session.get("watt_hours_consumed")),
+        )
+        return learned
+
+    def remaining(self, connector_id: int) -> float | None:
+        """Return the seconds until the session completes, None if unknown."""
+        state = self._sessions.get(connector_id)
+        model = self.models.get(connector_id)
+        if state is None or model is None or model.energy is None:
+            return None
+        taper_energy = model.taper_energy or 0.0
+        taper_seconds = model.taper_seconds or 0.0
+        if state.taper_start is not None:
+            tapered = state.wh - state.taper_start[1]
+            if taper_energy <= 0:
+                return 0.0
+            return taper_seconds * max(0.0, 1 - tapered / taper_energy)
+        if not state.plateau:
+            return None
+        bulk_energy = max(0.0, model.energy - taper_energy - state.wh)
+        return bulk_energy / state.plateau * 3600 + taper_seconds
+
+    def finish(self, connector_id: int) -> float | None:
+        """Return the timestamp the session completes, None if unknown."""
+        remaining = self.remaining(connector_id)
+        state = self._sessions.get(connector_id)
+        if remaining is None or state is None:
+            return None
+        return state.updated + remaining
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the models and the ongoing sessions to store."""
+        return {
+            "models": {str(c): asdict(model) for c, model in self.models.items()},
+            "sessions": {str(c): asdict(state) for c, state in self._sessions.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> CompletionPredictor:
+        """Restore the stored models and sessions, skipping unusable ones."""
+        predictor = cls()
+        try:
+            for c, model in data.get("models", {}).items():
+                predictor.models[int(c)] = ChargeModel(**model)
+            for c, state in data.get("sessions", {}).items():
+                session = SessionState(**state)
+                for key in ("below_start", "taper_start"):
+                    if (value := getattr(session, key)) is not None:
+                        setattr(session, key, tuple(value))
+                predictor._sessions[int(c)] = session
+        except (TypeError, ValueError):
+            LOGGER.warning("Ignoring unusable stored charge model")
+            return cls()
+        return predictor
@@ -0,0 +1,290 @@
+"""Car quirks: getting a charge going when the car does not start drawing power."""
+
+from __future__ import annotations
+
+import time
+from dataclasses import asdict, dataclass, field
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.service import async_call_from_config
+
+from .const import BASE_LOGGER, CtekApiClientError, CtekControlTimeoutError
+from .enums import ChargeStateEnum
+from .resilience import Priority
+
+if TYPE_CHECKING:
+    from .coordinator import CtekDataUpdateCoordinator
+
+LOGGER = BASE_LOGGER.getChild("quirks")
+PURPOSE = "quirks"  # of the scheduled checks
+
+QUIRKS_DELAY = 60  # seconds, at most between two checks
+QUIRKS_TRIES = 3
+# Wait after a status change before acting on it, as cars often pass through
+# SuspendedEV on their way to charging
+SETTLE_DELAY = 10  # seconds
+
+# States the state machine acts on. Others (offline, unplugged, ...) are waited out.
+ACTIONABLE_STATES = frozenset(
+    {
+        ChargeStateEnum.charging,
+        ChargeStateEnum.preparing,
+        ChargeStateEnum.suspended_ev,
+        ChargeStateEnum.suspended_evse,
+    }
+)
+
+
+class QuirkStep(StrEnum):
+    """The last action of the state machine, which it waits to take effect."""
+
+    start = "start"
+    retry_start = "retry_start"
+    toggle = "toggle"
+    service_action = "service_action"
+    reboot = "reboot"
+    wait = "wait"
+
+
+@dataclass
+class QuirksState:
+    """Progress of the quirks for one connector, stored across restarts."""
+
+    connector_id: int
+    step: QuirkStep = QuirkStep.start
+    tries: int = QUIRKS_TRIES
+    tried: list[str] = field(default_factory=list)
+    # Connector state after the last action, to tell when it changes
+    status: str | None = None
+    # Wall clock time of the next check at the latest
+    deadline: float = 0.0
+    checking: bool = field(default=False, compare=False)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state to store."""
+        data = asdict(self)
+        del data["checking"]
+        data["step"] = str(self.step)
+        data["tried"] = [str(step) for step in self.tried]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> QuirksState:
+        """Restore a stored state."""
+        return cls(
+            connector_id=int(data["connector_id"]),
+            step=QuirkStep(data["step"]),
+            tries=int(data["tries"]),
+            tried=list(data["tried"]),
+            status=data.get("status"),
+            deadline=float(data["deadline"]),
+        )
+
+
+class CarQuirks:
+    """Per connector state machine working around cars that do not start charging.
+
+    After a start, each check looks at the connector state and tries the next fix:
+    sending the start again, toggling a switch, calling a service and rebooting the
+    charger, until the car charges or the tries run out. A check runs when a
+    connector status update shows a new state, or at the latest when the delay of
+    the last action has passed. The progress is stored, so a restart resumes it.
+    """
+
+    def __init__(self, coordinator: CtekDataUpdateCoordinator) -> None:
+        """Initialize the state machine."""
+        self.coordinator = coordinator
+        self._states: dict[int, QuirksState] = {}
+
+    @property
+    def active(self) -> bool:
+        """Return True if a connector is being watched."""
+        return bool(self._states)
+
+    @property
+    def connectors(self) -> list[int]:
+        """Return the connectors being watched."""
+        return list(self._states)
+
+    def state(self, connector_id: int) -> QuirksState | None:
+        """Return the progress for a connector."""
+        return self._states.get(connector_id)
+
+    async def async_start(self, connector_id: int) -> None:
+        """Watch a connector after a start charge was accepted."""
+        state = QuirksState(
+            connector_id=connector_id,
+            status=self._status(connector_id),
+        )
+        self._states[connector_id] = state
+        await self._async_wait(state, QUIRKS_DELAY)
+
+    async def async_cancel(self, connector_id: int) -> None:
+        """Stop watching a connector."""
+        if self._states.pop(connector_id, None) is not None:
+            self.coordinator.cancel_delayed_operation(
+                connector=connector_id, purpose=PURPOSE
+            )
+            await self._async_store()
+
+    async def async_restore(self) -> None:
+        """Resume the progress stored by the previous run."""
+        stored = self.coordinator.stored_quirks()
+        if not self.coordinator.config_entry.options.get("enable_quirks", False):
+            if stored:
+                await self.coordinator.async_store_quirks({})
+            return
+        for data in stored.values():
+            try:
+                state = QuirksState.from_dict(data)
+            except (KeyError, TypeError, ValueError):
+                LOGGER.warning("Ignoring unusable stored quirks state: %s", data)
+                continue
+            LOGGER.info("Resuming quirks for connector %s", state.connector_id)
+            self._states[state.connector_id] = state
+            # The data may be from the cache, give the status updates time to arrive
+            await self._async_schedule(
+                state, max(SETTLE_DELAY, state.deadline - time.time())
+            )
+
+    def handle_status(self, connector_id: int, status: ChargeStateEnum) -> None:
+        """React to a connector status update."""
+        state = self._states.get(connector_id)
+        if (
+            state is None
+            or state.checking
+            or status.value == state.status
+            or status not in ACTIONABLE_STATES
+        ):
+            return
+        delay = 0 if status is ChargeStateEnum.charging else SETTLE_DELAY
+        if state.deadline - time.time() > delay:
+            LOGGER.debug("Connector %s is now %s", connector_id, status.value)
+            self.coordinator.hass.async_create_task(self._async_schedule(state, delay))
+
+    def _status(self, connector_id: int) -> str | None:
+        status = self.coordinator.get_connector_status_sync(connector_id)
+        return None if status is None else status.value
+
+    async def _async_schedule(self, state: QuirksState, delay: float) -> None:
+        if delay <= 0:
+            await self.async_check(state.connector_id)
+            return
+        await self.coordinator.start_delayed_operation(
+            delay=round(delay),
+            func=self.async_check,
+            connector=state.connector_id,
+            purpose=PURPOSE,
+            connector_id=state.connector_id,
+        )
+
+    async def _async_wait(self, state: QuirksState, delay: float) -> None:
+        """Wait at most `delay` seconds for the last action to take effect."""
+        state.deadline = time.time() + delay
+        await self._async_store()
+        await self._async_schedule(state, delay)
+
+    async def _async_store(self) -> None:
+        await self.coordinator.async_store_quirks(
+            {str(c): state.as_dict() for c, state in self._states.items()}
+        )
+
+    async def async_check(self, connector_id: int) -> None:
+        """Check the connector and take the next step."""
+        state = self._states.get(connector_id)
+        if state is None or state.checking:
+            return
+        state.checking = True
+        try:
+            async with self.coordinator.control_lock.hold("quirks", Priority.low):
+                if self._states.get(connector_id) is state:
+                    await self._async_step(state)
+        except CtekControlTimeoutError:
+            LOGGER.warning("Charger busy, checking the quirks again later")
+            await self._async_schedule(state, SETTLE_DELAY)
+        except (CtekApiClientError, HomeAssistantError) as exception:
+            LOGGER.warning("Quirk step failed, checking again later: %s", exception)
+            if self._states.get(connector_id) is state:
+                await self._async_wait(state, QUIRKS_DELAY)
+        finally:
+            state.checking = False
+
+    async def _async_step(self, state: QuirksState) -> None:
+        coordinator = self.coordinator
+        connector_id = state.connector_id
+        coordinator.cancel_delayed_operation(connector=connector_id, purpose=PURPOSE)
+        if state.tries <= 0:
+            LOGGER.error("Start charge apparently failed")
+            await self.async_cancel(connector_id)
+            return
+
+        status = coordinator.get_connector_status_sync(connector_id)
+        options = coordinator.config_entry.options
+        toggle: str | None = options.get("quirks_toggle_switch")
+        # action is name, data contains args as dict
+        service_action: list[dict] | None = options.get("quirks_call_service")
+        LOGGER.info("Checking quirks. Already tried: %s", state.tried)
+
+        if status == ChargeStateEnum.charging:
+            LOGGER.info("Charge has started; setting MAX current")
+            await self.async_cancel(connector_id)
+            await coordinator.set_config(
+                name="configs.CurrentAssignment",
+                value=str(coordinator.get_max_current()),
+                priority=Priority.low,
+            )
+            return
+
+        state.tries -= 1
+        delay = QUIRKS_DELAY
+        if status in (ChargeStateEnum.suspended_evse, ChargeStateEnum.preparing):
+            LOGGER.info("Charge is not started. Trying again")
+            state.step = QuirkStep.retry_start
+            await coordinator.resend_start_charge(connector_id)
+        elif (
+            status == ChargeStateEnum.suspended_ev
+            and toggle is not None
+            and QuirkStep.toggle not in state.tried
+        ):
+            LOGGER.warning("Toggling switch: %s", toggle)
+            state.step = QuirkStep.toggle
+            state.tried.append(QuirkStep.toggle)
+            await coordinator.hass.services.async_call(
+                "homeassistant", "toggle", {"entity_id": toggle}
+            )
+        elif (
+            status == ChargeStateEnum.suspended_ev
+            and service_action
+            and QuirkStep.service_action not in state.tried
+        ):
+            LOGGER.warning("Calling service: %s", service_action)
+            state.step = QuirkStep.service_action
+            state.tried.append(QuirkStep.service_action)
+            await async_call_from_config(
+                coordinator.hass,
+                {
+                    "service": service_action[0].get("action"),
+                    "data": service_action[0].get("data", {}),
+                },
+            )
+        elif (
+            status == ChargeStateEnum.suspended_ev
+            and options.get("reboot_station_if_start_fails", False)
+            and QuirkStep.reboot not in state.tried
+        ):
+            LOGGER.warning("Seems like charge did not start as expected; rebooting")
+            state.step = QuirkStep.reboot
+            state.tried.append(QuirkStep.reboot)
+            await coordinator.send_command(command="REBOOT", priority=Priority.low)
+            delay = 2 * QUIRKS_DELAY
+        else:
+            LOGGER.warning("Charge not started; checking again in %ds", delay)
+            state.step = QuirkStep.wait
+
+        if self._states.get(connector_id) is not state:
+            # Cancelled while acting
+            return
+        state.status = self._status(connector_id)
+        await self._async_wait(state, delay)
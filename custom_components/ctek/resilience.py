@@ -0,0 +1,277 @@
+"""Circuit breaker and rate limiting for the CTEK cloud."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from enum import IntEnum, StrEnum
+from typing import TYPE_CHECKING, Any
+
+from .const import (
+    BASE_LOGGER,
+    DOMAIN,
+    CtekApiClientCircuitOpenError,
+    CtekApiClientRateLimitedError,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from homeassistant.core import HomeAssistant
+
+LOGGER = BASE_LOGGER.getChild("resilience")
+
+FAILURE_THRESHOLD = 5
+OPEN_TIMEOUT = 30.0  # seconds, doubled on every failed probe
+MAX_OPEN_TIMEOUT = 600.0
+
+# Request budgets per account: tokens per second and burst size
+READ_RATE = 0.5
+READ_BURST = 10
+CONTROL_RATE = 0.2
+CONTROL_BURST = 5
+
+
+class BreakerState(StrEnum):
+    """Circuit breaker states."""
+
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitBreaker:
+    """Fail fast while the cloud is down.
+
+    After `FAILURE_THRESHOLD` consecutive failures the breaker opens and calls fail
+    at once. Once the open timeout has passed it is half open: a single probe call
+    goes through while the others still fail fast, and its outcome either closes
+    the breaker or opens it for twice as long.
+    State changes fire a `ctek_circuit_breaker` event.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the breaker."""
+        self.hass = hass
+        self._clock = clock
+        self._state = BreakerState.closed
+        self._failures = 0
+        self._open_timeout = OPEN_TIMEOUT
+        self._opened_at = 0.0
+        # The task of the probe call, its nested calls such as a login go through
+        self._probe: asyncio.Task | None = None
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def state(self) -> BreakerState:
+        """Return the current state, moving from open to half open when due."""
+        if (
+            self._state is BreakerState.open
+            and self._clock() - self._opened_at >= self._open_timeout
+        ):
+            self._set_state(BreakerState.half_open)
+        return self._state
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until calls are allowed again."""
+        if self.state is not BreakerState.open:
+            return 0.0
+        return self._open_timeout - (self._clock() - self._opened_at)
+
+    def add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call `listener` on state changes, return a function to remove it."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def before_call(self) -> bool:
+        """Raise if calls must fail fast, return True if the call is the probe."""
+        state = self.state
+        if state is BreakerState.open:
+            msg = f"CTEK cloud unavailable, retrying in {self.retry_in:.0f}s"
+            raise CtekApiClientCircuitOpenError(msg)
+        if state is BreakerState.half_open:
+            task = asyncio.current_task()
+            if self._probe is not None:
+                if self._probe is task:
+                    return False
+                msg = "CTEK cloud recovering, waiting for the probe call"
+                raise CtekApiClientCircuitOpenError(msg)
+            self._probe = task
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """Let another call probe, the probe ended without an outcome."""
+        self._probe = None
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        self._failures = 0
+        self._probe = None
+        if self._state is not BreakerState.closed:
+            self._open_timeout = OPEN_TIMEOUT
+            self._set_state(BreakerState.closed)
+
+    def record_failure(self) -> None:
+        """Record a failed call."""
+        self._failures += 1
+        self._probe = None
+        if self._state is BreakerState.half_open:
+            self._open_timeout = min(self._open_timeout * 2, MAX_OPEN_TIMEOUT)
+            self._open()
+        elif self._state is BreakerState.closed and self._failures >= FAILURE_THRESHOLD:
+            self._open()
+
+    def _open(self) -> None:
+        self._opened_at = self._clock()
+        self._set_state(BreakerState.open)
+
+    def _set_state(self, state: BreakerState) -> None:
+        if state is self._state:
+            return
+        LOGGER.warning("CTEK cloud circuit breaker %s -> %s", self._state, state)
+        previous, self._state = self._state, state
+        if self.hass is not None:
+            self.hass.bus.async_fire(
+                f"{DOMAIN}_circuit_breaker",
+                {"state": str(state), "previous": str(previous)},
+            )
+        for listener in list(self._listeners):
+            listener()
+
+
+def get_breaker(hass: HomeAssistant, account: str) -> CircuitBreaker:
+    """Return the circuit breaker shared by all entries of an account."""
+    breakers: dict[str, CircuitBreaker] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        "breakers", {}
+    )
+    if account not in breakers:
+        breakers[account] = CircuitBreaker(hass)
+    return breakers[account]
+
+
+class Priority(IntEnum):
+    """Priority of a cloud request."""
+
+    low = 0  # Background polling, dropped first when over budget
+    normal = 1
+
+
+class TokenBucket:
+    """Token bucket that queues callers in arrival order.
+
+    A normal priority caller waits for its turn when the bucket is empty. A low
+    priority caller is shed with `CtekApiClientRateLimitedError` instead, so the
+    budget is kept for commands and user initiated reads.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the bucket with `rate` tokens per second."""
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        self._pump_handle: asyncio.TimerHandle | None = None
+        self.shed = 0
+
+    @property
+    def tokens(self) -> float:
+        """Return the tokens currently available."""
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+        return self._tokens
+
+    @property
+    def queued(self) -> int:
+        """Return the number of callers waiting."""
+        return len(self._waiters)
+
+    async def acquire(self, priority: Priority = Priority.normal) -> float:
+        """Take a token, waiting for it if needed. Return the seconds waited."""
+        if not self._waiters and self.tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        if priority is Priority.low:
+            self.shed += 1
+            msg = f"Over the {self.name} request budget, skipping a background call"
+            raise CtekApiClientRateLimitedError(msg)
+
+        started = self._clock()
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._schedule_pump()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Got a token but nobody will use it
+                self._tokens += 1
+            raise
+        return self._clock() - started
+
+    def _schedule_pump(self) -> None:
+        if self._pump_handle is not None or not self._waiters:
+            return
+        delay = max(0.0, (1 - self.tokens) / self.rate)
+        self._pump_handle = asyncio.get_running_loop().call_later(delay, self._pump)
+
+    def _pump(self) -> None:
+        self._pump_handle = None
+        while self._waiters and self.tokens >= 1:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._tokens -= 1
+            waiter.set_result(None)
+        self._schedule_pump()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the bucket for the diagnostics."""
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": round(self.tokens, 2),
+            "queued": self.queued,
+            "shed": self.shed,
+        }
+
+
+class RateLimiter:
+    """Separate request budgets for reads and for control commands."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize the budgets."""
+        self.read = TokenBucket("read", READ_RATE, READ_BURST, clock)
+        self.control = TokenBucket("control", CONTROL_RATE, CONTROL_BURST, clock)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the budgets for the diagnostics."""
+        return {"read": self.read.as_dict(), "control": self.control.as_dict()}
+
+
+def get_rate_limiter(hass: HomeAssistant, account: str) -> RateLimiter:
+    """Return the rate limiter shared by all entries of an account."""
+    limiters: dict[str, RateLimiter] = hass.data.setdefault(DOMAIN, {}).setdefault(
+        "rate_limiters", {}
+    )
+    if account not in limiters:
+        limiters[account] = RateLimiter()
+    return limiters[account]
@@ -0,0 +1,126 @@
+"""Delayed jobs of the coordinator, keyed by device, connector and purpose."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from .const import BASE_LOGGER
+
+if TYPE_CHECKING:
+    import asyncio
+    from collections.abc import Callable, Coroutine
+
+    from homeassistant.core import HomeAssistant
+
+LOGGER = BASE_LOGGER.getChild("scheduler")
+
+
+class JobKey(NamedTuple):
+    """Identifies a job. Scheduling a job with the same key replaces it."""
+
+    device_id: str
+    connector_id: int | None
+    purpose: str
+
+
+class Scheduler:
+    """Run coroutines after a delay, any number at once.
+
+    Jobs are cancelled by key, by any combination of key fields, or all at once
+    on shutdown, which also cancels the jobs already running.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._timers: dict[JobKey, asyncio.TimerHandle] = {}
+        self._running: set[asyncio.Task] = set()
+
+    def schedule(
+        self,
+        key: JobKey,
+        delay: float,
+        func: Callable[..., Coroutine[Any, Any, Any]],
+        **kwargs: Any,
+    ) -> None:
+        """Run `func(**kwargs)` after `delay` seconds, replacing the job of `key`."""
+        self.cancel_job(key)
+        self._timers[key] = self.hass.loop.call_later(
+            delay, self._run, key, func, kwargs
+        )
+        LOGGER.debug("Scheduled %s in %.0fs", key, delay)
+
+    def _run(
+        self,
+        key: JobKey,
+        func: Callable[..., Coroutine[Any, Any, Any]],
+        kwargs: dict[str, Any],
+    ) -> None:
+        del self._timers[key]
+        task = self.hass.async_create_task(
+            func(**kwargs), f"ctek {key.purpose} {key.device_id}"
+        )
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    def cancel_job(self, key: JobKey) -> bool:
+        """Cancel a job, return True if it was scheduled."""
+        timer = self._timers.pop(key, None)
+        if timer is None:
+            return False
+        timer.cancel()
+        return True
+
+    def cancel(
+        self,
+        *,
+        device_id: str | None = None,
+        connector_id: int | None = None,
+        purpose: str | None = None,
+    ) -> int:
+        """Cancel the jobs matching all given fields, return how many.
+
+        A purpose also matches its sub purposes, so `quirks` matches
+        `quirks.prewarm`.
+        """
+        keys = [
+            key
+            for key in self._timers
+            if (device_id is None or key.device_id == device_id)
+            and (connector_id is None or key.connector_id == connector_id)
+            and (
+                purpose is None
+                or key.purpose == purpose
+                or key.purpose.startswith(f"{purpose}.")
+            )
+        ]
+        for key in keys:
+            self.cancel_job(key)
+        return len(keys)
+
+    def due_in(self, key: JobKey) -> float | None:
+        """Return the seconds until a job runs, None if it is not scheduled."""
+        timer = self._timers.get(key)
+        if timer is None:
+            return None
+        return max(0.0, timer.when() - self.hass.loop.time())
+
+    @property
+    def jobs(self) -> list[JobKey]:
+        """Return the keys of the scheduled jobs."""
+        return list(self._timers)
+
+    def shutdown(self) -> None:
+        """Cancel all jobs, including the running ones."""
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for task in self._running:
+            task.cancel()
+
+    def as_dict(self) -> list[dict[str, Any]]:
+        """Return the scheduled jobs for the diagnostics."""
+        return [
+            {**key._asdict(), "due_in": round(self.due_in(key) or 0.0, 1)}
+            for key in self._timers
+        ]
@@ -2,27 +2,49 @@
 
 from __future__ import annotations
 
+import time
 from typing import TYPE_CHECKING
 
 from dateutil.parser import ParserError, parse
 from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
-from homeassistant.components.sensor.const import SensorDeviceClass
+from homeassistant.components.sensor.const import SensorDeviceClass, SensorStateClass
+from homeassistant.const import EntityCategory
+from homeassistant.helpers.event import async_call_later
 from homeassistant.util.dt import DEFAULT_TIME_ZONE
 
 from .entity import CtekEntity, callback
 from .enums import ChargeStateEnum
+from .resilience import BreakerState
+from .throttle import SensorThrottle
 
 if TYPE_CHECKING:
     from collections.abc import Callable
     from datetime import datetime
 
-    from homeassistant.core import HomeAssistant
+    from homeassistant.core import CALLBACK_TYPE, HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
     from .coordinator import CtekDataUpdateCoordinator
     from .data import CtekConfigEntry
 
 
+# API client metrics exposed as diagnostic sensors: key, unit and state class
+METRIC_SENSORS = (
+    ("requests", None, SensorStateClass.TOTAL_INCREASING),
+    ("errors", None, SensorStateClass.TOTAL_INCREASING),
+    ("token_refreshes", None, SensorStateClass.TOTAL_INCREASING),
+    ("latency_p95", "ms", SensorStateClass.MEASUREMENT),
+)
+
+# Session analytics exposed as diagnostic sensors: key, unit and device class
+ANALYTICS_SENSORS = (
+    ("average_power", "W", SensorDeviceClass.POWER),
+    ("peak_power", "W", SensorDeviceClass.POWER),
+    ("current_limited_seconds", "s", SensorDeviceClass.DURATION),
+    ("taper_start", None, SensorDeviceClass.TIMESTAMP),
+)
+
+
 def status_icon(status: ChargeStateEnum) -> str:
     """Get the icon corresponding to a given charge state.
 
@@ -99,6 +121,7 @@ async def async_setup_entry(
                     has_entity_name=True,
                 ),
                 device_id=entry.data["device_id"],
+                throttle=SensorThrottle(entry, "voltage"),
             ),
             CtekSensor(
                 coordinator=entry.runtime_data.coordinator,
@@ -111,6 +134,7 @@ async def async_setup_entry(
                     has_entity_name=True,
                 ),
                 device_id=entry.data["device_id"],
+                throttle=SensorThrottle(entry, "current"),
             ),
             CtekSensor(
                 coordinator=entry.runtime_data.coordinator,
@@ -123,7 +147,71 @@ async def async_setup_entry(
                     has_entity_name=True,
                 ),
                 device_id=entry.data["device_id"],
+                throttle=SensorThrottle(entry, "power"),
             ),
+            CtekSensor(
+                coordinator=entry.runtime_data.coordinator,
+                entity_description=SensorEntityDescription(
+                    key="prediction.remaining",
+                    translation_key="remaining_time",
+                    icon="mdi:timer-sand",
+                    device_class=SensorDeviceClass.DURATION,
+                    native_unit_of_measurement="min",
+                    has_entity_name=True,
+                ),
+                device_id=entry.data["device_id"],
+            ),
+            CtekSensor(
+                coordinator=entry.runtime_data.coordinator,
+                entity_description=SensorEntityDescription(
+                    key="prediction.finish",
+                    translation_key="estimated_finish",
+                    icon="mdi:clock-end",
+                    device_class=SensorDeviceClass.TIMESTAMP,
+                    has_entity_name=True,
+                ),
+                device_id=entry.data["device_id"],
+            ),
+            *[
+                CtekSensor(
+                    coordinator=entry.runtime_data.coordinator,
+                    entity_description=SensorEntityDescription(
+                        key=f"energy.session.{e}",
+                        translation_key="session_energy",
+                        translation_placeholders={"conn": str(e)},
+                        icon="mdi:lightning-bolt",
+                        device_class=SensorDeviceClass.ENERGY,
+                        state_class=SensorStateClass.TOTAL_INCREASING,
+                        native_unit_of_measurement="Wh",
+                        suggested_display_precision=0,
+                        has_entity_name=True,
+                    ),
+                    device_id=entry.data["device_id"],
+                )
+                for e in range(
+                    1, entry.runtime_data.coordinator.data["number_of_connectors"] + 1
+                )
+            ],
+            *[
+                CtekSensor(
+                    coordinator=entry.runtime_data.coordinator,
+                    entity_description=SensorEntityDescription(
+                        key=f"energy.lifetime.{e}",
+                        translation_key="lifetime_energy",
+                        translation_placeholders={"conn": str(e)},
+                        icon="mdi:counter",
+                        device_class=SensorDeviceClass.ENERGY,
+                        state_class=SensorStateClass.TOTAL_INCREASING,
+                        native_unit_of_measurement="Wh",
+                        suggested_unit_of_measurement="kWh",
+                        has_entity_name=True,
+                    ),
+                    device_id=entry.data["device_id"],
+                )
+                for e in range(
+                    1, entry.runtime_data.coordinator.data["number_of_connectors"] + 1
+                )
+            ],
             *[
                 CtekSensor(
                     coordinator=entry.runtime_data.coordinator,
@@ -159,6 +247,69 @@ async def async_setup_entry(
                     1, entry.runtime_data.coordinator.data["number_of_connectors"] + 1
                 )
             ],
+            *[
+                CtekSensor(
+                    coordinator=entry.runtime_data.coordinator,
+                    entity_description=SensorEntityDescription(
+                        key=f"configs.{c['key']}",
+                        name=c["key"],
+                        icon="mdi:cog",
+                        entity_category=EntityCategory.DIAGNOSTIC,
+                        entity_registry_enabled_default=False,
+                        has_entity_name=True,
+                    ),
+                    device_id=entry.data["device_id"],
+                )
+                for c in entry.runtime_data.coordinator.data["configs"]
+                if c.get("key") is not None
+            ],
+            CtekSensor(
+                coordinator=entry.runtime_data.coordinator,
+                entity_description=SensorEntityDescription(
+                    key="cloud.breaker_state",
+                    translation_key="cloud_breaker",
+                    icon="mdi:cloud-alert",
+                    device_class=SensorDeviceClass.ENUM,
+                    options=[str(state) for state in BreakerState],
+                    entity_category=EntityCategory.DIAGNOSTIC,
+                    has_entity_name=True,
+                ),
+                device_id=entry.data["device_id"],
+            ),
+            *[
+                CtekSensor(
+                    coordinator=entry.runtime_data.coordinator,
+                    entity_description=SensorEntityDescription(
+                        key=f"metrics.{key}",
+                        translation_key=f"api_{key}",
+                        icon="mdi:cloud-sync",
+                        state_class=state_class,
+                        native_unit_of_measurement=unit,
+                        entity_category=EntityCategory.DIAGNOSTIC,
+                        entity_registry_enabled_default=False,
+                        has_entity_name=True,
+                    ),
+                    device_id=entry.data["device_id"],
+                )
+                for key, unit, state_class in METRIC_SENSORS
+            ],
+            *[
+                CtekSensor(
+                    coordinator=entry.runtime_data.coordinator,
+                    entity_description=SensorEntityDescription(
+                        key=f"analytics.{key}",
+                        translation_key=f"session_{key}",
+                        icon="mdi:chart-bell-curve",
+                        device_class=device_class,
+                        native_unit_of_measurement=unit,
+                        entity_category=EntityCategory.DIAGNOSTIC,
+                        entity_registry_enabled_default=False,
+                        has_entity_name=True,
+                    ),
+                    device_id=entry.data["device_id"],
+                )
+                for key, unit, device_class in ANALYTICS_SENSORS
+            ],
         ]
     )
 
@@ -167,6 +318,8 @@ class CtekSensor(CtekEntity, SensorEntity):
     """ctek Sensor class."""
 
     _attr_native_value: ChargeStateEnum | str | int | float | datetime | None = None
+    _cancel_flush: CALLBACK_TYPE | None = None
+    _flushing = False
 
     def __init__(
         self,
@@ -175,6 +328,7 @@ class CtekSensor(CtekEntity, SensorEntity):
         device_id: str,
         icon_func: Callable | None = None,
         icon_color_func: Callable | None = None,  # FIXME: not working :sad_panda:
+        throttle: SensorThrottle | None = None,
     ) -> None:
         """Initialize the sensor class."""
         CtekEntity.__init__(
@@ -187,6 +341,50 @@ class CtekSensor(CtekEntity, SensorEntity):
         )
 
         SensorEntity.__init__(self)
+        self._throttle = throttle
+
+    async def async_added_to_hass(self) -> None:
+        """Register cleanup of a pending throttled write."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._cancel_pending_flush)
+
+    def _cancel_pending_flush(self) -> None:
+        if self._cancel_flush is not None:
+            self._cancel_flush()
+            self._cancel_flush = None
+
+    async def _async_flush(self, _now: datetime) -> None:
+        """Write the latest value dropped by the throttle."""
+        self._cancel_flush = None
+        self._flushing = True
+        try:
+            self._handle_coordinator_update()
+        finally:
+            self._flushing = False
+
+    def _throttle_allows(self, val: object) -> bool:
+        """Check the throttle and schedule a delayed write if needed."""
+        if self._throttle is None or (
+            self._last_written is not None and self._last_written[0] != self.available
+        ):
+            return True
+        if self._flushing:
+            return self._throttle.flush(val, now=time.monotonic())
+        session_active = bool(
+            self.coordinator.get_property("charging_session.ongoing_transaction")
+        )
+        if self._throttle.should_write(
+            val, now=time.monotonic(), session_active=session_active
+        ):
+            self._cancel_pending_flush()
+            return True
+        self.coordinator.throttled_writes[self._counter_key] += 1
+        retry_in = self._throttle.retry_in
+        if retry_in is not None and self._cancel_flush is None and self.hass:
+            self._cancel_flush = async_call_later(
+                self.hass, retry_in, self._async_flush
+            )
+        return False
 
     @callback
     def _handle_coordinator_update(self) -> None:
@@ -209,6 +407,9 @@ class CtekSensor(CtekEntity, SensorEntity):
             except OverflowError:
                 val = None
 
+        if not self._throttle_allows(val):
+            return
+
         self._attr_native_value = val
 
-        self.schedule_update_ha_state()
+        self._write_state_if_changed(val)
@@ -0,0 +1,168 @@
+"""Summaries of the completed charging sessions, indexed by start time."""
+
+from __future__ import annotations
+
+import bisect
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import BASE_LOGGER
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+    from .history import SessionCurve
+
+LOGGER = BASE_LOGGER.getChild("sessions")
+
+MAX_SESSIONS = 5000  # per charger, the oldest are dropped
+
+
+@dataclass(frozen=True)
+class SessionSummary:
+    """A completed charging session."""
+
+    transaction_id: int | None
+    connector_id: int
+    start: float  # timestamp
+    end: float
+    kwh: float
+    peak_power: float  # W
+    average_power: float
+
+    @classmethod
+    def from_curve(
+        cls, connector_id: int, curve: SessionCurve
+    ) -> SessionSummary | None:
+        """Summarise the curve of an ended session, None if it has no samples."""
+        samples = curve.samples()
+        timestamps = [row[0] for row in samples if row[0] is not None]
+        if not timestamps:
+            return None
+        start, end = timestamps[0], timestamps[-1]
+        powers = [row[1] for row in samples if row[1] is not None]
+        wh = max((row[4] for row in samples if row[4] is not None), default=0.0)
+        hours = (end - start) / 3600
+        if hours > 0:
+            average = wh / hours
+        else:
+            average = sum(powers) / len(powers) if powers else 0.0
+        return cls(
+            transaction_id=curve.transaction_id,
+            connector_id=connector_id,
+            start=start,
+            end=end,
+            kwh=round(wh / 1000, 3),
+            peak_power=max(powers, default=0.0),
+            average_power=round(average, 1),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the session for the service response."""
+        return {
+            **asdict(self),
+            "start": dt_util.utc_from_timestamp(self.start).isoformat(),
+            "end": dt_util.utc_from_timestamp(self.end).isoformat(),
+        }
+
+
+class SessionIndex:
+    """Completed sessions sorted by start time.
+
+    A query for a time window finds its first and last session by bisecting the
+    start times, so it takes O(log n + k) for k sessions in the window.
+    """
+
+    def __init__(self, capacity: int = MAX_SESSIONS) -> None:
+        """Initialize an empty index."""
+        self.capacity = capacity
+        self._starts: list[float] = []
+        self._sessions: list[SessionSummary] = []
+        self._keys: set[tuple[int | None, int, float]] = set()
+
+    def __len__(self) -> int:
+        """Return the number of sessions."""
+        return len(self._sessions)
+
+    def add(self, session: SessionSummary) -> bool:
+        """Add a session, return False if it is already there."""
+        key = (session.transaction_id, session.connector_id, session.start)
+        if key in self._keys:
+            return False
+        i = bisect.bisect_right(self._starts, session.start)
+        self._starts.insert(i, session.start)
+        self._sessions.insert(i, session)
+        self._keys.add(key)
+        if len(self._sessions) > self.capacity:
+            del self._starts[0]
+            oldest = self._sessions.pop(0)
+            self._keys.discard(
+                (oldest.transaction_id, oldest.connector_id, oldest.start)
+            )
+        return True
+
+    def query(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        connector_id: int | None = None,
+    ) -> list[SessionSummary]:
+        """Return the sessions starting in `[start, end)`."""
+        lo = 0 if start is None else bisect.bisect_left(self._starts, start.timestamp())
+        hi = (
+            len(self._starts)
+            if end is None
+            else bisect.bisect_left(self._starts, end.timestamp())
+        )
+        return [
+            session
+            for session in self._sessions[lo:hi]
+            if connector_id is None or session.connector_id == connector_id
+        ]
+
+    def as_list(self) -> list[list[Any]]:
+        """Return the sessions to store, as rows to keep the store compact."""
+        return [
+            [
+                s.transaction_id,
+                s.connector_id,
+                s.start,
+                s.end,
+                s.kwh,
+                s.peak_power,
+                s.average_power,
+            ]
+            for s in self._sessions
+        ]
+
+    @classmethod
+    def from_list(cls, rows: list[list[Any]]) -> SessionIndex:
+        """Restore the stored sessions, skipping unusable ones."""
+        index = cls()
+        for row in rows:
+            try:
+                transaction_id, connector_id, *values = row
+                session = SessionSummary(
+                    transaction_id, int(connector_id), *map(float, values)
+                )
+            except (TypeError, ValueError):
+                LOGGER.warning("Ignoring unusable stored session: %s", row)
+                continue
+            index.add(session)
+        return index
+
+
+def aggregate(sessions: list[SessionSummary]) -> dict[str, Any]:
+    """Return the totals of the sessions."""
+    hours = sum(s.end - s.start for s in sessions) / 3600
+    kwh = sum(s.kwh for s in sessions)
+    return {
+        "count": len(sessions),
+        "kwh": round(kwh, 3),
+        "hours": round(hours, 2),
+        "average_power": round(kwh * 1000 / hours, 1) if hours > 0 else None,
+        "peak_power": max((s.peak_power for s in sessions), default=None),
+        "average_kwh": round(kwh / len(sessions), 3) if sessions else None,
+    }
@@ -0,0 +1,218 @@
+"""Energy statistics of the completed charging sessions."""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder import models as recorder_models
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+    statistics_during_period,
+)
+from homeassistant.util import dt as dt_util
+
+from .const import BASE_LOGGER, DOMAIN
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+    from .history import SessionCurve
+
+LOGGER = BASE_LOGGER.getChild("statistics")
+
+HOUR = timedelta(hours=1)
+# Imported transactions remembered, to not import a session twice
+IMPORTED_MEMORY = 50
+
+
+def _hour(timestamp: float) -> datetime:
+    return dt_util.utc_from_timestamp(timestamp).replace(
+        minute=0, second=0, microsecond=0
+    )
+
+
+def hourly_energy(curve: SessionCurve) -> dict[datetime, float]:
+    """Split the energy of a session into clock hours, in Wh.
+
+    The energy between two samples is spread evenly over the time between them.
+    The energy before the first sample is in the hour of the first sample.
+    """
+    points: list[tuple[float, float]] = []
+    for timestamp, *_, wh in curve.samples():
+        if timestamp is None or wh is None:
+            continue
+        # The Wh value only goes backwards by glitches
+        points.append((timestamp, max(wh, points[-1][1] if points else 0.0)))
+    if not points:
+        return {}
+
+    timestamps = [t for t, _ in points]
+
+    def energy_at(timestamp: float) -> float:
+        i = bisect.bisect_right(timestamps, timestamp)
+        if i == 0:
+            return points[0][1]
+        if i == len(points):
+            return points[-1][1]
+        (t0, wh0), (t1, wh1) = points[i - 1], points[i]
+        return wh0 + (wh1 - wh0) * (timestamp - t0) / (t1 - t0)
+
+    first, last = timestamps[0], timestamps[-1]
+    hours: dict[datetime, float] = {}
+    hour = _hour(first)
+    start, previous = first, 0.0
+    while start <= last:
+        end = min((hour + HOUR).timestamp(), last)
+        value = energy_at(end)
+        if value > previous:
+            hours[hour] = value - previous
+        previous = value
+        hour += HOUR
+        start = hour.timestamp()
+    return hours
+
+
+def session_energy(curve: SessionCurve) -> dict[datetime, float]:
+    """Return the energy of a session in the hour it started, in Wh."""
+    samples = [
+        (timestamp, wh)
+        for timestamp, *_, wh in curve.samples()
+        if timestamp is not None and wh is not None
+    ]
+    if not samples:
+        return {}
+    return {_hour(samples[0][0]): max(wh for _, wh in samples)}
+
+
+class SessionStatistics:
+    """Import the energy of completed sessions as external statistics.
+
+    Two statistics are kept per charger: the energy charged per hour, and the
+    energy of each session booked in the hour it started. Both are written in bulk
+    when a session ends, so dashboards do not need to scan the state history.
+    Sessions ending out of order are merged into the rows already imported.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, device_id: str, imported: list[Any] | None = None
+    ) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self.device_id = device_id
+        self.imported: list[Any] = list(imported or [])
+        # An import reads the sums the previous one wrote, so they run one at a time
+        self._lock = asyncio.Lock()
+
+    def statistic_id(self, kind: str) -> str:
+        """Return the id of a statistic of the charger."""
+        return f"{DOMAIN}:{self.device_id.lower()}_{kind}"
+
+    def _metadata(self, kind: str, name: str) -> dict[str, Any]:
+        metadata: dict[str, Any] = {
+            "has_mean": False,
+            "has_sum": True,
+            "name": name,
+            "source": DOMAIN,
+            "statistic_id": self.statistic_id(kind),
+            "unit_of_measurement": "Wh",
+        }
+        # StatisticMeanType was added in 2025.4
+        mean_type = getattr(recorder_models, "StatisticMeanType", None)
+        if mean_type is not None:
+            metadata["mean_type"] = mean_type.NONE
+        return metadata
+
+    async def async_import(self, curves: list[SessionCurve]) -> bool:
+        """Import the sessions not imported yet, return True if there were any."""
+        async with self._lock:
+            return await self._async_import(curves)
+
+    async def _async_import(self, curves: list[SessionCurve]) -> bool:
+        curves = [
+            curve
+            for curve in curves
+            if curve.ended and curve.transaction_id not in self.imported and len(curve)
+        ]
+        if not curves or "recorder" not in self.hass.config.components:
+            return False
+
+        hourly: defaultdict[datetime, float] = defaultdict(float)
+        sessions: defaultdict[datetime, float] = defaultdict(float)
+        for curve in curves:
+            for hour, wh in hourly_energy(curve).items():
+                hourly[hour] += wh
+            for hour, wh in session_energy(curve).items():
+                sessions[hour] += wh
+
+        await self._async_merge("energy", f"{self.device_id} energy", hourly)
+        await self._async_merge(
+            "session_energy", f"{self.device_id} session energy", sessions
+        )
+        self.imported = [
+            *self.imported,
+            *(curve.transaction_id for curve in curves),
+        ][-IMPORTED_MEMORY:]
+        # Until the rows are written, the next import would read the old sums
+        await get_instance(self.hass).async_block_till_done()
+        LOGGER.debug("Imported the statistics of %d sessions", len(curves))
+        return True
+
+    async def _async_merge(
+        self, kind: str, name: str, energy: dict[datetime, float]
+    ) -> None:
+        """Add `energy` per hour to the rows of a statistic, updating the sums."""
+        if not energy:
+            return
+        statistic_id = self.statistic_id(kind)
+        first = min(energy)
+        recorder = get_instance(self.hass)
+        rows = (
+            await recorder.async_add_executor_job(
+                statistics_during_period,
+                self.hass,
+                first,
+                None,
+                {statistic_id},
+                "hour",
+                None,
+                {"state", "sum"},
+            )
+        ).get(statistic_id, [])
+        if rows:
+            # The state of a row is its energy, so its sum less the state is the
+            # sum before it
+            base = (rows[0].get("sum") or 0.0) - (rows[0].get("state") or 0.0)
+        else:
+            last = (
+                await recorder.async_add_executor_job(
+                    get_last_statistics,
+                    self.hass,
+                    1,
+                    statistic_id,
+                    True,  # noqa: FBT003
+                    {"sum"},
+                )
+            ).get(statistic_id, [])
+            base = (last[0].get("sum") or 0.0) if last else 0.0
+
+        merged = defaultdict(float, energy)
+        for row in rows:
+            merged[dt_util.utc_from_timestamp(row["start"])] += row.get("state") or 0.0
+        statistics = []
+        total = base
+        for hour in sorted(merged):
+            total += merged[hour]
+            statistics.append(
+                {"start": hour, "state": round(merged[hour], 1), "sum": round(total, 1)}
+            )
+        async_add_external_statistics(
+            self.hass,
+            self._metadata(kind, name),  # type: ignore[arg-type]
+            statistics,  # type: ignore[arg-type]
+        )
@@ -15,6 +15,8 @@ from .entity import CtekEntity, callback
 from .enums import ChargeStateEnum
 
 if TYPE_CHECKING:
+    from collections.abc import Mapping
+
     from homeassistant.core import HomeAssistant
     from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
@@ -62,7 +64,9 @@ async def async_setup_entry(
                     ),
                     device_id=entry.data["device_id"],
                     connector_id=e,
-                    config_as_extra_attributes=True,
+                    config_as_extra_attributes=entry.options.get(
+                        "configs_as_attributes", False
+                    ),
                 )
                 for e in range(
                     1, entry.runtime_data.coordinator.data["number_of_connectors"] + 1
@@ -129,13 +133,14 @@ class CtekSwitch(CtekEntity, SwitchEntity):
             val,
         )
         self._attr_is_on = val
-        self.schedule_update_ha_state()
+        self._write_state_if_changed(val)
 
 
 class CtekConnectorSwitch(CtekSwitch):
     """Overrides for handling the connector charging."""
 
     _previous_state: ChargeStateEnum | None = None
+    _cached_configs: list[ConfigsType] | None = None
 
     def __init__(
         self,
@@ -187,17 +192,22 @@ class CtekConnectorSwitch(CtekSwitch):
             state,
         )
         self._previous_state = state
-        self.schedule_update_ha_state()
+        self._write_state_if_changed(state)
 
     @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the extra state attributes."""
-        attrs: dict[str, Any] = self._attr_extra_state_attributes
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return the extra state attributes.
+
+        The attributes are only rebuilt when the coordinator has fetched a new
+        configs list.
+        """
         if self._configs:
             confs: list[ConfigsType] = self.coordinator.data["configs"]
-            for c in confs:
-                key = c.get("key")
-                value = c.get("value")
-                if key is not None and value is not None:
-                    attrs[key] = value
-        return attrs
+            if confs is not self._cached_configs:
+                self._cached_configs = confs
+                self._attr_extra_state_attributes = {
+                    c["key"]: c["value"]
+                    for c in confs
+                    if c.get("key") is not None and c.get("value") is not None
+                }
+        return super().extra_state_attributes
@@ -0,0 +1,112 @@
+"""State write throttling for fast-changing sensors."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from homeassistant.config_entries import ConfigEntry
+
+THROTTLED_SENSORS = ("voltage", "current", "power")
+# Seconds before a reading dropped as insignificant is written anyway, in case no
+# later reading replaces it
+FLUSH_DELAY = 60.0
+
+
+def throttle_option(name: str, setting: str) -> str:
+    """Return the options key for a throttle setting of a sensor."""
+    return f"throttle_{name}_{setting}"
+
+
+def _as_float(val: Any) -> float | None:
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+
+class SensorThrottle:
+    """Decide whether a new reading is worth a state write.
+
+    A reading is written when at least `min_interval` seconds have passed since
+    the previous write and it differs from the previously written value by at
+    least the absolute or the relative threshold. Every reading is written unless
+    `enable_throttling` is set. The settings are read from the config entry options
+    on every call, so option changes apply immediately.
+    """
+
+    def __init__(self, entry: ConfigEntry, name: str) -> None:
+        """Initialize the throttle."""
+        self._entry = entry
+        self.name = name
+        self._last_value: float | None = None
+        self._last_write: float | None = None
+        self._session_active = False
+        self.retry_in: float | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Return True if throttling is enabled in the options."""
+        return bool(self._entry.options.get("enable_throttling", False))
+
+    def _setting(self, setting: str) -> float:
+        val = _as_float(self._entry.options.get(throttle_option(self.name, setting)))
+        return val if val is not None and val > 0 else 0.0
+
+    def _significant(self, value: float) -> bool:
+        if self._last_value is None:
+            return True
+        delta = abs(value - self._last_value)
+        abs_threshold = self._setting("abs_threshold")
+        rel_threshold = self._setting("rel_threshold")
+        if abs_threshold == 0 and rel_threshold == 0:
+            return delta > 0
+        return (abs_threshold > 0 and delta >= abs_threshold) or (
+            rel_threshold > 0 and delta >= abs(self._last_value) * rel_threshold / 100
+        )
+
+    def should_write(self, value: Any, *, now: float, session_active: bool) -> bool:
+        """Check if `value` should be written at monotonic time `now`.
+
+        The value is always written when the charging session just ended, so the
+        final reading is never lost. If the value is dropped, `retry_in` holds the
+        seconds until it should be written with `flush` unless a later reading is
+        written first: when the interval has passed for a significant value, or
+        after `FLUSH_DELAY` for an insignificant change.
+        """
+        self.retry_in = None
+        session_ended = self._session_active and not session_active
+        self._session_active = session_active
+        number = _as_float(value)
+
+        if (
+            not self.enabled
+            or session_ended
+            or number is None
+            or self._last_write is None
+        ):
+            return self._accept(number, now)
+
+        wait = self._last_write + self._setting("min_interval") - now
+        if not self._significant(number):
+            if number != self._last_value:
+                self.retry_in = max(wait, FLUSH_DELAY)
+            return False
+
+        if wait > 0:
+            self.retry_in = wait
+            return False
+
+        return self._accept(number, now)
+
+    def flush(self, value: Any, *, now: float) -> bool:
+        """Check if a dropped `value` should be written now that its flush is due."""
+        number = _as_float(value)
+        if number is not None and number == self._last_value:
+            return False
+        return self._accept(number, now)
+
+    def _accept(self, number: float | None, now: float) -> bool:
+        self._last_value = number
+        self._last_write = now
+        return True
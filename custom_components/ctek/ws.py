@@ -87,6 +87,9 @@ class WebSocketClient:
                     msg = await websocket.receive()
 
                     if msg.type == aiohttp.WSMsgType.TEXT:
+                        recorder = self.entry.runtime_data.client.recorder
+                        if recorder is not None:
+                            recorder.record_ws(msg.data)
                         try:
                             await self.callback(message=msg.data)
                         except Exception:
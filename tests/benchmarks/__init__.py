@@ -0,0 +1 @@
+"""Benchmarks for the parser and coordinator hot paths."""
@@ -0,0 +1,73 @@
+"""Realistic and synthetic payloads for the benchmarks."""
+
+from __future__ import annotations
+
+import itertools
+import json
+from typing import Any
+
+from tests.fake_cloud import (
+    DEVICE_ID,
+    charging_session_frame,
+    connector_status_frame,
+    make_configurations,
+    make_device,
+)
+
+FLEET_SIZE = 100
+BURST_SIZE = 1000
+
+CONNECTOR_STATUSES = ("Preparing", "Charging", "SuspendedEV", "Finishing")
+
+
+def device_list(count: int = 1) -> list[dict[str, Any]]:
+    """Return a device list with `count` two-connector devices.
+
+    The benchmarked device is the last one, the worst case for the lookups.
+    """
+    devices = [make_device(f"other{i:03d}", connectors=2) for i in range(count - 1)]
+    devices.append(make_device(DEVICE_ID, connectors=2))
+    return devices
+
+
+def ws_burst(count: int = BURST_SIZE) -> list[str]:
+    """Return a burst of WebSocket frames as received from the socket.
+
+    Mostly session summaries, with a connector status change every tenth frame.
+    """
+    statuses = itertools.cycle(CONNECTOR_STATUSES)
+    frames = []
+    for i in range(count):
+        if i % 10 == 9:
+            frame = connector_status_frame(1 + i % 2, next(statuses))
+        else:
+            frame = charging_session_frame(power=3000 + i % 700, wh=i)
+        frames.append(json.dumps(frame))
+    return frames
+
+
+def instruction_response() -> dict[str, Any]:
+    """Return the data of a control instruction response."""
+    return {
+        "device_id": DEVICE_ID,
+        "information": {},
+        "instruction": {
+            "connector_id": 1,
+            "device_id": DEVICE_ID,
+            "id": 12345,
+            "info": {
+                "firmware": None,
+                "id": None,
+                "key": None,
+                "units": None,
+                "value": None,
+            },
+            "instruction": "START_TRANSACTION",
+        },
+        "accepted": True,
+    }
+
+
+def configurations() -> list[dict[str, Any]]:
+    """Return the configurations of the benchmarked device."""
+    return make_configurations()
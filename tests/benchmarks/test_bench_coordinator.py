@@ -0,0 +1,66 @@
+"""Benchmarks for the coordinator hot paths."""
+
+from datetime import timedelta
+
+import pytest
+from homeassistant.const import CONF_DEVICE_ID
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ctek.const import DOMAIN
+from custom_components.ctek.coordinator import CtekDataUpdateCoordinator
+from custom_components.ctek.parser import parse_data
+from tests.fake_cloud import DEVICE_ID
+
+from .payloads import configurations, device_list, ws_burst
+
+pytest.importorskip("pytest_benchmark")
+
+# A mix of the keys the entities read on every coordinator update
+PROPERTY_KEYS = (
+    "device_status.connected",
+    "device_status.connectors.1.current_status",
+    "device_status.connectors.2.status_reason",
+    "charging_session.momentary_power",
+    "charging_session.watt_hours_consumed",
+    "configs.LightIntensity",
+    "configs.MeterValueSampleInterval",
+    "attribute.cable_connected.1",
+    "firmware_update.update_available",
+    "device_alias",
+)
+
+
+@pytest.fixture
+def coordinator(hass):
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_DEVICE_ID: DEVICE_ID})
+    entry.add_to_hass(hass)
+    coordinator = CtekDataUpdateCoordinator(
+        hass=hass, config_entry=entry, update_interval=timedelta(minutes=60)
+    )
+    coordinator.data = parse_data(None, DEVICE_ID, device_list())
+    coordinator.data["configs"] = configurations()
+    # Start a session, so the charging session keys resolve
+    coordinator.handle_ws_message(ws_burst(1)[0])
+    return coordinator
+
+
+async def test_get_property(benchmark, coordinator):
+    def read_all() -> None:
+        for key in PROPERTY_KEYS:
+            coordinator.get_property(key)
+
+    benchmark(read_all)
+
+    assert coordinator.get_property("configs.LightIntensity") == "80"
+
+
+async def test_ws_message_burst(benchmark, coordinator):
+    frames = ws_burst()
+
+    def burst() -> None:
+        for frame in frames:
+            coordinator.handle_ws_message(frame)
+
+    benchmark(burst)
+
+    assert coordinator.data["charging_session"]["watt_hours_consumed"] == 998
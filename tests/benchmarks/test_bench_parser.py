@@ -0,0 +1,55 @@
+"""Benchmarks for the message parser."""
+
+import json
+
+import pytest
+
+from custom_components.ctek.parser import (
+    parse_connectors,
+    parse_data,
+    parse_instruction_response,
+    parse_ws_message,
+)
+from tests.fake_cloud import DEVICE_ID
+
+from .payloads import FLEET_SIZE, device_list, instruction_response, ws_burst
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_parse_connectors(benchmark):
+    connectors = device_list()[0]["device_status"]["connectors"]
+
+    result = benchmark(parse_connectors, connectors)
+
+    assert len(result) == 2
+
+
+@pytest.mark.parametrize("count", [1, FLEET_SIZE], ids=["single", "fleet"])
+def test_parse_data(benchmark, count):
+    devices = device_list(count)
+
+    result = benchmark(parse_data, None, DEVICE_ID, devices)
+
+    assert result["device_id"] == DEVICE_ID
+
+
+def test_parse_ws_burst(benchmark):
+    frames = [json.loads(frame) for frame in ws_burst()]
+    data = parse_data(None, DEVICE_ID, device_list())
+
+    def burst() -> None:
+        for frame in frames:
+            parse_ws_message(frame, DEVICE_ID, data)
+
+    benchmark(burst)
+
+    assert data["charging_session"] is not None
+
+
+def test_parse_instruction_response(benchmark):
+    res = instruction_response()
+
+    result = benchmark(parse_instruction_response, res)
+
+    assert result["instruction"]["instruction"] == "START_TRANSACTION"
@@ -4,6 +4,8 @@ import logging
 
 import pytest
 
+from .fake_cloud import FakeCtekCloud
+
 pytest_plugins = "pytest_homeassistant_custom_component"
 
 disable_loggers = ["homeassistant.loader"]
@@ -20,3 +22,10 @@ def pytest_configure() -> None:
     """Disable some loggers to avoid extra output on tests."""
     for logger in disable_loggers:
         logging.getLogger(logger).disabled = True
+
+
+@pytest.fixture
+async def cloud(socket_enabled):
+    """Run a fake CTEK cloud on a local port."""
+    async with FakeCtekCloud() as cloud:
+        yield cloud
@@ -0,0 +1,369 @@
+"""A local fake of the CTEK cloud, serving REST and WebSocket endpoints.
+
+Point `CtekApiClient(base_url=...)` (or the `api_host` config entry data key) at
+`FakeCtekCloud.base_url` to exercise the real client, coordinator and
+WebSocket code without network access.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import copy
+import itertools
+import json
+from typing import TYPE_CHECKING, Any, Self
+
+from aiohttp import WSMsgType, web
+from aiohttp.test_utils import TestServer
+
+from custom_components.ctek.const import (
+    CONFIGURATION_PATH,
+    CONFIGURATIONS_PATH,
+    CONTROL_PATH,
+    DEVICE_LIST_PATH,
+    OAUTH2_TOKEN_PATH,
+    WS_PATH,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+DEVICE_ID = "test_device"
+
+
+def make_device(device_id: str = DEVICE_ID, connectors: int = 1) -> dict[str, Any]:
+    """Return a device as listed by the device list endpoint."""
+    return {
+        "device_id": device_id,
+        "device_alias": f"Charger {device_id}",
+        "device_type": "HOME",
+        "hardware_id": "HW123",
+        "firmware_id": "FW123",
+        "model": "Chargestorm Connected 3",
+        "standardized_model": "CCS3",
+        "number_of_connectors": connectors,
+        "firmware_version": "1.0.0",
+        "device_status": {
+            "connected": True,
+            "connectors": [
+                {
+                    "id": str(i),
+                    "current_status": "Available",
+                    "status_reason": "NoError",
+                    "start_date": "2025-01-20T12:00:00Z",
+                    "update_date": "2025-01-20T12:00:00Z",
+                }
+                for i in range(1, connectors + 1)
+            ],
+            "load_balancing_onboarded": False,
+            "third_party_ocpp_status": {"external_ocpp": False},
+        },
+        "firmware_update": {"update_available": False},
+        "has_schedules": False,
+        "device_info": {"mac_address": "00:11:22:33:44:55", "passkey": "123456"},
+        "owner": True,
+    }
+
+
+def make_configurations() -> list[dict[str, Any]]:
+    """Return the configurations of a device."""
+    return [
+        {"key": "AuthMode", "value": "false", "read_only": False},
+        {"key": "CurrentAssignment", "value": "16", "read_only": True},
+        {"key": "CurrentMaxAssignment", "value": "16", "read_only": False},
+        {"key": "LightIntensity", "value": "80", "read_only": False},
+        {"key": "MeterValueSampleInterval", "value": "60", "read_only": False},
+    ]
+
+
+def connector_status_frame(connector_id: int, status: str) -> dict[str, Any]:
+    """Return a `connectorStatus` WebSocket frame."""
+    return {
+        "type": "connectorStatus",
+        "id": str(connector_id),
+        "status": status,
+        "statusReason": "NoError",
+        "startDate": "2025-01-20T12:00:00Z",
+        "updateDate": "2025-01-20T12:05:00Z",
+    }
+
+
+def charging_session_frame(
+    device_id: str = DEVICE_ID, *, power: float = 3700, wh: int = 1000
+) -> dict[str, Any]:
+    """Return a `chargingSessionSummary` WebSocket frame."""
+    return {
+        "type": "chargingSessionSummary",
+        "device_id": device_id,
+        "transaction_id": "1",
+        "device_online": True,
+        "last_update_time": "2025-01-20T12:05:00Z",
+        "momentary_current": round(power / 230, 2),
+        "momentary_power": power,
+        "momentary_voltage": 230.0,
+        "ongoing_transaction": True,
+        "start_time": "2025-01-20T12:00:00Z",
+        "watt_hours_consumed": wh,
+    }
+
+
+# Frames pushed after a control instruction, like the real cloud does
+INSTRUCTION_STATUS = {
+    "START_TRANSACTION": "Charging",
+    "RESUME_CHARGING": "Charging",
+    "PAUSE_CHARGING": "SuspendedEVSE",
+    "RESUME_SCHEDULE": "SuspendedEVSE",
+}
+
+
+class FakeCtekCloud:
+    """Scriptable fake of the CTEK cloud.
+
+    Attributes:
+        devices: Devices returned by the device list endpoint.
+        configurations: Configurations per device id.
+        latency: Seconds added to every response, or a dict of path to seconds.
+        requests: Log of `(method, path)` for every request served.
+        push_on_control: Push a `connectorStatus` frame after control commands.
+
+    """
+
+    def __init__(self, devices: list[dict[str, Any]] | None = None) -> None:
+        """Initialize the fake cloud."""
+        self.devices = devices if devices is not None else [make_device()]
+        self.configurations: dict[str, list[dict[str, Any]]] = {
+            d["device_id"]: make_configurations() for d in self.devices
+        }
+        self.latency: float | dict[str, float] = 0.0
+        self.requests: list[tuple[str, str]] = []
+        # Client address of every request, to tell when connections are reused
+        self.peers: list[tuple[str, int]] = []
+        self.push_on_control = True
+        self.push_delay = 0.0
+        # Last issued tokens. Like the real cloud, earlier logins stay valid.
+        self.access_token = ""
+        self.refresh_token = ""
+        self._access_tokens: set[str] = set()
+        self._refresh_tokens: set[str] = set()
+        self._tokens = itertools.count(1)
+        self._failures: dict[str, list[int]] = {}
+        self._sockets: dict[str, list[web.WebSocketResponse]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._socket_opened = asyncio.Condition()
+        self._server: TestServer | None = None
+
+        self.app = web.Application(middlewares=[self._track_peer])
+        self.app.router.add_post(OAUTH2_TOKEN_PATH, self._token)
+        self.app.router.add_get(DEVICE_LIST_PATH, self._device_list)
+        self.app.router.add_get(CONFIGURATIONS_PATH, self._configurations)
+        self.app.router.add_post(CONFIGURATION_PATH, self._configuration)
+        self.app.router.add_post(CONTROL_PATH, self._control)
+        self.app.router.add_get(WS_PATH + "{device_id}", self._websocket)
+
+    @property
+    def base_url(self) -> str:
+        """Return the base URL of the running server."""
+        if self._server is None:
+            msg = "Fake cloud is not running"
+            raise RuntimeError(msg)
+        return str(self._server.make_url("")).rstrip("/")
+
+    async def start(self) -> str:
+        """Start serving on a free local port and return the base URL."""
+        self._server = TestServer(self.app, host="127.0.0.1")
+        await self._server.start_server()
+        return self.base_url
+
+    async def stop(self) -> None:
+        """Close all WebSockets and stop the server."""
+        for task in self._tasks:
+            task.cancel()
+        for sockets in self._sockets.values():
+            for ws in sockets:
+                with contextlib.suppress(Exception):
+                    await ws.close()
+        if self._server is not None:
+            await self._server.close()
+            self._server = None
+
+    async def __aenter__(self) -> Self:
+        """Start the server."""
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        """Stop the server."""
+        await self.stop()
+
+    def fail_next(self, path: str, status: int = 500, count: int = 1) -> None:
+        """Answer the next `count` requests to `path` with `status`."""
+        self._failures.setdefault(path, []).extend([status] * count)
+
+    def expire_tokens(self) -> None:
+        """Invalidate the access tokens, the refresh tokens stay valid."""
+        self.access_token = ""
+        self._access_tokens.clear()
+
+    def revoke_tokens(self) -> None:
+        """Invalidate all tokens, forcing a password login."""
+        self.access_token = ""
+        self.refresh_token = ""
+        self._access_tokens.clear()
+        self._refresh_tokens.clear()
+
+    def connected(self, device_id: str = DEVICE_ID) -> int:
+        """Return the number of WebSockets open for a device."""
+        return len(self._sockets.get(device_id, []))
+
+    async def wait_connected(self, device_id: str = DEVICE_ID) -> None:
+        """Wait until a WebSocket is open for a device."""
+        async with asyncio.timeout(5), self._socket_opened:
+            await self._socket_opened.wait_for(lambda: self.connected(device_id))
+
+    async def push(self, frame: dict[str, Any], device_id: str = DEVICE_ID) -> None:
+        """Send a frame to all WebSockets of a device."""
+        payload = json.dumps(frame)
+        for ws in list(self._sockets.get(device_id, [])):
+            await ws.send_str(payload)
+
+    @web.middleware
+    async def _track_peer(
+        self, request: web.Request, handler: Callable[[web.Request], Awaitable[Any]]
+    ) -> Any:
+        if request.transport is not None:
+            self.peers.append(request.transport.get_extra_info("peername")[:2])
+        return await handler(request)
+
+    async def _prepare(self, request: web.Request) -> web.Response | None:
+        """Log the request, apply latency and scripted failures."""
+        path = request.path
+        self.requests.append((request.method, path))
+        latency = (
+            self.latency.get(path, 0.0)
+            if isinstance(self.latency, dict)
+            else self.latency
+        )
+        if latency:
+            await asyncio.sleep(latency)
+        if failures := self._failures.get(path):
+            return web.json_response({"error": "scripted"}, status=failures.pop(0))
+        return None
+
+    def _authorized(self, request: web.Request) -> bool:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        return scheme == "Bearer" and token in self._access_tokens
+
+    def _issue_tokens(self) -> web.Response:
+        n = next(self._tokens)
+        self.access_token = f"access-{n}"
+        self.refresh_token = f"refresh-{n}"
+        self._access_tokens.add(self.access_token)
+        self._refresh_tokens.add(self.refresh_token)
+        return web.json_response(
+            {
+                "access_token": self.access_token,
+                "refresh_token": self.refresh_token,
+                "token_type": "bearer",
+                "expires_in": 3600,
+            }
+        )
+
+    async def _token(self, request: web.Request) -> web.Response:
+        if (res := await self._prepare(request)) is not None:
+            return res
+        body = await request.json()
+        if body.get("grant_type") == "refresh_token":
+            if body.get("refresh_token") not in self._refresh_tokens:
+                return web.json_response({"error": "invalid_grant"}, status=401)
+        elif body.get("grant_type") != "password" or not body.get("password"):
+            return web.json_response({"error": "invalid_request"}, status=400)
+        return self._issue_tokens()
+
+    async def _device_list(self, request: web.Request) -> web.Response:
+        if (res := await self._prepare(request)) is not None:
+            return res
+        if not self._authorized(request):
+            return web.json_response({}, status=401)
+        return web.json_response({"data": copy.deepcopy(self.devices)})
+
+    async def _configurations(self, request: web.Request) -> web.Response:
+        if (res := await self._prepare(request)) is not None:
+            return res
+        if not self._authorized(request):
+            return web.json_response({}, status=401)
+        device_id = request.query.get("deviceId", "")
+        return web.json_response(
+            {"data": {"configurations": self.configurations.get(device_id, [])}}
+        )
+
+    async def _configuration(self, request: web.Request) -> web.Response:
+        if (res := await self._prepare(request)) is not None:
+            return res
+        if not self._authorized(request):
+            return web.json_response({}, status=401)
+        device_id = request.query.get("deviceId", "")
+        key = request.query.get("key")
+        for config in self.configurations.get(device_id, []):
+            if config["key"] == key and not config["read_only"]:
+                config["value"] = request.query.get("value")
+                return web.json_response({"data": {"success": True}})
+        return web.json_response({"data": {"success": False}})
+
+    async def _control(self, request: web.Request) -> web.Response:
+        if (res := await self._prepare(request)) is not None:
+            return res
+        if not self._authorized(request):
+            return web.json_response({}, status=401)
+        body = await request.json()
+        device_id = body.get("device_id", "")
+        connector_id = body.get("connector_id", 1)
+        instruction = body.get("instruction")
+        status = INSTRUCTION_STATUS.get(instruction)
+        if self.push_on_control and status is not None:
+            task = asyncio.create_task(
+                self._delayed_push(
+                    connector_status_frame(connector_id, status), device_id
+                )
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return web.json_response(
+            {
+                "data": {
+                    "device_id": device_id,
+                    "information": {},
+                    "instruction": {
+                        "connector_id": connector_id,
+                        "device_id": device_id,
+                        "id": next(self._tokens),
+                        "info": {},
+                        "instruction": instruction,
+                    },
+                    "accepted": True,
+                }
+            }
+        )
+
+    async def _delayed_push(self, frame: dict[str, Any], device_id: str) -> None:
+        await asyncio.sleep(self.push_delay)
+        await self.push(frame, device_id)
+
+    async def _websocket(self, request: web.Request) -> web.StreamResponse:
+        if (res := await self._prepare(request)) is not None:
+            return res
+        if not self._authorized(request):
+            return web.json_response({}, status=401)
+        device_id = request.match_info["device_id"]
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self._sockets.setdefault(device_id, []).append(ws)
+        async with self._socket_opened:
+            self._socket_opened.notify_all()
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self._sockets[device_id].remove(ws)
+        return ws
@@ -0,0 +1,254 @@
+"""Fleet scale load simulator.
+
+Sets up one config entry per simulated charger against the fake CTEK cloud and
+streams `chargingSessionSummary` frames to all of them at a fixed rate, while
+measuring how well the event loop keeps up.
+
+Run it with `scripts/loadsim`, see `LoadSimConfig.from_env` for the settings.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import os
+import resource
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.const import (
+    CONF_DEVICE_ID,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    EVENT_STATE_CHANGED,
+)
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ctek.const import DOMAIN
+
+from .fake_cloud import (
+    FakeCtekCloud,
+    charging_session_frame,
+    make_configurations,
+    make_device,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.core import Event, HomeAssistant
+
+LAG_SAMPLE_INTERVAL = 0.01  # seconds
+DRAIN_TIMEOUT = 30  # seconds
+
+
+@dataclass
+class LoadSimConfig:
+    """Settings of a load simulation run."""
+
+    devices: int = 50
+    rate: float = 1.0  # frames per second per device
+    duration: float = 10.0  # seconds
+    warmup: float = 1.0  # seconds
+
+    @classmethod
+    def from_env(cls) -> LoadSimConfig:
+        """Read the settings from `CTEK_LOADSIM_*` environment variables."""
+        return cls(
+            devices=int(os.environ.get("CTEK_LOADSIM_DEVICES", cls.devices)),
+            rate=float(os.environ.get("CTEK_LOADSIM_RATE", cls.rate)),
+            duration=float(os.environ.get("CTEK_LOADSIM_DURATION", cls.duration)),
+            warmup=float(os.environ.get("CTEK_LOADSIM_WARMUP", cls.warmup)),
+        )
+
+
+class LagMonitor:
+    """Measure event loop lag by timing how late a periodic sleep wakes up."""
+
+    def __init__(self, interval: float = LAG_SAMPLE_INTERVAL) -> None:
+        """Initialize the monitor."""
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+    def start(self) -> None:
+        """Start sampling."""
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def percentiles(self) -> dict[str, float]:
+        """Return the lag percentiles in milliseconds."""
+        if len(self.samples) < 2:
+            return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        q = statistics.quantiles(self.samples, n=100, method="inclusive")
+        return {
+            "p50": round(q[49] * 1000, 3),
+            "p95": round(q[94] * 1000, 3),
+            "p99": round(q[98] * 1000, 3),
+            "max": round(max(self.samples) * 1000, 3),
+        }
+
+
+def _rss_bytes() -> int:
+    """Return the resident set size of this process."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:  # noqa: PTH123
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak instead of current, but better than nothing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def device_ids(count: int) -> list[str]:
+    """Return the ids of the simulated devices."""
+    return [f"sim{i:04d}" for i in range(count)]
+
+
+async def setup_fleet(
+    hass: HomeAssistant, cloud: FakeCtekCloud, count: int
+) -> list[MockConfigEntry]:
+    """Create the devices in the fake cloud and set up one entry per device."""
+    cloud.devices = [make_device(device_id) for device_id in device_ids(count)]
+    cloud.configurations = {
+        d["device_id"]: make_configurations() for d in cloud.devices
+    }
+    entries = []
+    for device_id in device_ids(count):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=3,
+            minor_version=2,
+            # One account per charger, so setup is not held back by the shared
+            # request budget of an account
+            data={
+                CONF_USERNAME: f"sim-{device_id}",
+                CONF_PASSWORD: "sim",
+                CONF_DEVICE_ID: device_id,
+                "client_id": "sim",
+                "client_secret": "sim",
+                "api_host": cloud.base_url,
+            },
+        )
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        entries.append(entry)
+    await hass.async_block_till_done()
+    for device_id in device_ids(count):
+        await cloud.wait_connected(device_id)
+    return entries
+
+
+async def teardown_fleet(hass: HomeAssistant, entries: list[MockConfigEntry]) -> None:
+    """Unload all entries."""
+    for entry in entries:
+        await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def _drive(
+    cloud: FakeCtekCloud, ids: list[str], rate: float, duration: float, wh: list[int]
+) -> int:
+    """Push frames round robin, spreading the devices evenly over each period."""
+    loop = asyncio.get_running_loop()
+    slot = 1 / (rate * len(ids))
+    start = loop.time()
+    sent = 0
+    while (target := start + sent * slot) < start + duration:
+        if (delay := target - loop.time()) > 0:
+            await asyncio.sleep(delay)
+        i = sent % len(ids)
+        wh[i] += 1
+        await cloud.push(
+            charging_session_frame(ids[i], power=3000 + wh[i] % 1000, wh=wh[i]),
+            ids[i],
+        )
+        sent += 1
+    return sent
+
+
+async def _drain(entries: list[MockConfigEntry], wh: list[int]) -> float:
+    """Wait until every coordinator has seen its last frame, return the wait."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    async with asyncio.timeout(DRAIN_TIMEOUT):
+        for entry, expected in zip(entries, wh, strict=True):
+            while True:
+                session = entry.runtime_data.coordinator.data["charging_session"]
+                if session is not None and session["watt_hours_consumed"] >= expected:
+                    break
+                await asyncio.sleep(0.005)
+    return loop.time() - start
+
+
+async def run_load(
+    hass: HomeAssistant, cloud: FakeCtekCloud, config: LoadSimConfig
+) -> dict[str, Any]:
+    """Run a load simulation and return the measurements."""
+    setup_start = time.perf_counter()
+    entries = await setup_fleet(hass, cloud, config.devices)
+    setup_time = time.perf_counter() - setup_start
+    ids = device_ids(config.devices)
+    wh = [0] * config.devices
+
+    state_writes = 0
+
+    def count_write(event: Event) -> None:
+        nonlocal state_writes
+        state_writes += 1
+
+    monitor = LagMonitor()
+    try:
+        # Warm up so the first frames (creating the sessions) are not measured
+        await _drive(cloud, ids, config.rate, config.warmup, wh)
+        await _drain(entries, wh)
+        await hass.async_block_till_done()
+
+        gc.collect()
+        rss_before = _rss_bytes()
+        unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, count_write)
+        monitor.start()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+
+        frames = await _drive(cloud, ids, config.rate, config.duration, wh)
+        drain_time = await _drain(entries, wh)
+        await hass.async_block_till_done()
+
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        await monitor.stop()
+        unsub()
+        gc.collect()
+        rss_after = _rss_bytes()
+    finally:
+        await monitor.stop()
+        await teardown_fleet(hass, entries)
+
+    return {
+        "config": asdict(config),
+        "setup_seconds": round(setup_time, 3),
+        "frames": frames,
+        "frames_per_second": round(frames / wall, 1),
+        "drain_seconds": round(drain_time, 3),
+        # Includes the fake cloud, which runs in the same process
+        "cpu_per_frame_us": round(cpu / frames * 1e6, 1),
+        "cpu_utilization": round(cpu / wall, 3),
+        "loop_lag_ms": monitor.percentiles(),
+        "memory_growth_bytes": rss_after - rss_before,
+        "state_writes": state_writes,
+        "state_writes_per_second": round(state_writes / wall, 1),
+    }
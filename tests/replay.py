@@ -0,0 +1,95 @@
+"""Replay of captured CTEK cloud traffic.
+
+A capture (see `custom_components.ctek.capture`) is replayed by serving its last
+device list and configurations from the fake cloud, so an entry can be set up
+as usual, and then feeding its WebSocket frames straight into the coordinator.
+
+Run it with `scripts/replay`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlsplit
+
+from custom_components.ctek.const import CONFIGURATIONS_PATH, DEVICE_LIST_PATH
+
+if TYPE_CHECKING:
+    from custom_components.ctek.coordinator import CtekDataUpdateCoordinator
+
+    from .fake_cloud import FakeCtekCloud
+
+
+@dataclass
+class Capture:
+    """The parsed contents of a capture file."""
+
+    devices: list[dict[str, Any]] = field(default_factory=list)
+    configurations: dict[str, list[dict[str, Any]]] = field(default_factory=dict)
+    # (seconds since the capture started, frame as received)
+    frames: list[tuple[float, str]] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        """Return the seconds between the first and the last frame."""
+        if not self.frames:
+            return 0.0
+        return self.frames[-1][0] - self.frames[0][0]
+
+
+def parse_capture(lines: list[str]) -> Capture:
+    """Parse the lines of a capture file."""
+    capture = Capture()
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record["kind"] == "ws":
+            raw = record.get("raw") or json.dumps(record["frame"])
+            capture.frames.append((record["t"], raw))
+        elif record["kind"] == "rest" and record.get("response") is not None:
+            parts = urlsplit(record["path"])
+            if parts.path == DEVICE_LIST_PATH:
+                capture.devices = record["response"].get("data", [])
+            elif parts.path == CONFIGURATIONS_PATH:
+                device_id = parse_qs(parts.query).get("deviceId", [""])[0]
+                capture.configurations[device_id] = (
+                    record["response"].get("data", {}).get("configurations", [])
+                )
+    return capture
+
+
+def load_capture(path: str | Path) -> Capture:
+    """Load a capture file."""
+    return parse_capture(Path(path).read_text(encoding="utf-8").splitlines())
+
+
+def prime_cloud(cloud: FakeCtekCloud, capture: Capture) -> None:
+    """Serve the devices and configurations of a capture from the fake cloud."""
+    cloud.devices = capture.devices
+    cloud.configurations = capture.configurations
+
+
+async def replay(
+    coordinator: CtekDataUpdateCoordinator, capture: Capture, speed: float = 0
+) -> int:
+    """Feed the captured frames to the coordinator and return their number.
+
+    With `speed` 1 the frames arrive with their original spacing, with a higher
+    value that much faster. With 0 they are fed as fast as possible, yielding to
+    the event loop between frames like the WebSocket reader does.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    first = capture.frames[0][0] if capture.frames else 0.0
+    for t, frame in capture.frames:
+        if speed > 0 and (delay := start + (t - first) / speed - loop.time()) > 0:
+            await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+        coordinator.handle_ws_message(frame)
+    return len(capture.frames)
@@ -0,0 +1,56 @@
+"""Test the session analytics."""
+
+import math
+
+import pytest
+
+from custom_components.ctek.analytics import analyze
+from custom_components.ctek.history import SessionCurve
+
+
+def session(*samples: tuple[float, float, float]):
+    curve = SessionCurve(1, capacity=1000, interval=1)
+    for seconds, power, current in samples:
+        curve.add(seconds, power=power, current=current)
+    return curve.columns()
+
+
+def test_plateau_then_taper():
+    # 7.4 kW at the 32 A limit for an hour, then tapering for 20 minutes
+    plateau = [(t, 7400, 32) for t in range(0, 3600, 60)]
+    taper = [
+        (3600 + t, 7000 - 250 * (t // 60), 30 - t // 60) for t in range(0, 1260, 60)
+    ]
+    result = analyze(session(*plateau, *taper), current_limit=32)
+
+    assert result["samples"] == 81
+    assert result["peak_power"] == 7400
+    assert 6500 < result["average_power"] < 7400
+    assert result["power_percentiles"]["50"] == 7400
+    assert result["current_limited_seconds"] == 3600
+    assert result["taper"] == {
+        # The first sample below 90% of the plateau
+        "timestamp": 3720,
+        "power": 6500,
+        "plateau_power": 7400,
+    }
+
+
+def test_no_taper_or_power():
+    # A drop at the very end is not a taper
+    result = analyze(
+        session(*[(t, 3700, 16) for t in range(0, 3600, 60)], (3600, 0, 0)), None
+    )
+    assert "taper" not in result
+    assert "current_limited_seconds" not in result
+    assert result["duration"] == 3600
+
+    result = analyze(session((0, math.nan, 16), (60, math.nan, 16)), 16)
+    assert result == {"samples": 2}
+    assert analyze(session(), 16) == {"samples": 0}
+
+
+def test_samples_are_weighted_by_time():
+    result = analyze(session((0, 1000, 5), (3000, 2000, 10), (3600, 1000, 5)), 10)
+    assert result["average_power"] == pytest.approx(1166.7)
+    assert result["current_limited_seconds"] == 600
@@ -8,8 +8,8 @@ from homeassistant.core import HomeAssistant
 
 from custom_components.ctek.api import CtekApiClient
 from custom_components.ctek.const import (
-    CONTROL_URL,
-    OAUTH2_TOKEN_URL,
+    CONTROL_PATH,
+    OAUTH2_TOKEN_PATH,
     CtekApiClientAuthenticationError,
 )
 
@@ -34,7 +34,7 @@ async def test_login(api_client, caplog):
     # Mock the response of the POST request
     with aioresponses() as m:
         m.post(
-            OAUTH2_TOKEN_URL,
+            api_client.url(OAUTH2_TOKEN_PATH),
             payload={
                 "access_token": "new_access_token",
                 "refresh_token": "new_refresh_token",
@@ -56,7 +56,7 @@ async def test_refresh_access_token(api_client):
     # Mock the response of the POST request
     with aioresponses() as m:
         m.post(
-            OAUTH2_TOKEN_URL,
+            api_client.url(OAUTH2_TOKEN_PATH),
             payload={
                 "access_token": "new_access_token1",
                 "refresh_token": "new_refresh_token1",
@@ -101,10 +101,10 @@ async def test_refresh_token_rejected_falls_back_to_password_login(api_client, c
     caplog.set_level(logging.WARNING, logger="custom_components")
     with aioresponses() as m:
         # First call (refresh token attempt) returns 401
-        m.post(OAUTH2_TOKEN_URL, status=401)
+        m.post(api_client.url(OAUTH2_TOKEN_PATH), status=401)
         # Second call (password login) succeeds
         m.post(
-            OAUTH2_TOKEN_URL,
+            api_client.url(OAUTH2_TOKEN_PATH),
             payload={
                 "access_token": "new_access_token",
                 "refresh_token": "new_refresh_token",
@@ -125,10 +125,10 @@ async def test_api_wrapper_retries_with_new_token_on_401(api_client):
     """After a 401, the retry request must use the refreshed token in headers."""
     with aioresponses() as m:
         # First request returns 401
-        m.post(CONTROL_URL, status=401)
+        m.post(api_client.url(CONTROL_PATH), status=401)
         # Token refresh succeeds
         m.post(
-            OAUTH2_TOKEN_URL,
+            api_client.url(OAUTH2_TOKEN_PATH),
             payload={
                 "access_token": "refreshed_token",
                 "refresh_token": "refreshed_refresh_token",
@@ -136,7 +136,7 @@ async def test_api_wrapper_retries_with_new_token_on_401(api_client):
         )
         # Retry with new token succeeds
         m.post(
-            CONTROL_URL,
+            api_client.url(CONTROL_PATH),
             payload={"data": {"instruction_id": "abc", "status": "ok"}},
         )
         async with aiohttp.ClientSession() as s:
@@ -153,8 +153,8 @@ async def test_auth_error_propagates_from_api_wrapper(api_client):
     """CtekApiClientAuthenticationError must not be swallowed as a generic error."""
     with aioresponses() as m:
         # First request 401 triggers refresh, refresh also fails with 401
-        m.post(CONTROL_URL, status=401)
-        m.post(OAUTH2_TOKEN_URL, status=401)
+        m.post(api_client.url(CONTROL_PATH), status=401)
+        m.post(api_client.url(OAUTH2_TOKEN_PATH), status=401)
         async with aiohttp.ClientSession() as s:
             api_client._access_token = "old_token"
             api_client._refresh_token = None
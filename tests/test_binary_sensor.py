@@ -1,5 +1,6 @@
 """Test the Ctek number platform."""
 
+from collections import Counter
 from unittest.mock import Mock, patch
 
 import pytest
@@ -20,6 +21,8 @@ from custom_components.ctek.binary_sensor import (
 def coordinator():
     coordinator = Mock()
     coordinator.get_property.return_value = "80"
+    coordinator.suppressed_writes = Counter()
+    coordinator.restored = False
     coordinator.data = {"model": "mock", "number_of_connectors": 1}
     return coordinator
 
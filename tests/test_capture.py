@@ -0,0 +1,129 @@
+"""Test capturing and replaying the cloud traffic."""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+from homeassistant.const import (
+    CONF_DEVICE_ID,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    EVENT_STATE_CHANGED,
+)
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ctek.capture import REDACTED, capture_path, sanitize
+from custom_components.ctek.const import DOMAIN
+
+from .fake_cloud import DEVICE_ID, charging_session_frame
+from .replay import load_capture, prime_cloud, replay
+
+
+async def _setup_entry(hass, cloud, **options: Any) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        minor_version=2,
+        data={
+            CONF_USERNAME: "test_user",
+            CONF_PASSWORD: "test_pass",
+            CONF_DEVICE_ID: cloud.devices[0]["device_id"],
+            "client_id": "test_id",
+            "client_secret": "test_secret",
+            "api_host": cloud.base_url,
+        },
+        options=options,
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+def test_sanitize():
+    data = {
+        "access_token": "secret",
+        "data": [{"device_id": "a", "device_info": {"mac_address": "00:11"}}],
+    }
+
+    assert sanitize(data) == {
+        "access_token": REDACTED,
+        "data": [{"device_id": "a", "device_info": {"mac_address": REDACTED}}],
+    }
+    assert data["access_token"] == "secret"
+
+
+async def test_capture_and_replay(hass, cloud, tmp_path):
+    hass.config.config_dir = str(tmp_path)
+    entry = await _setup_entry(hass, cloud, capture_traffic=True)
+    await cloud.wait_connected()
+    for wh in range(1, 6):
+        await cloud.push(charging_session_frame(wh=wh))
+    await entry.runtime_data.coordinator.async_refresh()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    path = Path(capture_path(hass, entry.entry_id))
+    text = await hass.async_add_executor_job(path.read_text, "utf-8")
+    assert cloud.access_token not in text
+    assert "test_pass" not in text
+    capture = await hass.async_add_executor_job(load_capture, path)
+    assert [d["device_id"] for d in capture.devices] == [DEVICE_ID]
+    assert capture.configurations[DEVICE_ID]
+    assert len(capture.frames) == 5
+
+    hass.config.config_dir = str(tmp_path / "replay")
+    cloud.devices = []
+    prime_cloud(cloud, capture)
+    entry = await _setup_entry(hass, cloud)
+    coordinator = entry.runtime_data.coordinator
+
+    assert await replay(coordinator, capture) == 5
+    assert coordinator.data["charging_session"]["watt_hours_consumed"] == 5
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+@pytest.mark.skipif(
+    not os.environ.get("CTEK_REPLAY_FILE"), reason="Run through scripts/replay"
+)
+async def test_replay_capture_file(hass, cloud, capsys):
+    """Replay a capture file and report how long processing took."""
+    capture = await hass.async_add_executor_job(
+        load_capture, os.environ["CTEK_REPLAY_FILE"]
+    )
+    speed = float(os.environ.get("CTEK_REPLAY_SPEED", "0"))
+    prime_cloud(cloud, capture)
+    entry = await _setup_entry(hass, cloud)
+    state_writes = 0
+
+    def count_write(event) -> None:
+        nonlocal state_writes
+        state_writes += 1
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, count_write)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    frames = await replay(entry.runtime_data.coordinator, capture, speed)
+    await hass.async_block_till_done()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    unsub()
+    assert await hass.config_entries.async_unload(entry.entry_id)
+
+    with capsys.disabled():
+        print(  # noqa: T201
+            json.dumps(
+                {
+                    "frames": frames,
+                    "speed": speed,
+                    "captured_seconds": round(capture.duration, 3),
+                    "wall_seconds": round(wall, 3),
+                    "cpu_per_frame_us": round(cpu / max(frames, 1) * 1e6, 1),
+                    "state_writes": state_writes,
+                },
+                indent=2,
+            )
+        )
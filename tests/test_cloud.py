@@ -0,0 +1,437 @@
+"""End to end tests against the fake CTEK cloud."""
+
+import asyncio
+
+import aiohttp
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import (
+    ATTR_DEVICE_ID,
+    CONF_DEVICE_ID,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+)
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ctek.api import (
+    GET_RETRIES,
+    CtekApiClient,
+    async_create_session,
+)
+from custom_components.ctek.const import (
+    CONTROL_PATH,
+    DEVICE_LIST_PATH,
+    DOMAIN,
+    OAUTH2_TOKEN_PATH,
+    CtekApiClientCircuitOpenError,
+    CtekApiClientCommunicationError,
+    CtekApiClientError,
+    CtekApiClientRateLimitedError,
+)
+from custom_components.ctek.resilience import FAILURE_THRESHOLD, BreakerState, Priority
+
+from .fake_cloud import (
+    DEVICE_ID,
+    charging_session_frame,
+    make_configurations,
+    make_device,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr("custom_components.ctek.api.RETRY_BACKOFF", 0)
+
+
+@pytest.fixture
+async def api_client(hass, cloud):
+    async with aiohttp.ClientSession() as session:
+        yield CtekApiClient(
+            hass=hass,
+            client_id="test_id",
+            client_secret="test_secret",
+            username="test_user",
+            password="test_pass",
+            app_profile="",
+            user_agent="",
+            session=session,
+            base_url=cloud.base_url,
+        )
+
+
+def test_ws_url():
+    client = CtekApiClient(
+        hass=None,
+        client_id="",
+        client_secret="",
+        username="",
+        password="",
+        app_profile="",
+        user_agent="",
+        session=None,
+    )
+    assert client.ws_url("dev") == (
+        "wss://iot.ctek.com/api/v1/socket/devices/transaction/dev"
+    )
+    client._base_url = "http://127.0.0.1:1234"
+    assert client.ws_url("dev") == (
+        "ws://127.0.0.1:1234/api/v1/socket/devices/transaction/dev"
+    )
+
+
+async def test_login_and_fetch(api_client, cloud):
+    devices = await api_client.list_devices()
+    configs = await api_client.get_configuration(device_id=DEVICE_ID)
+
+    assert devices["data"][0]["device_id"] == DEVICE_ID
+    assert configs["data"]["configurations"][0]["key"] == "AuthMode"
+    assert api_client.get_access_token() == cloud.access_token
+
+
+async def test_expired_token_is_refreshed(api_client, cloud):
+    await api_client.list_devices()
+    cloud.expire_tokens()
+
+    await api_client.list_devices()
+
+    assert api_client.get_access_token() == cloud.access_token
+    assert cloud.requests.count(("GET", DEVICE_LIST_PATH)) == 3
+    metrics = api_client.metrics.as_dict()
+    assert metrics["retries"] == 1
+    assert metrics["token_refreshes"] == 2
+    assert metrics["endpoints"][f"GET {DEVICE_LIST_PATH}"]["statuses"] == {
+        200: 2,
+        401: 1,
+    }
+    assert metrics["bytes_received"] > 0
+
+
+async def test_scripted_failure(api_client, cloud):
+    await api_client.list_devices()
+    cloud.fail_next(DEVICE_LIST_PATH, status=503, count=GET_RETRIES + 1)
+
+    with pytest.raises(CtekApiClientCommunicationError):
+        await api_client.list_devices()
+    assert (await api_client.list_devices())["data"]
+    assert api_client.metrics.exceptions == {"ClientResponseError": 1}
+    assert api_client.metrics.transient_retries == GET_RETRIES
+    assert api_client.metrics.errors == 1
+
+
+async def test_failed_call_is_counted_once(api_client, cloud):
+    await api_client.list_devices()
+    cloud.fail_next(CONTROL_PATH, status=500)
+
+    with pytest.raises(CtekApiClientCommunicationError):
+        await api_client.start_charge(device_id=DEVICE_ID)
+    assert api_client.metrics.errors == 1
+    assert api_client.metrics.as_dict()["endpoints"][f"POST {CONTROL_PATH}"][
+        "statuses"
+    ] == {500: 1}
+
+
+async def test_failed_login_is_counted_once(api_client, cloud):
+    cloud.fail_next(OAUTH2_TOKEN_PATH, status=400)
+
+    with pytest.raises(CtekApiClientError):
+        await api_client.list_devices()
+    assert api_client.metrics.exceptions == {"ClientResponseError": 1}
+
+
+async def test_get_is_retried(api_client, cloud):
+    await api_client.list_devices()
+    cloud.fail_next(DEVICE_LIST_PATH, status=502)
+
+    assert (await api_client.list_devices())["data"]
+    assert api_client.metrics.transient_retries == 1
+
+
+async def test_command_is_not_retried(api_client, cloud):
+    await api_client.list_devices()
+    cloud.fail_next(CONTROL_PATH, status=502)
+
+    with pytest.raises(CtekApiClientCommunicationError):
+        await api_client.start_charge(device_id=DEVICE_ID)
+    assert cloud.requests.count(("POST", CONTROL_PATH)) == 1
+
+
+async def test_circuit_breaker_fails_fast(api_client, cloud):
+    await api_client.list_devices()
+    cloud.fail_next(DEVICE_LIST_PATH, status=503, count=FAILURE_THRESHOLD)
+
+    for _ in range(2):
+        with pytest.raises(CtekApiClientCommunicationError):
+            await api_client.list_devices()
+    assert api_client.breaker.state is BreakerState.open
+
+    served = len(cloud.requests)
+    with pytest.raises(CtekApiClientCircuitOpenError):
+        await api_client.list_devices()
+    assert len(cloud.requests) == served
+
+
+async def test_login_failure_counts_for_the_breaker(api_client, cloud):
+    # No access token yet, the token endpoint is down
+    cloud.fail_next(OAUTH2_TOKEN_PATH, status=503, count=100)
+
+    with pytest.raises(CtekApiClientCommunicationError):
+        await api_client.list_devices()
+    # The GET is retried, each attempt tries to log in again and each failed
+    # login counts once
+    assert cloud.requests.count(("POST", OAUTH2_TOKEN_PATH)) == GET_RETRIES + 1
+    assert api_client.breaker.state is BreakerState.closed
+
+    with pytest.raises(CtekApiClientCommunicationError):
+        await api_client.list_devices()
+    assert cloud.requests.count(("POST", OAUTH2_TOKEN_PATH)) == FAILURE_THRESHOLD
+    assert api_client.breaker.state is BreakerState.open
+
+    served = len(cloud.requests)
+    with pytest.raises(CtekApiClientCircuitOpenError):
+        await api_client.list_devices()
+    assert len(cloud.requests) == served
+
+
+async def test_probe_logs_in_while_half_open(api_client, cloud):
+    for _ in range(FAILURE_THRESHOLD):
+        api_client.breaker.record_failure()
+    api_client.breaker._opened_at -= api_client.breaker._open_timeout
+    assert api_client.breaker.state is BreakerState.half_open
+
+    # The probe has no access token yet, its login is part of the probe
+    assert (await api_client.list_devices())["data"]
+    assert api_client.breaker.state is BreakerState.closed
+
+
+async def test_background_call_over_budget_is_shed(api_client, cloud):
+    await api_client.list_devices()
+    api_client.rate_limiter.read._tokens = 0
+    served = len(cloud.requests)
+    waits = api_client.metrics.as_dict()["queue_waits"]["read"]["count"]
+
+    with pytest.raises(CtekApiClientRateLimitedError):
+        await api_client.list_devices(priority=Priority.low)
+
+    assert len(cloud.requests) == served
+    assert api_client.breaker.state is BreakerState.closed
+    assert api_client.metrics.as_dict()["queue_waits"]["read"]["count"] == waits
+
+
+async def test_control(api_client, cloud):
+    res = await api_client.start_charge(device_id=DEVICE_ID, connector_id=1)
+
+    assert res["instruction"]["instruction"] == "START_TRANSACTION"
+    assert ("POST", CONTROL_PATH) in cloud.requests
+
+
+async def test_dedicated_session_reuses_the_prewarmed_connection(hass, cloud):
+    async with async_create_session() as session:
+        client = CtekApiClient(
+            hass=hass,
+            client_id="test_id",
+            client_secret="test_secret",
+            username="test_user",
+            password="test_pass",
+            app_profile="",
+            user_agent="",
+            session=session,
+            base_url=cloud.base_url,
+        )
+        await client.prewarm()
+        prewarmed = set(cloud.peers)
+
+        await client.list_devices()
+        cloud.expire_tokens()
+        await client.list_devices()
+
+    assert len(prewarmed) == 1
+    assert set(cloud.peers) == prewarmed
+
+
+async def test_prewarm_failure_is_ignored(api_client, cloud):
+    await cloud.stop()
+
+    await api_client.prewarm()
+
+
+async def test_prewarm_is_skipped_while_the_cloud_fails(api_client, cloud):
+    for _ in range(FAILURE_THRESHOLD):
+        api_client.breaker.record_failure()
+
+    await api_client.prewarm()
+    assert cloud.requests == []
+
+
+async def test_setup_entry_with_websocket(hass, cloud):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        minor_version=2,
+        data={
+            CONF_USERNAME: "test_user",
+            CONF_PASSWORD: "test_pass",
+            CONF_DEVICE_ID: DEVICE_ID,
+            "client_id": "test_id",
+            "client_secret": "test_secret",
+            "api_host": cloud.base_url,
+        },
+    )
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.LOADED
+
+    await cloud.wait_connected()
+    await cloud.push(charging_session_frame(power=7400, wh=1234))
+    # The WebSocket reader is a background task, so let it catch up first
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if entry.runtime_data.coordinator.data["charging_session"] is not None:
+            break
+    await hass.async_block_till_done()
+
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_{DEVICE_ID}_charging_session_watt_hours_consumed"
+    )
+    assert entity_id is not None
+    assert hass.states.get(entity_id).state == "1234"
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_{DEVICE_ID}_energy_session_1"
+    )
+    assert hass.states.get(entity_id).state == "1234.0"
+    entity_id = er.async_get(hass).async_get_entity_id(
+        "sensor", DOMAIN, f"{DOMAIN}_{DEVICE_ID}_energy_lifetime_1"
+    )
+    assert float(hass.states.get(entity_id).state) == 1.234
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        "get_session_curve",
+        {ATTR_DEVICE_ID: entry.runtime_data.coordinator.device_entry.id},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["curves"]["1"]["samples"] == [
+        [1737374700.0, 7400.0, 32.17, 230.0, 1234.0]
+    ]
+    response = await hass.services.async_call(
+        DOMAIN,
+        "session_analytics",
+        {ATTR_DEVICE_ID: entry.runtime_data.coordinator.device_entry.id},
+        blocking=True,
+        return_response=True,
+    )
+    assert response["analytics"]["1"]["peak_power"] == 7400
+
+    await cloud.push(
+        {**charging_session_frame(power=0, wh=1234), "ongoing_transaction": False}
+    )
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if len(entry.runtime_data.coordinator.sessions):
+            break
+    response = await hass.services.async_call(
+        DOMAIN,
+        "query_sessions",
+        {
+            ATTR_DEVICE_ID: entry.runtime_data.coordinator.device_entry.id,
+            "start": "2025-01-20 00:00:00",
+        },
+        blocking=True,
+        return_response=True,
+    )
+    assert response["count"] == 1
+    assert response["sessions"][0]["kwh"] == 1.234
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_stop_charge_is_confirmed_by_websocket(hass, cloud):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        minor_version=2,
+        data={
+            CONF_USERNAME: "test_user",
+            CONF_PASSWORD: "test_pass",
+            CONF_DEVICE_ID: DEVICE_ID,
+            "client_id": "test_id",
+            "client_secret": "test_secret",
+            "api_host": cloud.base_url,
+        },
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    await cloud.wait_connected()
+    coordinator = entry.runtime_data.coordinator
+    polls = cloud.requests.count(("GET", DEVICE_LIST_PATH))
+
+    assert await coordinator.stop_charge(1)
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if not coordinator.instructions.pending:
+            break
+
+    assert coordinator.instructions.outcomes == {"confirmed": 1}
+    assert cloud.requests.count(("GET", DEVICE_LIST_PATH)) == polls
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_actions_find_the_charger_of_each_entry(hass, cloud):
+    other = make_device("other_device")
+    other["device_info"]["mac_address"] = "00:11:22:33:44:66"
+    cloud.devices.append(other)
+    cloud.configurations["other_device"] = make_configurations()
+    entries = []
+    for device_id in (DEVICE_ID, "other_device"):
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            version=3,
+            minor_version=2,
+            unique_id=device_id,
+            data={
+                CONF_USERNAME: "test_user",
+                CONF_PASSWORD: "test_pass",
+                CONF_DEVICE_ID: device_id,
+                "client_id": "test_id",
+                "client_secret": "test_secret",
+                "api_host": cloud.base_url,
+            },
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        entries.append(entry)
+    first, second = (entry.runtime_data.coordinator for entry in entries)
+
+    await cloud.wait_connected()
+    await cloud.push(charging_session_frame(power=7400, wh=1234))
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if first.data["charging_session"] is not None:
+            break
+
+    async def curves(coordinator) -> dict:
+        response = await hass.services.async_call(
+            DOMAIN,
+            "get_session_curve",
+            {ATTR_DEVICE_ID: coordinator.device_entry.id},
+            blocking=True,
+            return_response=True,
+        )
+        return response["curves"]
+
+    assert "1" in await curves(first)
+    assert await curves(second) == {}
+
+    # The actions stay registered for the entries still loaded
+    assert await hass.config_entries.async_unload(entries[1].entry_id)
+    await hass.async_block_till_done()
+    assert "1" in await curves(first)
+    assert await hass.config_entries.async_unload(entries[0].entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,201 @@
+"""Test the command queue."""
+
+import asyncio
+
+import pytest
+
+from custom_components.ctek.commands import CommandQueue, ControlLock
+from custom_components.ctek.const import CtekControlTimeoutError
+from custom_components.ctek.resilience import Priority
+
+
+class Charger:
+    """Record the commands sent, blocking until released."""
+
+    def __init__(self) -> None:
+        self.sent = []
+        self.release = asyncio.Event()
+
+    def command(self, name):
+        async def send() -> str:
+            self.sent.append(name)
+            await self.release.wait()
+            return name
+
+        return send
+
+
+async def test_runs_one_at_a_time_user_first():
+    queue = CommandQueue()
+    charger = Charger()
+    first = asyncio.create_task(queue.submit("config", charger.command("config")))
+    await asyncio.sleep(0)
+    background = asyncio.create_task(
+        queue.submit("reboot", charger.command("reboot"), priority=Priority.low)
+    )
+    user = asyncio.create_task(queue.submit("start", charger.command("start")))
+    await asyncio.sleep(0)
+    assert charger.sent == ["config"]
+    assert queue.queued == 2
+
+    charger.release.set()
+
+    assert await asyncio.gather(first, background, user) == [
+        "config",
+        "reboot",
+        "start",
+    ]
+    assert charger.sent == ["config", "start", "reboot"]
+    stats = queue.as_dict()
+    assert stats["wait"]["count"] == 3
+    assert set(stats["run_time"]) == {"config", "reboot", "start"}
+
+
+async def test_contradictory_commands_collapse():
+    queue = CommandQueue()
+    charger = Charger()
+    busy = asyncio.create_task(queue.submit("config", charger.command("config")))
+    await asyncio.sleep(0)
+    start = asyncio.create_task(
+        queue.submit("start", charger.command("start"), group="charge.1")
+    )
+    await asyncio.sleep(0)
+    stop = asyncio.create_task(
+        queue.submit("stop", charger.command("stop"), group="charge.1")
+    )
+
+    assert await start is None
+
+    charger.release.set()
+    assert await stop == "stop"
+    await busy
+    assert charger.sent == ["config", "stop"]
+    assert queue.dropped == {"start": 1}
+
+
+async def test_background_command_does_not_supersede_user_command():
+    queue = CommandQueue()
+    charger = Charger()
+    busy = asyncio.create_task(queue.submit("config", charger.command("config")))
+    await asyncio.sleep(0)
+    stop = asyncio.create_task(
+        queue.submit("stop", charger.command("stop"), group="charge.1")
+    )
+    await asyncio.sleep(0)
+
+    retry = await queue.submit(
+        "start", charger.command("start"), priority=Priority.low, group="charge.1"
+    )
+
+    assert retry is None
+    charger.release.set()
+    await asyncio.gather(busy, stop)
+    assert charger.sent == ["config", "stop"]
+
+
+async def test_cancelled_and_failed_commands_free_the_queue():
+    queue = CommandQueue()
+    charger = Charger()
+    busy = asyncio.create_task(queue.submit("config", charger.command("config")))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(queue.submit("start", charger.command("start")))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert queue.queued == 0
+
+    async def fail() -> None:
+        raise RuntimeError
+
+    failing = asyncio.create_task(queue.submit("fail", fail))
+    charger.release.set()
+    await busy
+    with pytest.raises(RuntimeError):
+        await failing
+
+    assert await queue.submit("stop", charger.command("stop")) == "stop"
+    assert charger.sent == ["config", "stop"]
+
+
+async def test_control_lock_serialises_operations():
+    lock = ControlLock()
+    charger = Charger()
+
+    async def start() -> None:
+        async with lock.hold("start_charge"):
+            await charger.command("config")()
+            # Nested operations of the same task do not wait
+            async with lock.hold("set_config"):
+                await charger.command("start")()
+
+    async def stop() -> None:
+        async with lock.hold("stop_charge"):
+            await charger.command("stop")()
+
+    starting = asyncio.create_task(start())
+    await asyncio.sleep(0)
+    stopping = asyncio.create_task(stop())
+    await asyncio.sleep(0)
+    assert lock.holder == "start_charge"
+    assert lock.as_dict()["waiting"] == 1
+
+    charger.release.set()
+    await asyncio.gather(starting, stopping)
+    assert charger.sent == ["config", "start", "stop"]
+    assert lock.waits.count == 2
+    assert lock.holder is None
+
+
+async def test_control_lock_user_operations_go_first():
+    lock = ControlLock()
+    charger = Charger()
+
+    async def hold(name, priority=Priority.normal) -> None:
+        async with lock.hold(name, priority):
+            await charger.command(name)()
+
+    tasks = [asyncio.create_task(hold("start_charge"))]
+    await asyncio.sleep(0)
+    for name, priority in (
+        ("quirks", Priority.low),
+        ("resend_start_charge", Priority.low),
+        ("stop_charge", Priority.normal),
+    ):
+        tasks.append(asyncio.create_task(hold(name, priority)))
+        await asyncio.sleep(0)
+    assert lock.as_dict()["waiting"] == 3
+
+    charger.release.set()
+    await asyncio.gather(*tasks)
+    assert charger.sent == [
+        "start_charge",
+        "stop_charge",
+        "quirks",
+        "resend_start_charge",
+    ]
+
+
+async def test_control_lock_times_out_and_survives_cancellation():
+    lock = ControlLock(timeout=0.01)
+    charger = Charger()
+
+    async def hold(name) -> None:
+        async with lock.hold(name):
+            await charger.command(name)()
+
+    busy = asyncio.create_task(hold("start_charge"))
+    await asyncio.sleep(0)
+    with pytest.raises(CtekControlTimeoutError, match="start_charge"):
+        await hold("stop_charge")
+    assert lock.timeouts == {"stop_charge": 1}
+
+    waiting = asyncio.create_task(hold("reboot"))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    busy.cancel()
+    await asyncio.gather(busy, waiting, return_exceptions=True)
+
+    charger.release.set()
+    await hold("stop_charge")
+    assert charger.sent == ["start_charge", "stop_charge"]
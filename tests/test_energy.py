@@ -0,0 +1,111 @@
+"""Test the energy derived from the session telemetry."""
+
+from datetime import UTC, datetime
+
+import pytest
+
+from custom_components.ctek.energy import (
+    MAX_GAP,
+    EnergyAccumulator,
+    LifetimeEnergy,
+    SessionEnergy,
+)
+
+
+def test_power_is_integrated_between_cloud_updates():
+    energy = EnergyAccumulator()
+    assert energy.update(1, 0, 3600, 1000) == 1000
+    # Trapezoid of 3600 W -> 7200 W over 10 seconds
+    assert energy.update(1, 10, 7200, 1000) == pytest.approx(1015)
+    assert energy.update(1, 20, 7200, None) == pytest.approx(1035)
+
+    # The cloud value is the new base
+    assert energy.update(1, 30, 7200, 1060) == 1060
+    assert energy.update(1, 40, 7200, 1060) == pytest.approx(1080)
+
+
+def test_value_never_decreases_within_a_session():
+    energy = EnergyAccumulator()
+    energy.update(1, 0, 7200, 1000)
+    assert energy.update(1, 60, 7200, 1000) == pytest.approx(1120)
+    # The cloud is behind the estimate: hold it
+    assert energy.update(1, 70, 7200, 1100) == pytest.approx(1120)
+    assert energy.update(1, 80, 7200, None) == pytest.approx(1120)
+    assert energy.update(1, 90, 7200, None) == pytest.approx(1140)
+
+
+def test_gaps_and_new_transactions():
+    energy = EnergyAccumulator()
+    energy.update(1, 0, 7200, 1000)
+    assert energy.update(1, MAX_GAP + 1, 7200, None) == 1000
+    assert energy.update(1, MAX_GAP + 1, 7200, None) == 1000
+
+    assert energy.update(2, MAX_GAP + 2, 3600, 0) == 0
+    assert energy.transaction_id == 2
+
+
+def test_record_session_summaries():
+    energy = EnergyAccumulator()
+    session = {
+        "ongoing_transaction": True,
+        "transaction_id": 7,
+        "momentary_power": "3600",
+        "watt_hours_consumed": "",
+        "last_updated_time": datetime(2025, 1, 20, 12, tzinfo=UTC),
+    }
+    assert energy.record(session) == 0
+    session["last_updated_time"] = datetime(2025, 1, 20, 12, 1, tzinfo=UTC)
+    assert energy.record(session) == pytest.approx(60)
+
+    assert energy.record({**session, "ongoing_transaction": False}) is None
+    assert energy.value is None
+
+
+def summary(transaction_id, minute, power, wh):
+    return {
+        "ongoing_transaction": True,
+        "transaction_id": transaction_id,
+        "momentary_power": power,
+        "watt_hours_consumed": wh,
+        "last_updated_time": datetime(2025, 1, 20, 12, minute, tzinfo=UTC),
+    }
+
+
+def test_interleaved_transactions_keep_their_sessions():
+    energy = SessionEnergy()
+    assert energy.record(1, summary(7, 0, 3600, 1000)) == 1000
+    assert energy.record(2, summary(8, 0, 7200, 200)) == 200
+    assert energy.record(1, summary(7, 1, 3600, None)) == pytest.approx(1060)
+    assert energy.record(2, summary(8, 1, 7200, None)) == pytest.approx(320)
+    assert energy.value(1) == pytest.approx(1060)
+    assert energy.value(3) is None
+
+    assert energy.record(1, {"ongoing_transaction": False}) is None
+    assert energy.value(1) is None
+    assert energy.value(2) == pytest.approx(320)
+
+
+def test_lifetime_energy_over_transactions_and_restarts():
+    energy = LifetimeEnergy()
+    assert energy.value(1) == 0
+    assert energy.record(1, {"transaction_id": 1, "watt_hours_consumed": 500})
+    assert energy.record(1, {"transaction_id": 1, "watt_hours_consumed": 1500})
+    assert not energy.record(1, {"transaction_id": 1, "watt_hours_consumed": 900})
+    assert not energy.record(1, {"transaction_id": 1, "watt_hours_consumed": None})
+    assert energy.value(1) == 1500
+
+    # Restarted in the middle of the next transaction
+    assert energy.record(1, {"transaction_id": 2, "watt_hours_consumed": 100})
+    energy = LifetimeEnergy.from_dict({**energy.as_dict(), "2": {"total": "x"}})
+    assert energy.value(1) == 1600
+    assert energy.value(2) == 0
+    energy.record(1, {"transaction_id": 2, "watt_hours_consumed": 400})
+    assert energy.value(1) == 1900
+
+    energy.record(1, {"transaction_id": 3, "watt_hours_consumed": 0})
+    assert energy.value(1) == 1900
+    assert energy.as_dict()["1"] == {
+        "total": 1900,
+        "transaction_id": 3,
+        "session_wh": 0,
+    }
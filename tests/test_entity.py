@@ -1,8 +1,9 @@
 """Test the Ctek number platform."""
 
 import logging
+from collections import Counter
 from typing import Any
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import pytest
 
@@ -17,6 +18,8 @@ def coordinator():
     coordinator = Mock()
     coordinator.get_property.return_value = "80"
     coordinator.data = {"model": "mock"}
+    coordinator.suppressed_writes = Counter()
+    coordinator.restored = False
     return coordinator
 
 
@@ -75,3 +78,30 @@ async def test_icon(hass, coordinator, caplog):
         device_id="test_device",
     )
     assert entity2.icon is None
+
+
+async def test_write_state_if_changed(hass, coordinator):
+    """Unchanged values must not be written to the state machine again."""
+    entity = CtekEntity(
+        coordinator=coordinator,
+        entity_description=CtekNumberEntityDescription(
+            key="configs.LightIntensity",
+            translation_key="led_intensity",
+        ),
+        device_id="test_device",
+    )
+
+    with patch.object(entity, "schedule_update_ha_state") as write:
+        entity._write_state_if_changed(80)
+        entity._write_state_if_changed(80)
+        entity._write_state_if_changed(80)
+        assert write.call_count == 1
+        assert entity.suppressed_writes == 2
+
+        entity._write_state_if_changed(81)
+        assert write.call_count == 2
+
+        entity._attr_extra_state_attributes = {"foo": "bar"}
+        entity._write_state_if_changed(81)
+        assert write.call_count == 3
+        assert entity.suppressed_writes == 2
@@ -0,0 +1,97 @@
+"""Test the session telemetry history."""
+
+import math
+from datetime import UTC, datetime
+
+from custom_components.ctek.history import (
+    SessionCurve,
+    SessionHistory,
+    TransactionConnectors,
+)
+
+
+def session(transaction_id=1, power="3700", wh=1000, second=0):
+    return {
+        "ongoing_transaction": True,
+        "transaction_id": transaction_id,
+        "momentary_power": power,
+        "momentary_current": "16.1",
+        "momentary_voltage": "230",
+        "watt_hours_consumed": wh,
+        "last_updated_time": datetime(2025, 1, 20, 12, 0, second, tzinfo=UTC),
+    }
+
+
+def test_close_samples_replace_the_latest():
+    curve = SessionCurve(1, interval=10)
+    for t in (0, 4, 8, 12, 15):
+        curve.add(t, power=t)
+    curve.add(11, power=99)  # Out of order
+    assert [row[:2] for row in curve.samples()] == [[8, 8], [15, 15]]
+
+    curve.add(22, power=22)
+    curve.add(30, power=30)
+    assert [row[0] for row in curve.samples()] == [8, 15, 30]
+    assert curve.samples()[0][2:] == [None, None, None]
+
+
+def test_full_buffer_is_downsampled():
+    curve = SessionCurve(1, capacity=8, interval=1)
+    for t in range(100):
+        curve.add(t, power=t)
+    assert len(curve) <= 8
+    assert curve.interval == 16
+    timestamps = [row[0] for row in curve.samples()]
+    assert timestamps[0] == 0
+    assert timestamps[-1] == 99
+    assert curve.nbytes == len(curve) * 24
+
+
+def test_new_transaction_starts_a_new_curve():
+    history = SessionHistory()
+    history.record(1, session(second=0))
+    history.record(1, session(second=10, power=""))
+    assert history.record(1, {**session(), "ongoing_transaction": False}).ended
+    assert history.record(1, {**session(), "ongoing_transaction": False}) is None
+    samples = history.curve(1).samples()
+    assert len(samples) == 2
+    assert samples[1][1] is None
+    assert samples[1][2:] == [16.1, 230.0, 1000.0]
+
+    assert history.record(1, session(transaction_id=2, second=20)) is None
+    assert history.curve(1).transaction_id == 2
+    ended = history.record(1, session(transaction_id=3, second=30))
+    assert ended.transaction_id == 2
+    assert len(history.curve(1)) == 1
+
+
+def test_restore():
+    history = SessionHistory(capacity=8)
+    for second in range(0, 60, 5):
+        history.record(2, session(second=second, power=str(second)))
+    history.record(1, session())
+
+    restored = SessionHistory.from_dict(
+        {**history.as_dict(), "3": {"samples": []}}, capacity=8
+    )
+    assert restored.as_dict() == history.as_dict()
+    assert restored.curve(3) is None
+    assert restored.stats()["2"]["interval"] == history.curve(2).interval
+    assert not math.isnan(restored.curve(2).samples()[-1][1])
+
+
+def test_transactions_keep_their_connector():
+    routes = TransactionConnectors()
+    assert routes.route(session(1), [1]) == 1
+    # Both connectors charging: the new transaction takes the free one
+    assert routes.route(session(2), [1, 2]) == 2
+    assert routes.route(session(1), [1, 2]) == 1
+    assert routes.latest == 1
+
+    # Connector 2 already shows Finishing when its last summary arrives
+    ended = {**session(2), "ongoing_transaction": False}
+    assert routes.route(ended, [1]) == 2
+    assert routes.route(session(3), [1, 2]) == 2
+    # A new transaction on a connector replaces the one that never ended
+    assert routes.route(session(4), [1]) == 1
+    assert routes.as_dict() == {"1": 1, "2": 2, "3": 2, "4": 1}
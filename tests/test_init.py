@@ -0,0 +1,114 @@
+"""Test the Ctek integration setup."""
+
+import logging
+from datetime import timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.ctek import CtekData, async_migrate_entry, async_reload_entry
+from custom_components.ctek.const import BASE_LOGGER, DOMAIN
+
+
+@pytest.fixture
+def mock_config_entry():
+    """Mock config entry."""
+    entry = Mock()
+    entry.entry_id = "test_entry"
+    entry.data = {"device_id": "test_device_id", "username": "user"}
+    entry.options = {"log_level": "INFO"}
+    entry.runtime_data = CtekData(
+        coordinator=Mock(),
+        client=Mock(recorder=None),
+        integration=Mock(),
+        applied_data=dict(entry.data),
+        applied_options=dict(entry.options),
+    )
+    return entry
+
+
+@pytest.fixture
+def config_entries(hass):
+    with (
+        patch.object(hass.config_entries, "async_reload", AsyncMock()) as reload,
+        patch.object(
+            hass.config_entries, "async_unload_platforms", AsyncMock()
+        ) as unload,
+        patch.object(
+            hass.config_entries, "async_forward_entry_setups", AsyncMock()
+        ) as forward,
+    ):
+        yield Mock(reload=reload, unload=unload, forward=forward)
+
+
+async def test_hot_options_are_applied_in_place(
+    hass, mock_config_entry, config_entries
+):
+    mock_config_entry.options = {
+        "log_level": "DEBUG",
+        "update_interval": 15,
+        "throttle_power_min_interval": 10,
+    }
+
+    await async_reload_entry(hass, mock_config_entry)
+
+    config_entries.reload.assert_not_called()
+    config_entries.unload.assert_not_called()
+    runtime_data = mock_config_entry.runtime_data
+    assert BASE_LOGGER.level == logging.DEBUG
+    assert runtime_data.coordinator.update_interval == timedelta(minutes=15)
+    runtime_data.client.update_app_headers.assert_called_once()
+    assert runtime_data.applied_options == mock_config_entry.options
+    BASE_LOGGER.setLevel(logging.NOTSET)
+
+
+async def test_disabling_quirks_stops_the_running_sequences(
+    hass, mock_config_entry, config_entries
+):
+    mock_config_entry.runtime_data.applied_options = {"enable_quirks": True}
+    quirks = mock_config_entry.runtime_data.coordinator.quirks
+    quirks.connectors = [1, 2]
+    quirks.async_cancel = AsyncMock()
+    mock_config_entry.options = {"enable_quirks": False}
+
+    await async_reload_entry(hass, mock_config_entry)
+
+    config_entries.reload.assert_not_called()
+    assert [c.args for c in quirks.async_cancel.await_args_list] == [(1,), (2,)]
+
+
+async def test_entity_options_reload_platforms(hass, mock_config_entry, config_entries):
+    mock_config_entry.options = {"log_level": "INFO", "configs_as_attributes": True}
+
+    await async_reload_entry(hass, mock_config_entry)
+
+    config_entries.reload.assert_not_called()
+    config_entries.unload.assert_awaited_once()
+    config_entries.forward.assert_awaited_once()
+
+
+async def test_data_change_reloads_entry(hass, mock_config_entry, config_entries):
+    mock_config_entry.data = {"device_id": "other_device", "username": "user"}
+
+    await async_reload_entry(hass, mock_config_entry)
+
+    config_entries.reload.assert_awaited_once_with("test_entry")
+    mock_config_entry.runtime_data.client.update_app_headers.assert_not_called()
+
+
+async def test_migration_keeps_the_config_attributes(hass):
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=3,
+        minor_version=2,
+        data={"device_id": "test_device_id", "user_agent": "ua", "app_profile": "p"},
+        options={"log_level": "INFO"},
+    )
+    entry.add_to_hass(hass)
+
+    assert await async_migrate_entry(hass, entry)
+
+    assert entry.minor_version == 3
+    assert entry.data["user_agent"] == "ua"
+    assert entry.options == {"log_level": "INFO", "configs_as_attributes": True}
@@ -0,0 +1,109 @@
+"""Test the instruction tracker."""
+
+from datetime import timedelta
+
+import pytest
+from homeassistant.util.dt import utcnow
+
+from custom_components.ctek import instructions
+from custom_components.ctek.enums import ChargeStateEnum
+from custom_components.ctek.instructions import (
+    DEFAULT_TIMEOUT,
+    MAX_TIMEOUT,
+    MIN_TIMEOUT,
+    InstructionOutcome,
+    InstructionTracker,
+    instruction_timeout,
+)
+
+
+def response(instruction="PAUSE_CHARGING", connector_id=1, timeout=None):
+    return {
+        "accepted": True,
+        "instruction": {
+            "instruction": instruction,
+            "connector_id": connector_id,
+            "timeout": timeout,
+        },
+    }
+
+
+class Charger:
+    def __init__(self) -> None:
+        self.status = ChargeStateEnum.charging
+        self.polls = 0
+
+    async def poll(self) -> None:
+        self.polls += 1
+
+    def connector_status(self, _connector_id: int) -> ChargeStateEnum:
+        return self.status
+
+
+@pytest.fixture
+def charger():
+    return Charger()
+
+
+@pytest.fixture
+def tracker(charger):
+    return InstructionTracker(poll=charger.poll, status=charger.connector_status)
+
+
+async def test_confirmed_by_status_update(tracker, charger):
+    future = tracker.track(response())
+
+    tracker.handle_status(2, ChargeStateEnum.suspended_evse)
+    tracker.handle_status(1, ChargeStateEnum.charging)
+    assert not future.done()
+    tracker.handle_status(1, ChargeStateEnum.suspended_evse)
+
+    result = await future
+    assert result.outcome is InstructionOutcome.confirmed
+    assert result.status is ChargeStateEnum.suspended_evse
+    assert tracker.pending == 0
+    assert charger.polls == 0
+    assert tracker.as_dict()["outcomes"] == {"confirmed": 1}
+
+
+@pytest.mark.parametrize(
+    ("status", "outcome"),
+    [
+        (ChargeStateEnum.suspended_evse, InstructionOutcome.polled),
+        (ChargeStateEnum.charging, InstructionOutcome.unconfirmed),
+    ],
+)
+async def test_polls_after_timeout(tracker, charger, monkeypatch, status, outcome):
+    monkeypatch.setattr(instructions, "MIN_TIMEOUT", 0)
+    charger.status = status
+
+    result = await tracker.track(response(timeout=0.01))
+
+    assert charger.polls == 1
+    assert result.outcome is outcome
+    assert result.status is status
+
+
+async def test_untracked_instructions(tracker):
+    assert tracker.track(response(instruction="REBOOT")) is None
+    assert tracker.track({**response(), "accepted": False}) is None
+    assert tracker.pending == 0
+
+
+async def test_cancel(tracker):
+    future = tracker.track(response())
+
+    tracker.cancel()
+
+    assert future.cancelled()
+    assert tracker.pending == 0
+
+
+def test_instruction_timeout():
+    assert instruction_timeout(None) == DEFAULT_TIMEOUT
+    assert instruction_timeout("garbage") == DEFAULT_TIMEOUT
+    assert instruction_timeout(20) == 20
+    assert instruction_timeout(0) == MIN_TIMEOUT
+    assert instruction_timeout(3600) == MAX_TIMEOUT
+    expires = (utcnow() + timedelta(seconds=45)).isoformat()
+    assert 40 < instruction_timeout(expires) <= 45
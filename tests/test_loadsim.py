@@ -0,0 +1,26 @@
+"""Load simulator smoke test, and entry point of `scripts/loadsim`."""
+
+import json
+import os
+from pathlib import Path
+
+from .loadsim import LoadSimConfig, run_load
+
+# Small enough to keep the harness itself working as part of the test suite
+SMOKE = LoadSimConfig(devices=3, rate=5, duration=0.5, warmup=0.2)
+
+
+async def test_loadsim(hass, cloud, capsys):
+    config = LoadSimConfig.from_env() if os.environ.get("CTEK_LOADSIM") else SMOKE
+
+    result = await run_load(hass, cloud, config)
+
+    assert result["frames"] > 0
+    assert result["state_writes"] > 0
+    if output := os.environ.get("CTEK_LOADSIM_OUTPUT"):
+        report = json.dumps(result, indent=2)
+        if output == "-":
+            with capsys.disabled():
+                print(report)  # noqa: T201
+        else:
+            await hass.async_add_executor_job(Path(output).write_text, report)
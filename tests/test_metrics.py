@@ -0,0 +1,40 @@
+"""Test the API client metrics."""
+
+import pytest
+
+from custom_components.ctek.metrics import ApiMetrics, LatencyHistogram
+
+
+def test_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.percentile(50) is None
+
+    for seconds in (0.01, 0.02, 0.03, 0.2, 3.0):
+        histogram.observe(seconds)
+
+    assert histogram.count == 5
+    assert histogram.percentile(50) == 0.05
+    assert histogram.percentile(95) == 3.0
+    summary = histogram.as_dict()
+    assert summary["buckets"]["le_25ms"] == 2
+    assert summary["buckets"]["le_5000ms"] == 1
+    assert summary["mean_ms"] == pytest.approx(652.0)
+    assert summary["max_ms"] == 3000.0
+
+
+def test_api_metrics():
+    metrics = ApiMetrics()
+    metrics.observe("GET /list", 0.1)
+    metrics.response("GET /list", 200, 100)
+    metrics.observe("POST /control", 0.2)
+    metrics.response("POST /control", 500, 10)
+    metrics.exceptions["TimeoutError"] += 1
+
+    assert metrics.get("requests") == 2
+    # Error responses are counted by the exception they raise
+    assert metrics.get("errors") == 1
+    assert metrics.get("latency_p95") == 200.0
+    assert metrics.get("unknown") is None
+    summary = metrics.as_dict()
+    assert summary["bytes_received"] == 110
+    assert summary["endpoints"]["POST /control"]["statuses"] == {500: 1}
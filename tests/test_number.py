@@ -1,6 +1,7 @@
 """Test the Ctek number platform."""
 
 import logging
+from collections import Counter
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
@@ -20,6 +21,8 @@ from custom_components.ctek.number import (
 def coordinator():
     coordinator = Mock()
     coordinator.get_property.return_value = "80"
+    coordinator.suppressed_writes = Counter()
+    coordinator.restored = False
     coordinator.data = {"model": "mock"}
     return coordinator
 
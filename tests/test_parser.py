@@ -1,5 +1,6 @@
 """Message parser tests."""
 
+import json
 from copy import deepcopy
 from datetime import datetime
 
@@ -8,7 +9,13 @@ from homeassistant.util.dt import DEFAULT_TIME_ZONE
 
 from custom_components.ctek.data import DataType
 from custom_components.ctek.enums import ChargeStateEnum, StatusReasonEnum
-from custom_components.ctek.parser import parse_connectors, parse_data, parse_ws_message
+from custom_components.ctek.parser import (
+    dump_snapshot,
+    parse_connectors,
+    parse_data,
+    parse_snapshot,
+    parse_ws_message,
+)
 
 
 @pytest.fixture
@@ -205,3 +212,31 @@ def test_parse_ws_message_connector_update(
         result["device_status"]["connectors"]["1"]["status_reason"]
         == StatusReasonEnum.no_error
     )
+
+
+def test_snapshot_round_trip(
+    basic_device_data, connector_status_message_charging, charging_session_message
+):
+    """A snapshot must survive JSON serialization unchanged."""
+    data = parse_data(None, "test_device", [basic_device_data])
+    data = parse_ws_message(connector_status_message_charging, "test_device", data)
+    data = parse_ws_message(charging_session_message, "test_device", data)
+    data["configs"] = [{"key": "AuthMode", "value": "false", "read_only": False}]
+
+    snapshot = json.loads(json.dumps(dump_snapshot(data)))
+    restored = parse_snapshot(snapshot)
+
+    connector = restored["device_status"]["connectors"]["1"]
+    assert connector["current_status"] == ChargeStateEnum.charging
+    assert connector["status_reason"] == StatusReasonEnum.no_error
+    assert isinstance(connector["update_date"], datetime)
+    assert restored["configs"] == data["configs"]
+    assert restored["charging_session"] is not None
+    assert isinstance(restored["charging_session"]["start_time"], datetime)
+    assert restored["charging_session"]["watt_hours_consumed"] == 1000
+    assert restored["device_info"] == data["device_info"]
+
+
+def test_parse_snapshot_malformed():
+    with pytest.raises(KeyError):
+        parse_snapshot({"device_id": "test_device"})
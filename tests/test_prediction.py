@@ -0,0 +1,77 @@
+"""Test the prediction of the session completion."""
+
+from datetime import UTC, datetime
+
+import pytest
+
+from custom_components.ctek.prediction import CompletionPredictor
+
+START = datetime(2025, 1, 20, 22, tzinfo=UTC).timestamp()
+
+
+def summary(transaction_id, seconds, power, wh, *, ongoing=True):
+    return {
+        "transaction_id": transaction_id,
+        "ongoing_transaction": ongoing,
+        "last_updated_time": datetime.fromtimestamp(START + seconds, tz=UTC),
+        "momentary_power": power,
+        "watt_hours_consumed": wh,
+    }
+
+
+def charge(predictor, transaction_id, minutes, power, wh=0.0, start=0):
+    """Charge at `power` for some minutes, return the time and energy after."""
+    for minute in range(start + 1, start + minutes + 1):
+        wh += power / 60
+        predictor.record(1, summary(transaction_id, minute * 60, power, wh))
+    return (start + minutes), wh
+
+
+def test_model_learns_the_session_and_its_taper():
+    predictor = CompletionPredictor()
+    minute, wh = charge(predictor, 1, 60, 7200)
+    # No past sessions to learn from yet
+    assert predictor.remaining(1) is None
+    minute, wh = charge(predictor, 1, 30, 3600, wh, minute)
+    assert predictor.record(1, summary(1, minute * 60, 0, wh, ongoing=False))
+
+    model = predictor.models[1]
+    assert model.sessions == 1
+    assert model.energy == pytest.approx(9000)
+    # The taper is detected from the first sample under the plateau
+    assert model.taper_energy == pytest.approx(1740)
+    assert model.taper_seconds == pytest.approx(1740)
+
+    # 1200 Wh in: the bulk charge at the plateau power, then the taper
+    minute, wh = charge(predictor, 2, 10, 7200)
+    assert predictor.remaining(1) == pytest.approx(3030 + 1740)
+    assert predictor.finish(1) == pytest.approx(START + 600 + 4770)
+
+    # Half of the taper energy charged
+    minute, wh = charge(predictor, 2, 50, 7200, wh, minute)
+    minute, wh = charge(predictor, 2, 15, 3600, wh, minute)
+    assert predictor.remaining(1) == pytest.approx(900)
+
+
+def test_new_transaction_completes_the_previous_session():
+    predictor = CompletionPredictor()
+    charge(predictor, 1, 30, 3600)
+    assert predictor.record(1, summary(2, 3600, 3600, 60))
+    assert predictor.models[1].energy == pytest.approx(1800)
+    assert predictor.models[1].taper_energy == 0
+    # No taper learned: done once the typical energy is charged
+    assert predictor.remaining(1) == pytest.approx((1800 - 60) / 3600 * 3600)
+    assert predictor.remaining(2) is None
+
+
+def test_store_and_restore():
+    predictor = CompletionPredictor()
+    minute, wh = charge(predictor, 1, 60, 7200)
+    minute, wh = charge(predictor, 1, 30, 3600, wh, minute)
+    predictor.record(1, summary(1, minute * 60, 0, wh, ongoing=False))
+    charge(predictor, 2, 10, 7200)
+
+    restored = CompletionPredictor.from_dict(predictor.as_dict())
+    assert restored.models == predictor.models
+    assert restored.remaining(1) == pytest.approx(predictor.remaining(1))
+    assert CompletionPredictor.from_dict({"models": {"1": {"x": 1}}}).models == {}
@@ -0,0 +1,260 @@
+"""Test the car quirks state machine."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from pytest_homeassistant_custom_component.common import async_mock_service
+
+from custom_components.ctek.commands import ControlLock
+from custom_components.ctek.const import CtekApiClientCircuitOpenError
+from custom_components.ctek.enums import ChargeStateEnum
+from custom_components.ctek.quirks import (
+    QUIRKS_DELAY,
+    QUIRKS_TRIES,
+    SETTLE_DELAY,
+    CarQuirks,
+    QuirkStep,
+)
+from custom_components.ctek.resilience import Priority
+
+
+class Coordinator:
+    """The parts of the coordinator the quirks use, recording what they do."""
+
+    def __init__(self, hass, options=None) -> None:
+        self.hass = hass
+        self.config_entry = SimpleNamespace(
+            options={"enable_quirks": True, **(options or {})}
+        )
+        self.status = ChargeStateEnum.preparing
+        self.stored = {}
+        self.scheduled = None
+        self.actions = []
+        self.control_lock = ControlLock(timeout=0.01)
+        self.fail_start = False
+
+    def get_connector_status_sync(self, _connector_id):
+        return self.status
+
+    def get_max_current(self):
+        return 16
+
+    def cancel_delayed_operation(self, *, connector=None, purpose=None):
+        assert (connector, purpose) == (1, "quirks")
+        self.scheduled = None
+
+    async def start_delayed_operation(
+        self, delay, func, *, connector, purpose, **kwargs: Any
+    ):
+        assert (connector, purpose) == (1, "quirks")
+        self.scheduled = delay
+        self.job = (func, kwargs)
+
+    async def set_config(self, name, value, priority=Priority.normal):
+        self.actions.append(("set_config", name, value, priority))
+
+    async def resend_start_charge(self, connector_id):
+        if self.fail_start:
+            raise CtekApiClientCircuitOpenError
+        self.actions.append(("start", connector_id))
+
+    async def send_command(self, command, priority=Priority.normal):
+        self.actions.append((command, priority))
+
+    def stored_quirks(self):
+        return self.stored
+
+    async def async_store_quirks(self, states):
+        self.stored = states
+
+
+@pytest.fixture
+def coordinator(hass):
+    return Coordinator(hass)
+
+
+async def test_charging_update_finishes_at_once(hass, coordinator):
+    quirks = CarQuirks(coordinator)
+    await quirks.async_start(1)
+    assert coordinator.scheduled == QUIRKS_DELAY
+    assert coordinator.stored["1"]["step"] == "start"
+
+    coordinator.status = ChargeStateEnum.charging
+    quirks.handle_status(1, ChargeStateEnum.charging)
+    await hass.async_block_till_done()
+
+    assert coordinator.actions == [
+        ("set_config", "configs.CurrentAssignment", "16", Priority.low)
+    ]
+    assert not quirks.active
+    assert coordinator.stored == {}
+    assert coordinator.scheduled is None
+
+
+async def test_other_updates_settle_first(hass, coordinator):
+    quirks = CarQuirks(coordinator)
+    await quirks.async_start(1)
+
+    quirks.handle_status(2, ChargeStateEnum.suspended_ev)
+    quirks.handle_status(1, ChargeStateEnum.preparing)
+    quirks.handle_status(1, ChargeStateEnum.offline)
+    await hass.async_block_till_done()
+    assert coordinator.scheduled == QUIRKS_DELAY
+
+    quirks.handle_status(1, ChargeStateEnum.suspended_ev)
+    await hass.async_block_till_done()
+    assert coordinator.scheduled == SETTLE_DELAY
+    assert coordinator.actions == []
+
+
+async def test_tries_the_fixes_in_order(hass):
+    coordinator = Coordinator(
+        hass,
+        {
+            "quirks_toggle_switch": "switch.car",
+            "quirks_call_service": [{"action": "car.wake_up"}],
+            "reboot_station_if_start_fails": True,
+        },
+    )
+    toggles = async_mock_service(hass, "homeassistant", "toggle")
+    wake_ups = async_mock_service(hass, "car", "wake_up")
+    quirks = CarQuirks(coordinator)
+    await quirks.async_start(1)
+
+    await quirks.async_check(1)
+    assert coordinator.actions == [("start", 1)]
+    assert quirks.state(1).step is QuirkStep.retry_start
+
+    coordinator.status = ChargeStateEnum.suspended_ev
+    await quirks.async_check(1)
+    assert toggles[0].data == {"entity_id": "switch.car"}
+
+    await quirks.async_check(1)
+    assert len(wake_ups) == 1
+    assert quirks.state(1).tries == 0
+    assert coordinator.stored["1"]["tried"] == ["toggle", "service_action"]
+
+    await quirks.async_check(1)
+    assert not quirks.active
+
+
+async def test_reboot_waits_longer(hass):
+    coordinator = Coordinator(hass, {"reboot_station_if_start_fails": True})
+    coordinator.status = ChargeStateEnum.suspended_ev
+    quirks = CarQuirks(coordinator)
+    await quirks.async_start(1)
+
+    await quirks.async_check(1)
+
+    assert coordinator.actions == [("REBOOT", Priority.low)]
+    assert coordinator.scheduled == 2 * QUIRKS_DELAY
+
+
+async def test_cancel(coordinator):
+    quirks = CarQuirks(coordinator)
+    await quirks.async_start(1)
+
+    await quirks.async_cancel(1)
+
+    assert not quirks.active
+    assert coordinator.stored == {}
+    assert coordinator.scheduled is None
+
+
+async def test_restore_resumes_stored_progress(hass, coordinator):
+    coordinator.stored = {
+        "1": {
+            "connector_id": 1,
+            "step": "toggle",
+            "tries": 1,
+            "tried": ["toggle"],
+            "status": "SuspendedEV",
+            "deadline": time.time() + 30,
+        },
+        "2": {"connector_id": 2},
+    }
+    quirks = CarQuirks(coordinator)
+
+    await quirks.async_restore()
+
+    state = quirks.state(1)
+    assert state.step is QuirkStep.toggle
+    assert state.tries == 1
+    assert quirks.state(2) is None
+    assert SETTLE_DELAY < coordinator.scheduled <= 30
+
+
+async def test_restore_drops_progress_when_disabled(hass, coordinator):
+    coordinator.config_entry.options["enable_quirks"] = False
+    coordinator.stored = {"1": {"connector_id": 1, "tries": QUIRKS_TRIES}}
+    quirks = CarQuirks(coordinator)
+
+    await quirks.async_restore()
+
+    assert not quirks.active
+    assert coordinator.stored == {}
+
+
+async def test_busy_charger_delays_the_check(hass, coordinator):
+    quirks = CarQuirks(coordinator)
+    await quirks.async_start(1)
+    release = asyncio.Event()
+
+    async def stop() -> None:
+        async with coordinator.control_lock.hold("stop_charge"):
+            await release.wait()
+
+    stopping = hass.async_create_task(stop())
+    await asyncio.sleep(0)
+    await quirks.async_check(1)
+    release.set()
+    await stopping
+    assert coordinator.actions == []
+    assert coordinator.scheduled == SETTLE_DELAY
+    assert coordinator.control_lock.timeouts == {"quirks": 1}
+
+
+async def test_failed_step_is_tried_again_later(hass, coordinator):
+    quirks = CarQuirks(coordinator)
+    await quirks.async_start(1)
+    coordinator.fail_start = True
+
+    await quirks.async_check(1)
+    assert coordinator.scheduled == QUIRKS_DELAY
+    assert quirks.state(1).tries == QUIRKS_TRIES - 1
+
+    coordinator.fail_start = False
+    await quirks.async_check(1)
+    assert coordinator.actions == [("start", 1)]
+
+
+async def test_user_stop_overtakes_waiting_quirks(hass, coordinator):
+    coordinator.control_lock = ControlLock()
+    quirks = CarQuirks(coordinator)
+    await quirks.async_start(1)
+    release = asyncio.Event()
+
+    async def start() -> None:
+        async with coordinator.control_lock.hold("start_charge"):
+            await release.wait()
+
+    async def stop() -> None:
+        async with coordinator.control_lock.hold("stop_charge"):
+            await quirks.async_cancel(1)
+            coordinator.actions.append(("stop", 1))
+
+    starting = hass.async_create_task(start())
+    await asyncio.sleep(0)
+    checking = hass.async_create_task(quirks.async_check(1))
+    await asyncio.sleep(0)
+    stopping = hass.async_create_task(stop())
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(starting, checking, stopping)
+
+    # The stop went first, so the quirks do not start the charge again
+    assert coordinator.actions == [("stop", 1)]
+    assert not quirks.active
@@ -0,0 +1,157 @@
+"""Test the circuit breaker and the rate limiter."""
+
+import asyncio
+
+import pytest
+
+from custom_components.ctek.const import (
+    CtekApiClientCircuitOpenError,
+    CtekApiClientRateLimitedError,
+)
+from custom_components.ctek.resilience import (
+    FAILURE_THRESHOLD,
+    OPEN_TIMEOUT,
+    BreakerState,
+    CircuitBreaker,
+    Priority,
+    TokenBucket,
+    get_breaker,
+    get_rate_limiter,
+)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(hass, clock):
+    return CircuitBreaker(hass, clock=clock)
+
+
+def test_opens_after_consecutive_failures(breaker):
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    assert breaker.state is BreakerState.closed
+
+    breaker.record_failure()
+
+    assert breaker.state is BreakerState.open
+    with pytest.raises(CtekApiClientCircuitOpenError):
+        breaker.before_call()
+
+
+async def test_half_open_probe(breaker, clock):
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_failure()
+    clock.now += OPEN_TIMEOUT
+    assert breaker.state is BreakerState.half_open
+    breaker.before_call()
+
+    breaker.record_failure()
+    assert breaker.state is BreakerState.open
+    clock.now += OPEN_TIMEOUT
+    assert breaker.state is BreakerState.open
+    assert breaker.retry_in == OPEN_TIMEOUT
+
+    clock.now += OPEN_TIMEOUT
+    breaker.record_success()
+    assert breaker.state is BreakerState.closed
+
+
+async def test_single_probe_while_half_open(breaker, clock):
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_failure()
+    clock.now += OPEN_TIMEOUT
+
+    async def other_call() -> bool:
+        return breaker.before_call()
+
+    assert breaker.before_call()
+    # The nested calls of the probe, such as a login, go through
+    assert not breaker.before_call()
+    with pytest.raises(CtekApiClientCircuitOpenError):
+        await asyncio.create_task(other_call())
+    # A probe without an outcome lets the next call probe
+    breaker.release_probe()
+    assert await asyncio.create_task(other_call())
+    breaker.record_success()
+    assert not breaker.before_call()
+    assert not await asyncio.create_task(other_call())
+
+
+async def test_state_changes_are_announced(hass, breaker):
+    events = []
+    hass.bus.async_listen("ctek_circuit_breaker", events.append)
+    changes = []
+    remove = breaker.add_listener(lambda: changes.append(breaker.state))
+
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_failure()
+    await hass.async_block_till_done()
+    remove()
+    breaker.record_success()
+    await hass.async_block_till_done()
+
+    assert changes == [BreakerState.open]
+    assert [e.data["state"] for e in events] == ["open", "closed"]
+
+
+async def test_shared_per_account(hass):
+    assert get_breaker(hass, "a") is get_breaker(hass, "a")
+    assert get_breaker(hass, "a") is not get_breaker(hass, "b")
+
+
+async def test_bucket_sheds_low_priority_when_empty(clock):
+    bucket = TokenBucket("read", rate=0.5, capacity=2, clock=clock)
+
+    assert await bucket.acquire(Priority.low) == 0
+    assert await bucket.acquire() == 0
+    with pytest.raises(CtekApiClientRateLimitedError):
+        await bucket.acquire(Priority.low)
+    assert bucket.shed == 1
+
+    clock.now += 2
+    assert await bucket.acquire(Priority.low) == 0
+    assert bucket.tokens == 0
+
+
+async def test_bucket_queues_normal_priority_in_order():
+    bucket = TokenBucket("control", rate=100, capacity=1)
+    await bucket.acquire()
+    order = []
+
+    async def call(n: int) -> float:
+        waited = await bucket.acquire()
+        order.append(n)
+        return waited
+
+    tasks = [asyncio.create_task(call(n)) for n in range(3)]
+    await asyncio.sleep(0)
+    assert bucket.queued == 3
+    # Low priority calls do not jump the queue
+    with pytest.raises(CtekApiClientRateLimitedError):
+        await bucket.acquire(Priority.low)
+
+    waits = await asyncio.gather(*tasks)
+
+    assert order == [0, 1, 2]
+    assert all(w > 0 for w in waits)
+    assert bucket.queued == 0
+
+
+async def test_rate_limiter_shared_per_account(hass):
+    assert get_rate_limiter(hass, "a") is get_rate_limiter(hass, "a")
+    assert get_rate_limiter(hass, "a") is not get_rate_limiter(hass, "b")
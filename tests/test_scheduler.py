@@ -0,0 +1,78 @@
+"""Test the scheduler of delayed operations."""
+
+import asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.ctek.scheduler import JobKey, Scheduler
+
+
+class Recorder:
+    """Record the jobs run."""
+
+    def __init__(self) -> None:
+        self.ran = []
+
+    async def run(self, name):
+        self.ran.append(name)
+
+
+async def test_jobs_of_other_keys_are_kept(hass: HomeAssistant):
+    scheduler = Scheduler(hass)
+    recorder = Recorder()
+    scheduler.schedule(JobKey("dev", 1, "quirks"), 0.01, recorder.run, name="one")
+    scheduler.schedule(JobKey("dev", 2, "quirks"), 0.01, recorder.run, name="two")
+    scheduler.schedule(JobKey("dev", 1, "refresh"), 0.01, recorder.run, name="ref")
+    # Same key replaces
+    scheduler.schedule(JobKey("dev", 1, "quirks"), 0.02, recorder.run, name="new")
+    assert len(scheduler.jobs) == 3
+
+    await asyncio.sleep(0.05)
+    await hass.async_block_till_done()
+    assert sorted(recorder.ran) == ["new", "ref", "two"]
+    assert scheduler.jobs == []
+
+
+async def test_cancel_by_fields(hass: HomeAssistant):
+    scheduler = Scheduler(hass)
+    recorder = Recorder()
+    for key in (
+        JobKey("dev", 1, "quirks"),
+        JobKey("dev", 1, "quirks.prewarm"),
+        JobKey("dev", 2, "quirks"),
+        JobKey("dev", None, "refresh"),
+        JobKey("other", 1, "quirks"),
+    ):
+        scheduler.schedule(key, 60, recorder.run, name=key.purpose)
+
+    assert scheduler.cancel(device_id="dev", connector_id=1, purpose="quirks") == 2
+    assert scheduler.cancel(purpose="quirk") == 0
+    assert scheduler.cancel_job(JobKey("dev", None, "refresh"))
+    assert not scheduler.cancel_job(JobKey("dev", None, "refresh"))
+    assert set(scheduler.jobs) == {
+        JobKey("dev", 2, "quirks"),
+        JobKey("other", 1, "quirks"),
+    }
+
+    assert 59 < scheduler.due_in(JobKey("dev", 2, "quirks")) <= 60
+    assert scheduler.due_in(JobKey("dev", 1, "quirks")) is None
+    assert {job["device_id"] for job in scheduler.as_dict()} == {"dev", "other"}
+
+    scheduler.shutdown()
+    assert scheduler.jobs == []
+
+
+async def test_shutdown_cancels_running_jobs(hass: HomeAssistant):
+    scheduler = Scheduler(hass)
+    started = asyncio.Event()
+
+    async def slow() -> None:
+        started.set()
+        await asyncio.sleep(60)
+
+    scheduler.schedule(JobKey("dev", None, "slow"), 0, slow)
+    await started.wait()
+    (task,) = scheduler._running
+    scheduler.shutdown()
+    await asyncio.sleep(0)
+    assert task.cancelled()
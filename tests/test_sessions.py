@@ -0,0 +1,68 @@
+"""Test the index of completed sessions."""
+
+from datetime import UTC, datetime, timedelta
+
+from custom_components.ctek.history import SessionCurve
+from custom_components.ctek.sessions import SessionIndex, SessionSummary, aggregate
+
+DAY = datetime(2025, 1, 20, tzinfo=UTC)
+
+
+def summary(day, transaction_id=None, connector_id=1, kwh=10.0):
+    start = (DAY + timedelta(days=day)).timestamp()
+    return SessionSummary(
+        transaction_id=day if transaction_id is None else transaction_id,
+        connector_id=connector_id,
+        start=start,
+        end=start + 2 * 3600,
+        kwh=kwh,
+        peak_power=7400,
+        average_power=kwh * 500,
+    )
+
+
+def test_summary_from_curve():
+    curve = SessionCurve(7, interval=1)
+    start = DAY.timestamp()
+    curve.add(start, power=3000, wh=0)
+    curve.add(start + 1800, power=7400, wh=3000)
+    curve.add(start + 3600, power=6000, wh=6000)
+    session = SessionSummary.from_curve(2, curve)
+    assert (session.transaction_id, session.connector_id) == (7, 2)
+    assert (session.kwh, session.peak_power, session.average_power) == (6, 7400, 6000)
+    assert session.as_dict()["end"] == "2025-01-20T01:00:00+00:00"
+    assert SessionSummary.from_curve(1, SessionCurve(8)) is None
+
+
+def test_query_windows():
+    index = SessionIndex()
+    for day in (5, 1, 3, 2, 4):
+        assert index.add(summary(day))
+    assert not index.add(summary(3))
+    index.add(summary(3, transaction_id=33, connector_id=2, kwh=5))
+
+    sessions = index.query(DAY + timedelta(days=2), DAY + timedelta(days=4))
+    assert [s.transaction_id for s in sessions] == [2, 3, 33]
+    assert [s.transaction_id for s in index.query(connector_id=2)] == [33]
+    assert index.query(DAY + timedelta(days=6)) == []
+    assert aggregate(sessions) == {
+        "count": 3,
+        "kwh": 25,
+        "hours": 6,
+        "average_power": 4166.7,
+        "peak_power": 7400,
+        "average_kwh": 8.333,
+    }
+    assert aggregate([])["average_power"] is None
+
+
+def test_store_and_capacity():
+    index = SessionIndex(capacity=3)
+    for day in range(5):
+        index.add(summary(day))
+    assert [s.transaction_id for s in index.query()] == [2, 3, 4]
+    # The oldest sessions can be seen again
+    assert index.add(summary(0))
+
+    restored = SessionIndex.from_list([*index.as_list(), ["x", "y"]])
+    assert restored.as_list() == index.as_list()
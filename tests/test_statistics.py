@@ -0,0 +1,115 @@
+"""Test the session energy statistics."""
+
+import asyncio
+from datetime import UTC, datetime
+
+import pytest
+from homeassistant.components.recorder.statistics import statistics_during_period
+from pytest_homeassistant_custom_component.components.recorder.common import (
+    async_wait_recording_done,
+)
+
+from custom_components.ctek.history import SessionCurve
+from custom_components.ctek.statistics import (
+    SessionStatistics,
+    hourly_energy,
+    session_energy,
+)
+
+START = datetime(2025, 1, 20, 11, 30, tzinfo=UTC)
+
+
+@pytest.fixture(autouse=True)
+def mock_recorder_before_hass(async_test_recorder) -> None:
+    """Prepare the recorder database before Home Assistant is set up."""
+
+
+def curve(transaction_id, *samples: tuple[int, int], start=START):
+    result = SessionCurve(transaction_id, interval=1)
+    for minutes, wh in samples:
+        result.add(start.timestamp() + minutes * 60, wh=wh)
+    result.ended = True
+    return result
+
+
+def hour(h):
+    return datetime(2025, 1, 20, h, tzinfo=UTC)
+
+
+def test_energy_is_split_into_hours():
+    # 100 Wh before the first sample, then 2000 Wh/h from 11:30 to 13:00
+    session = curve(1, (0, 100), (30, 1100), (60, 2100), (90, 3100))
+    assert hourly_energy(session) == {
+        hour(11): pytest.approx(1100),
+        hour(12): pytest.approx(2000),
+    }
+    assert session_energy(session) == {hour(11): 3100}
+    assert hourly_energy(curve(2)) == {}
+
+
+async def test_import_sessions(recorder_mock, hass):
+    statistics = SessionStatistics(hass, "ABC")
+    later = curve(2, (0, 0), (60, 1000), start=datetime(2025, 1, 20, 14, tzinfo=UTC))
+    assert await statistics.async_import([later])
+    await async_wait_recording_done(hass)
+    # An earlier session imported afterwards is merged in, and a session is only
+    # imported once
+    assert await statistics.async_import([curve(1, (0, 0), (60, 2000)), later])
+    await async_wait_recording_done(hass)
+    assert statistics.imported == [2, 1]
+    assert not await statistics.async_import([later])
+
+    rows = await recorder_mock.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        hour(0),
+        None,
+        {"ctek:abc_energy", "ctek:abc_session_energy"},
+        "hour",
+        None,
+        {"state", "sum"},
+    )
+    assert [(r["state"], r["sum"]) for r in rows["ctek:abc_energy"]] == [
+        (1000, 1000),
+        (1000, 2000),
+        (1000, 3000),
+    ]
+    assert [(r["state"], r["sum"]) for r in rows["ctek:abc_session_energy"]] == [
+        (2000, 2000),
+        (1000, 3000),
+    ]
+
+
+async def test_overlapping_imports_run_one_at_a_time(recorder_mock, hass):
+    statistics = SessionStatistics(hass, "ABC")
+    first = curve(1, (0, 0), (60, 2000))
+    second = curve(
+        2, (0, 0), (60, 1000), start=datetime(2025, 1, 20, 12, 30, tzinfo=UTC)
+    )
+
+    assert all(
+        await asyncio.gather(
+            statistics.async_import([first]), statistics.async_import([second])
+        )
+    )
+    await async_wait_recording_done(hass)
+
+    rows = await recorder_mock.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        hour(0),
+        None,
+        {"ctek:abc_energy", "ctek:abc_session_energy"},
+        "hour",
+        None,
+        {"state", "sum"},
+    )
+    assert [(r["state"], r["sum"]) for r in rows["ctek:abc_energy"]] == [
+        (1000, 1000),
+        (1500, 2500),
+        (500, 3000),
+    ]
+    assert [(r["state"], r["sum"]) for r in rows["ctek:abc_session_energy"]] == [
+        (2000, 2000),
+        (1000, 3000),
+    ]
@@ -0,0 +1,78 @@
+"""Test the Ctek switch platform."""
+
+from collections import Counter
+from unittest.mock import Mock
+
+import pytest
+from homeassistant.components.switch import SwitchEntityDescription
+
+from custom_components.ctek import CtekData
+from custom_components.ctek.enums import ChargeStateEnum
+from custom_components.ctek.switch import CtekConnectorSwitch, async_setup_entry
+
+
+@pytest.fixture
+def coordinator():
+    coordinator = Mock()
+    coordinator.suppressed_writes = Counter()
+    coordinator.restored = False
+    coordinator.get_property.return_value = ChargeStateEnum.charging
+    coordinator.data = {
+        "model": "mock",
+        "number_of_connectors": 1,
+        "configs": [
+            {"key": "AuthMode", "value": "false", "read_only": False},
+            {"key": "LightIntensity", "value": "50", "read_only": False},
+        ],
+    }
+    return coordinator
+
+
+@pytest.fixture
+def mock_config_entry(coordinator):
+    """Mock config entry."""
+    entry = Mock()
+    entry.data = {"device_id": "test_device_id"}
+    entry.options = {}
+    entry.runtime_data = CtekData(
+        coordinator=coordinator, client=Mock(), integration=Mock()
+    )
+    return entry
+
+
+def connector_switch(coordinator, *, configs: bool) -> CtekConnectorSwitch:
+    return CtekConnectorSwitch(
+        coordinator=coordinator,
+        entity_description=SwitchEntityDescription(
+            key="device_status.connectors.1.current_status",
+            translation_key="connector_charging",
+        ),
+        device_id="test_device",
+        connector_id=1,
+        config_as_extra_attributes=configs,
+    )
+
+
+async def test_async_setup_entry(hass, mock_config_entry):
+    added_entities = []
+
+    def async_add_entities(entities) -> None:
+        added_entities.extend(entities)
+
+    await async_setup_entry(hass, mock_config_entry, async_add_entities)
+
+    assert len(added_entities) == 2
+    assert added_entities[1].extra_state_attributes == {}
+
+
+async def test_config_attributes_are_cached(hass, coordinator):
+    entity = connector_switch(coordinator, configs=True)
+
+    attrs = entity.extra_state_attributes
+    assert attrs == {"AuthMode": "false", "LightIntensity": "50"}
+    assert entity.extra_state_attributes is attrs
+
+    coordinator.data["configs"] = [
+        {"key": "AuthMode", "value": "true", "read_only": False},
+    ]
+    assert entity.extra_state_attributes == {"AuthMode": "true"}
@@ -0,0 +1,117 @@
+"""Test the sensor state write throttle."""
+
+from unittest.mock import Mock
+
+import pytest
+
+from custom_components.ctek.throttle import (
+    FLUSH_DELAY,
+    SensorThrottle,
+    throttle_option,
+)
+
+
+@pytest.fixture
+def entry():
+    entry = Mock()
+    entry.options = {"enable_throttling": True}
+    return entry
+
+
+def test_unconfigured_throttle_writes_every_change(entry):
+    throttle = SensorThrottle(entry, "power")
+
+    assert throttle.should_write("1000", now=0, session_active=True)
+    assert throttle.should_write("1001", now=0.1, session_active=True)
+    assert not throttle.should_write("1001", now=0.2, session_active=True)
+
+
+def test_disabled_throttle_ignores_the_stored_settings(entry):
+    entry.options = {throttle_option("power", "min_interval"): 10}
+    throttle = SensorThrottle(entry, "power")
+
+    assert throttle.should_write(1000, now=0, session_active=True)
+    assert throttle.should_write(2000, now=4, session_active=True)
+    assert throttle.should_write(2000, now=5, session_active=True)
+    assert throttle.retry_in is None
+
+    # Turning it on applies the settings without a reload
+    entry.options = {**entry.options, "enable_throttling": True}
+    assert not throttle.should_write(3000, now=6, session_active=True)
+    assert throttle.retry_in == 9
+
+
+def test_min_interval(entry):
+    entry.options = {
+        "enable_throttling": True,
+        throttle_option("power", "min_interval"): 10,
+    }
+    throttle = SensorThrottle(entry, "power")
+
+    assert throttle.should_write(1000, now=0, session_active=True)
+    assert not throttle.should_write(2000, now=4, session_active=True)
+    assert throttle.retry_in == 6
+    assert throttle.should_write(2000, now=10, session_active=True)
+    assert throttle.retry_in is None
+
+
+def test_thresholds(entry):
+    entry.options = {
+        "enable_throttling": True,
+        throttle_option("current", "abs_threshold"): 1,
+        throttle_option("current", "rel_threshold"): 10,
+    }
+    throttle = SensorThrottle(entry, "current")
+
+    assert throttle.should_write(20, now=0, session_active=True)
+    assert not throttle.should_write(20.5, now=1, session_active=True)
+    assert throttle.retry_in == FLUSH_DELAY
+    assert throttle.should_write(21, now=2, session_active=True)
+
+    entry.options = {
+        "enable_throttling": True,
+        throttle_option("current", "rel_threshold"): 10,
+    }
+    assert not throttle.should_write(22, now=3, session_active=True)
+    assert throttle.should_write(23.1, now=4, session_active=True)
+
+
+def test_final_value_written_when_session_ends(entry):
+    entry.options = {
+        "enable_throttling": True,
+        throttle_option("voltage", "min_interval"): 60,
+    }
+    throttle = SensorThrottle(entry, "voltage")
+
+    assert throttle.should_write(230, now=0, session_active=True)
+    assert not throttle.should_write(0, now=1, session_active=True)
+    assert throttle.should_write(0, now=2, session_active=False)
+
+
+def test_non_numeric_values_are_written(entry):
+    entry.options = {
+        "enable_throttling": True,
+        throttle_option("voltage", "min_interval"): 60,
+    }
+    throttle = SensorThrottle(entry, "voltage")
+
+    assert throttle.should_write(230, now=0, session_active=True)
+    assert throttle.should_write(None, now=1, session_active=True)
+
+
+def test_dropped_change_is_flushed(entry):
+    entry.options = {
+        "enable_throttling": True,
+        throttle_option("power", "abs_threshold"): 100,
+        throttle_option("power", "min_interval"): 10,
+    }
+    throttle = SensorThrottle(entry, "power")
+
+    assert throttle.should_write(1000, now=0, session_active=True)
+    assert not throttle.should_write(1000, now=1, session_active=True)
+    assert throttle.retry_in is None
+    # An insignificant change is written later, unless another reading is
+    assert not throttle.should_write(1050, now=2, session_active=True)
+    assert throttle.retry_in == FLUSH_DELAY
+    assert throttle.flush(1050, now=2 + FLUSH_DELAY)
+    assert not throttle.flush(1050, now=3 + FLUSH_DELAY)